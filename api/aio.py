@@ -0,0 +1,106 @@
+from asgiref.sync import sync_to_async
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - optional, see the stand-ins below
+    httpx = None
+
+try:
+    import aiosmtplib
+except ImportError:  # pragma: no cover - optional, see the stand-ins below
+    aiosmtplib = None
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+
+
+# <========== Async I/O ==========> #
+#
+# Non-blocking versions of the external calls made on the request path:
+# HTTP (Clerk's JWKS), SMTP and DNS. httpx and aiosmtplib are used when
+# installed; without them the blocking implementation runs in a worker
+# thread (thread_sensitive=False, it touches neither the ORM nor request
+# state), which still leaves the event loop free.
+
+async def get_json(url, timeout=5):
+    """
+    GET `url` and return its decoded JSON body, raising for error statuses
+    (httpx.HTTPError, or requests.RequestException from the stand-in).
+    """
+    if httpx is not None:
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            response = await client.get(url)
+            response.raise_for_status()
+            return response.json()
+
+    import requests
+
+    def get():
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    return await sync_to_async(get, thread_sensitive=False)()
+
+
+def http_errors():
+    """
+    Exception types `get_json()` raises for network and HTTP errors.
+    """
+    import requests
+    errors = (requests.RequestException,)
+    if httpx is not None:
+        errors += (httpx.HTTPError,)
+    return errors
+
+
+async def send_message(message, host, port, username, password, use_tls=True):
+    """
+    Send a django EmailMessage through an SMTP server.
+    """
+    if aiosmtplib is not None:
+        await aiosmtplib.send(
+            message.message(),
+            sender=message.from_email, recipients=message.recipients(),
+            hostname=host, port=port, username=username, password=password, start_tls=use_tls,
+        )
+        return
+
+    from django.core.mail import get_connection
+
+    def send():
+        with get_connection(host=host, port=port, username=username, password=password, use_tls=use_tls) as connection:
+            message.connection = connection
+            message.send()
+    await sync_to_async(send, thread_sensitive=False)()
+
+
+async def accepts_email(domain, timeout=15):
+    """
+    Return whether `domain` can receive email: it publishes MX records, or
+    address records as the implicit MX, and no null MX (RFC 7505). Like
+    email_validator, a DNS timeout is not taken as a rejection.
+    """
+    resolver = dns.asyncresolver.Resolver()
+    resolver.lifetime = timeout
+    try:
+        answer = await resolver.resolve(domain, 'MX')
+        exchanges = [str(record.exchange) for record in answer]
+        return bool(exchanges) and exchanges != ['.']
+    except dns.resolver.NXDOMAIN:
+        return False
+    except dns.exception.Timeout:
+        return True
+    except (dns.resolver.NoAnswer, dns.resolver.NoNameservers):
+        pass
+
+    for record_type in ('A', 'AAAA'):
+        try:
+            await resolver.resolve(domain, record_type)
+            return True
+        except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.resolver.NoNameservers):
+            continue
+        except dns.exception.Timeout:
+            return True
+    return False
+
@@ -0,0 +1,212 @@
+import datetime
+import platform
+import statistics
+import subprocess
+import time
+from collections import Counter
+from contextlib import ExitStack
+from unittest import mock
+import django
+from django.conf import settings
+from django.db import connection, connections
+from django.urls import get_resolver
+from email_validator import validate_email as email_validator
+from rest_framework.test import APIClient
+from api.benchmarks.scenarios import SCENARIOS
+from api.benchmarks.seed import seed_tenant
+from api.middleware import QueryStats
+from core.authentication import ClerkAuthentication
+from core.models import User
+
+TOKEN_PREFIX = 'bench:'
+PERCENTILES = (50, 90, 95, 99)
+
+
+# <========== Stubs ==========> #
+#
+# External calls would dominate (and add noise to) the numbers: Clerk's JWKS
+# endpoint and the DNS deliverability checks of the email validators.
+
+def _authenticate(self, request):
+    auth_header = request.headers.get('Authorization', '')
+    if not auth_header.startswith(f'Bearer {TOKEN_PREFIX}'):
+        return None
+    return User.objects.get(id=auth_header[len(f'Bearer {TOKEN_PREFIX}'):]), None
+
+
+def _validate_email_offline(value, **kwargs):
+    kwargs['check_deliverability'] = False
+    return email_validator(value, **kwargs)
+
+
+async def _accepts_email_offline(domain, **kwargs):
+    return True
+
+
+def stubbed_externals():
+    stack = ExitStack()
+    stack.enter_context(mock.patch.object(ClerkAuthentication, 'authenticate', _authenticate))
+    # The validators import validate_email when they run
+    stack.enter_context(mock.patch('email_validator.validate_email', _validate_email_offline))
+    stack.enter_context(mock.patch('api.aio.accepts_email', _accepts_email_offline))
+    return stack
+
+
+# <========== Measurements ==========> #
+
+def percentile(values, pct):
+    """
+    Linear interpolation between the closest ranks.
+    """
+    values = sorted(values)
+    if not values:
+        return None
+    rank = (len(values) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+def summarize(values):
+    summary = {f'p{pct}': round(percentile(values, pct), 3) for pct in PERCENTILES}
+    summary['mean'] = round(statistics.fmean(values), 3)
+    summary['max'] = round(max(values), 3)
+    return summary
+
+
+def run_scenario(client, scenario, tenant, iterations, warmup, capture=None):
+    latencies, db_times, query_counts = [], [], []
+    statuses = Counter()
+
+    for iteration in range(warmup + iterations):
+        user = scenario.get_user(tenant, iteration)
+        url = scenario.get_url(tenant, iteration)
+        data = scenario.get_data(tenant, iteration)
+        stats = QueryStats()
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(stats))
+                if capture is not None:
+                    stack.enter_context(connections[alias].execute_wrapper(capture))
+            start = time.perf_counter()
+            response = getattr(client, scenario.method)(
+                url, data, format=None if scenario.method == 'get' else 'json',
+                HTTP_AUTHORIZATION=f'Bearer {TOKEN_PREFIX}{user.pk}',
+            )
+            elapsed = time.perf_counter() - start
+
+        if iteration < warmup:
+            continue
+        latencies.append(elapsed * 1000)
+        db_times.append(stats.duration * 1000)
+        query_counts.append(stats.count)
+        statuses[response.status_code] += 1
+
+    return {
+        'tenant': tenant['size'],
+        'scenario': scenario.name,
+        'method': scenario.method.upper(),
+        'route': scenario.route,
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        'latency_ms': summarize(latencies),
+        'db_ms': summarize(db_times),
+        'queries': {'median': statistics.median(query_counts), 'max': max(query_counts)},
+    }
+
+
+# Operational endpoints, not part of the product surface
+IGNORED_ROUTES = {'api-root', 'metrics', 'profiles-list', 'profiles-detail'}
+
+
+def uncovered_routes(scenarios):
+    """
+    Return the names of the routes in api/urls.py no scenario requests.
+    """
+    names = {name for name in get_resolver('api.urls').reverse_dict if isinstance(name, str)}
+    return sorted(names - {scenario.route for scenario in scenarios} - IGNORED_ROUTES)
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, iterations=20, warmup=2, attendance_days=365, employees=None, scenarios=SCENARIOS, log=None,
+        capture=None):
+    """
+    Seed one tenant per size, run every scenario against each and return the
+    report as a JSON serializable dict. `capture`, an execute wrapper, sees
+    every query the scenarios run (and none of the seeding).
+    """
+    log = log or (lambda message: None)
+    results = []
+
+    with stubbed_externals():
+        client = APIClient()
+        for index, size in enumerate(sizes):
+            log(f'Seeding {size} tenant...')
+            start = time.perf_counter()
+            tenant = seed_tenant(size, index=index, attendance_days=attendance_days, employees=employees)
+            log(f'Seeded {size} tenant in {time.perf_counter() - start:.1f}s')
+
+            for scenario in scenarios:
+                try:
+                    scenario.get_url(tenant, 0)
+                except (IndexError, ZeroDivisionError):
+                    log(f'{size:<10} {scenario.name:<32} skipped, nothing seeded to request')
+                    continue
+                result = run_scenario(client, scenario, tenant, iterations, warmup, capture)
+                log(f"{size:<10} {scenario.name:<32} p50 {result['latency_ms']['p50']:>8.2f} ms  "
+                    f"p95 {result['latency_ms']['p95']:>8.2f} ms  queries {result['queries']['max']}")
+                results.append(result)
+
+    return {
+        'meta': {
+            'revision': _git_revision(),
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'sizes': list(sizes),
+            'iterations': iterations,
+            'warmup': warmup,
+            'attendance_days': attendance_days,
+            'employees': employees,
+            'stubs': ['ClerkAuthentication', 'email deliverability (DNS)'],
+        },
+        'uncovered_routes': uncovered_routes(scenarios),
+        'results': results,
+    }
+
+
+def compare(baseline, report, threshold=0.2):
+    """
+    Compare two reports and return one row per scenario present in both, with
+    a `regression` flag when p95 latency grew by more than `threshold` or the
+    query count grew at all.
+    """
+    previous = {(result['tenant'], result['scenario']): result for result in baseline['results']}
+    rows = []
+    for result in report['results']:
+        before = previous.get((result['tenant'], result['scenario']))
+        if before is None:
+            continue
+        p95_before, p95_after = before['latency_ms']['p95'], result['latency_ms']['p95']
+        change = (p95_after - p95_before) / p95_before if p95_before else 0.0
+        rows.append({
+            'tenant': result['tenant'],
+            'scenario': result['scenario'],
+            'p95_before': p95_before,
+            'p95_after': p95_after,
+            'p95_change': round(change, 3),
+            'queries_before': before['queries']['max'],
+            'queries_after': result['queries']['max'],
+            'regression': change > threshold or result['queries']['max'] > before['queries']['max'],
+        })
+    return rows
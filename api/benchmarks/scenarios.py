@@ -0,0 +1,203 @@
+import datetime
+import uuid
+from django.urls import reverse
+from core.models import User
+from org.models import OrganizationMemberInvitation
+
+
+class Scenario:
+    """
+    One request to benchmark against a seeded tenant.
+
+    `kwargs`, `data`, `query` and `user` are callables taking (tenant,
+    iteration) and return the URL kwargs, the request body, the query string
+    and the user to authenticate as (the tenant owner by default).
+    """
+    def __init__(self, name, method, route, kwargs=None, data=None, query=None, user=None):
+        self.name = name
+        self.method = method
+        self.route = route
+        self.kwargs = kwargs
+        self.data = data
+        self.query = query
+        self.user = user
+
+    def get_user(self, tenant, iteration):
+        return self.user(tenant, iteration) if self.user else tenant['owner']
+
+    def get_url(self, tenant, iteration):
+        kwargs = self.kwargs(tenant, iteration) if self.kwargs else {}
+        return reverse(self.route, kwargs=kwargs)
+
+    def get_data(self, tenant, iteration):
+        if self.method == 'get':
+            return self.query(tenant, iteration) if self.query else {}
+        return self.data(tenant, iteration) if self.data else {}
+
+
+def _organization(tenant, iteration):
+    return {'pk': tenant['organization'].pk}
+
+
+def _nested(tenant, iteration):
+    return {'organization_pk': tenant['organization'].pk}
+
+
+def _nested_detail(key):
+    def kwargs(tenant, iteration):
+        return {'organization_pk': tenant['organization'].pk, 'pk': tenant[key]}
+    return kwargs
+
+
+def _nested_pick(key):
+    def kwargs(tenant, iteration):
+        ids = tenant[key]
+        return {'organization_pk': tenant['organization'].pk, 'pk': ids[iteration % len(ids)]}
+    return kwargs
+
+
+def _pick(key):
+    def kwargs(tenant, iteration):
+        ids = tenant[key]
+        return {'pk': ids[iteration % len(ids)]}
+    return kwargs
+
+
+def _new_owner(tenant, iteration):
+    # A user can only own one organization
+    suffix = uuid.uuid4().hex[:10]
+    return User.objects.create(id=str(uuid.uuid4()), username=f'bench-new-{suffix}', email=f'{suffix}@bench.example.com')
+
+
+def _invitee(tenant, iteration):
+    email = f"invitee-{iteration}-{tenant['organization'].name_space}@bench.example.com"
+    user, _ = User.objects.get_or_create(email=email, defaults={'id': str(uuid.uuid4()), 'username': email[:150]})
+    return user
+
+
+def _invitation_token(tenant, iteration):
+    invitation = OrganizationMemberInvitation.objects.create(
+        organization=tenant['organization'], email=_invitee(tenant, iteration).email, invited_by=tenant['owner'],
+    )
+    return {'token': invitation.make_token()}
+
+
+def _new_organization(tenant, iteration):
+    suffix = uuid.uuid4().hex[:10]
+    return {
+        'name': f'bench{suffix}',
+        'name_space': f'bench{suffix}',
+        'email': f'org-{suffix}@bench.example.com',
+        'phone': f'+1415{2000000 + int(suffix[:6], 16) % 7999999:07d}',
+    }
+
+
+def _new_employee(tenant, iteration):
+    suffix = uuid.uuid4().int
+    return {
+        'first_name': 'Bench',
+        'last_name': f'Hire{iteration}',
+        'gender': 'F',
+        'date_of_birth': '1990-01-01',
+        'phone_number': f'+1415{2000000 + suffix % 7999999:07d}',
+        'address': '1 Bench Street',
+        'position_id': tenant['position_ids'][0],
+        'hire_date': '2024-01-01',
+    }
+
+
+SCENARIOS = [
+    # Organizations
+    Scenario('organizations.list', 'get', 'organizations-list'),
+    Scenario('organizations.retrieve', 'get', 'organizations-detail', kwargs=_organization),
+    Scenario('organizations.me', 'get', 'organizations-me'),
+    Scenario('organizations.create', 'post', 'organizations-list', data=_new_organization, user=_new_owner),
+    Scenario(
+        'organizations.partial_update', 'patch', 'organizations-detail', kwargs=_organization,
+        data=lambda tenant, iteration: {'description': f'Benchmark run {iteration}'},
+    ),
+    Scenario('my_organization.list', 'get', 'my_organization-list'),
+    Scenario('my_organization.retrieve', 'get', 'my_organization-detail', kwargs=_organization),
+    Scenario('my_invitations.list', 'get', 'my_invitations-list', user=_invitee),
+    Scenario('my_invitations.reject', 'post', 'my_invitations-reject', data=_invitation_token, user=_invitee),
+    Scenario('permissions.list', 'get', 'permissions-list'),
+    Scenario('permissions.retrieve', 'get', 'permissions-detail', kwargs=_pick('permission_ids')),
+
+    # Members and invitations
+    Scenario('members.list', 'get', 'member-list', kwargs=_nested),
+    Scenario('members.retrieve', 'get', 'member-detail', kwargs=_nested_detail('member_id')),
+    Scenario(
+        'members.partial_update', 'patch', 'member-detail', kwargs=_nested_detail('member_id'),
+        data=lambda tenant, iteration: {'is_admin': bool(iteration % 2)},
+    ),
+    Scenario(
+        'members.bulk', 'post', 'member-bulk', kwargs=_nested,
+        data=lambda tenant, iteration: {
+            'members': tenant['member_ids'],
+            'is_admin': bool(iteration % 2),
+            'grant_permissions' if iteration % 2 else 'revoke_permissions': tenant['permission_ids'][:3],
+        },
+    ),
+    Scenario(
+        'members.effective_permissions', 'get', 'member-effective-permissions', kwargs=_nested_detail('member_id'),
+    ),
+    Scenario('roles.list', 'get', 'role-list', kwargs=_nested),
+    Scenario('roles.retrieve', 'get', 'role-detail', kwargs=_nested_detail('role_id')),
+    Scenario(
+        'roles.create', 'post', 'role-list', kwargs=_nested,
+        data=lambda tenant, iteration: {'name': f'role-{uuid.uuid4().hex[:10]}', 'permissions': tenant['permission_ids'][:5]},
+    ),
+    Scenario(
+        'roles.partial_update', 'patch', 'role-detail', kwargs=_nested_detail('role_id'),
+        data=lambda tenant, iteration: {'description': f'Benchmark run {iteration}'},
+    ),
+    Scenario('invitations.list', 'get', 'invitation-list', kwargs=_nested),
+    Scenario('invitations.retrieve', 'get', 'invitation-detail', kwargs=_nested_detail('invitation_id')),
+    Scenario(
+        'invitations.create', 'post', 'invitation-list', kwargs=_nested,
+        data=lambda tenant, iteration: {'email': f'invitee-{uuid.uuid4().hex[:10]}@bench.example.com'},
+    ),
+    Scenario(
+        'invitations.bulk', 'post', 'invitation-bulk', kwargs=_nested,
+        data=lambda tenant, iteration: {
+            'emails': [f'invitee-{uuid.uuid4().hex[:10]}@bench.example.com' for _ in range(20)],
+        },
+    ),
+
+    # HR
+    Scenario('departments.list', 'get', 'department-list', kwargs=_nested),
+    Scenario('departments.retrieve', 'get', 'department-detail', kwargs=_nested_pick('department_ids')),
+    Scenario(
+        'departments.create', 'post', 'department-list', kwargs=_nested,
+        data=lambda tenant, iteration: {'name': f'Department {uuid.uuid4().hex[:10]}'},
+    ),
+    Scenario(
+        'departments.partial_update', 'patch', 'department-detail', kwargs=_nested_pick('department_ids'),
+        data=lambda tenant, iteration: {'description': f'Benchmark run {iteration}'},
+    ),
+    Scenario('positions.list', 'get', 'position-list', kwargs=_nested),
+    Scenario('positions.retrieve', 'get', 'position-detail', kwargs=_nested_pick('position_ids')),
+    Scenario(
+        'positions.create', 'post', 'position-list', kwargs=_nested,
+        data=lambda tenant, iteration: {
+            'title': f'Position {uuid.uuid4().hex[:10]}', 'department_id': tenant['department_ids'][0],
+        },
+    ),
+    Scenario('employees.list', 'get', 'employee-list', kwargs=_nested),
+    Scenario('employees.retrieve', 'get', 'employee-detail', kwargs=_nested_pick('employee_ids')),
+    Scenario('employees.create', 'post', 'employee-list', kwargs=_nested, data=_new_employee),
+    Scenario('attendances.list', 'get', 'attendance-list', kwargs=_nested),
+    Scenario(
+        'attendances.list_month', 'get', 'attendance-list', kwargs=_nested,
+        query=lambda tenant, iteration: {
+            'date__gte': (datetime.date.today() - datetime.timedelta(days=30)).isoformat(),
+            'date__lte': datetime.date.today().isoformat(),
+            'page_size': 100,
+        },
+    ),
+    Scenario('attendances.retrieve', 'get', 'attendance-detail', kwargs=_nested_pick('attendance_ids')),
+    Scenario(
+        'attendances.check_in', 'post', 'attendance-list', kwargs=_nested,
+        data=lambda tenant, iteration: {'employee_id': tenant['employee_ids'][iteration % len(tenant['employee_ids'])]},
+    ),
+]
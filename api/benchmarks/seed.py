@@ -0,0 +1,180 @@
+import datetime
+import random
+import uuid
+from django.db import transaction
+from core.models import Permission, User
+from hr.models import Attendance, Department, Employee, EmploymentDetails, Position
+from org.models import Organization, OrganizationMember, OrganizationMemberInvitation, OrganizationRole, OrganizationUsage
+
+
+# Tenant profiles, keyed by the name used on the command line
+SIZES = {
+    'solo': {
+        'organization_type': Organization.SOLO,
+        'members': 1,
+        'employees': 100,
+        'departments': 3,
+        'positions_per_department': 2,
+    },
+    'team': {
+        'organization_type': Organization.TEAM,
+        'members': 20,
+        'employees': 1000,
+        'departments': 8,
+        'positions_per_department': 3,
+    },
+    'enterprise': {
+        'organization_type': Organization.ENTERPRISE,
+        'members': 50,
+        'employees': 5000,
+        'departments': 20,
+        'positions_per_department': 4,
+    },
+}
+
+ATTENDANCE_STATUSES = ['present'] * 17 + ['late'] * 2 + ['absent']
+BATCH_SIZE = 2000
+
+
+def seed_permissions():
+    for name, _ in Permission.PERMISSION_CHOICES:
+        Permission.objects.get_or_create(name=name)
+    return list(Permission.objects.all())
+
+
+def _create_users(prefix, count):
+    users = [
+        User(
+            id=str(uuid.uuid4()),
+            username=f'{prefix}-{index}',
+            email=f'{prefix}-{index}@bench.example.com',
+            first_name='Bench',
+            last_name=f'User{index}',
+            password='!',
+        )
+        for index in range(count)
+    ]
+    return User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+
+
+def _free_employee_id_range(rng, count):
+    # Employee ids (and the phone numbers derived from them) are unique
+    while True:
+        first_id = 10000000 + rng.randrange(89999999 - count)
+        if not Employee.objects.filter(id__gte=str(first_id), id__lt=str(first_id + count)).exists():
+            return first_id
+
+
+def seed_tenant(size, index=0, attendance_days=365, employees=None, today=None):
+    """
+    Create an organization of the given size with its owner, members,
+    departments, positions, employees and `attendance_days` days of
+    attendance (weekdays only, ending yesterday).
+
+    Returns a dict with the created organization and owner and the ids the
+    scenarios need.
+    """
+    profile = dict(SIZES[size])
+    if employees is not None:
+        profile['employees'] = employees
+    rng = random.Random(f'{size}-{index}')
+    today = today or datetime.date.today()
+    slug = f'bench-{size}-{index}-{uuid.uuid4().hex[:6]}'
+
+    with transaction.atomic():
+        permissions = seed_permissions()
+        owner, *member_users = _create_users(slug, profile['members'] + 1)
+
+        organization = Organization.objects.create(
+            user=owner,
+            name=slug,
+            name_space=slug,
+            email=f'{slug}@bench.example.com',
+            phone=f'+1202{2000000 + rng.randrange(7999999):07d}',
+            organization_type=profile['organization_type'],
+        )
+        owner_member = OrganizationMember.objects.create(
+            organization=organization, user=owner,
+            status=OrganizationMember.ACTIVE, is_owner=True, is_admin=True,
+        )
+        role = OrganizationRole.objects.create(organization=organization, name=f'{slug}-staff')
+        role.permissions.add(*permissions[:len(permissions) // 2])
+        members = OrganizationMember.objects.bulk_create([
+            OrganizationMember(organization=organization, user=user, status=OrganizationMember.ACTIVE, role=role)
+            for user in member_users
+        ])
+
+        invitation = OrganizationMemberInvitation.objects.create(
+            organization=organization, email=f'invitee-{slug}@bench.example.com', invited_by=owner,
+        )
+
+        departments = Department.objects.bulk_create([
+            Department(organization=organization, name=f'{slug}-department-{number}')
+            for number in range(profile['departments'])
+        ])
+        positions = Position.objects.bulk_create([
+            Position(department=department, title=f'{department.name}-position-{number}')
+            for department in departments
+            for number in range(profile['positions_per_department'])
+        ])
+
+        first_id = _free_employee_id_range(rng, profile['employees'])
+        employees = Employee.objects.bulk_create([
+            Employee(
+                id=str(first_id + number),
+                organization=organization,
+                first_name=f'First{number}',
+                last_name=f'Last{number}',
+                date_of_birth=datetime.date(1970, 1, 1) + datetime.timedelta(days=rng.randrange(12000)),
+                gender=rng.choice('MFO'),
+                phone_number=f'+1{first_id + number}',
+                address=f'{number} Bench Street',
+            )
+            for number in range(profile['employees'])
+        ], batch_size=BATCH_SIZE)
+        EmploymentDetails.objects.bulk_create([
+            EmploymentDetails(
+                employee=employee,
+                position=rng.choice(positions),
+                hire_date=today - datetime.timedelta(days=rng.randrange(365, 3650)),
+                shift_start=datetime.time(9),
+                shift_end=datetime.time(17),
+            )
+            for employee in employees
+        ], batch_size=BATCH_SIZE)
+
+        attendances = []
+        for days_ago in range(attendance_days, 0, -1):
+            day = today - datetime.timedelta(days=days_ago)
+            if day.weekday() >= 5:
+                continue
+            attendances = []
+            for employee in employees:
+                status = rng.choice(ATTENDANCE_STATUSES)
+                attendances.append(Attendance(
+                    organization=organization,
+                    employee=employee,
+                    date=day,
+                    time_in=datetime.time(9, 30) if status == 'late' else datetime.time(9),
+                    time_out=datetime.time(17),
+                    status=status,
+                ))
+            Attendance.objects.bulk_create(attendances, batch_size=BATCH_SIZE)
+
+        # bulk_create() sends no signals
+        OrganizationUsage.objects.reconcile(Organization.all_objects.filter(pk=organization.pk))
+
+    return {
+        'size': size,
+        'organization': organization,
+        'owner': owner,
+        'member_id': (members[0] if members else owner_member).pk,
+        'member_ids': [member.pk for member in members],
+        'invitation_id': invitation.pk,
+        'role_id': role.pk,
+        'employee_ids': [employee.id for employee in employees],
+        'department_ids': [department.id for department in departments],
+        'position_ids': [position.id for position in positions],
+        'attendance_ids': [attendance.id for attendance in attendances[:100]],
+        'permission_ids': [permission.id for permission in permissions],
+    }
@@ -0,0 +1,244 @@
+import hashlib
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+# <========== Data versions ==========> #
+#
+# Every organization (and a few other scopes, e.g. a user's own organization or
+# the permission catalog) has a data version stored in the cache. Cached
+# responses embed the version in their key, so bumping it invalidates every
+# cached read of that scope in O(1) without tracking individual keys.
+
+DATA_VERSION_KEY = 'data_version:{}'
+
+# Bumped by every Permission write (see core/signals.py)
+PERMISSION_CATALOG_SCOPE = 'permissions'
+
+
+def organization_scope(organization_id):
+    return f'org:{organization_id}'
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def get_data_version(scope):
+    """
+    Return the current data version for a scope, initializing it if needed.
+    Fresh versions are time based so a version evicted from the cache never
+    comes back with a value older entries were stored under.
+    """
+    key = DATA_VERSION_KEY.format(scope)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def _increment_data_versions(scopes):
+    for scope in scopes:
+        key = DATA_VERSION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), None)
+
+
+class _PendingVersions(set):
+    """
+    The scopes a transaction bumps, registered as its on_commit callback by
+    every bump. The first call bumps them all, the others have nothing left
+    to do. A rollback discards the callbacks, and the scopes with them.
+    """
+    flushed = False
+
+    def __call__(self):
+        if not self.flushed:
+            self.flushed = True
+            _increment_data_versions(self)
+
+
+def _pending_versions(connection):
+    pending = getattr(connection, '_pending_data_versions', None)
+    if pending is None or pending.flushed:
+        return None
+    if not any(func is pending for _, func, _ in connection.run_on_commit):
+        return None
+    return pending
+
+
+def bump_data_version(*scopes, using=None):
+    """
+    Invalidate every cached read of the given scopes.
+
+    The bump runs once the current transaction commits (immediately outside of
+    one): bumping earlier would let a concurrent reader cache pre-commit data
+    under the new version. Bumps queued by the same transaction are coalesced.
+    """
+    scopes = {scope for scope in scopes if scope}
+    if not scopes:
+        return
+    connection = transaction.get_connection(using)
+    pending = _pending_versions(connection)
+    if pending is None:
+        # The first bump of the transaction, or the earlier ones were rolled back
+        pending = connection._pending_data_versions = _PendingVersions()
+    pending.update(scopes)
+    transaction.on_commit(pending, using=using)
+
+
+def pending_data_versions(using=None):
+    """
+    The scopes the current transaction will bump when it commits.
+    """
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        return set()
+    return _pending_versions(connection) or set()
+
+
+def bump_organization_version(organization_id, using=None):
+    if organization_id:
+        bump_data_version(organization_scope(organization_id), using=using)
+
+
+# <========== Cached facts ==========> #
+#
+# Version bumps only invalidate entries for the workers sharing the cache. On
+# a per-process cache (settings.SHARED_CACHE off) another worker would keep
+# serving a fact a write changed, e.g. a removed member's access, so nothing
+# is cached then.
+
+def cached(key, load, timeout=None):
+    """
+    Return the value cached under `key`, calling `load()` and storing its
+    result on a miss. `load` must not return None.
+    """
+    if not settings.SHARED_CACHE:
+        return load()
+    value = cache.get(key)
+    if value is None:
+        value = load()
+        cache.set(key, value, settings.RESPONSE_CACHE_TIMEOUT if timeout is None else timeout)
+    return value
+
+
+# <========== Active organizations ==========> #
+
+def is_active_organization(organization_id):
+    """
+    Whether `organization_id` names an active organization. Cached per
+    organization under its own version, which every save of the
+    organization (deactivating it included) bumps.
+    """
+    try:
+        organization_id = str(uuid.UUID(str(organization_id)))
+    except ValueError:
+        return False
+    version = get_data_version(organization_scope(organization_id))
+
+    def load():
+        from api.db.routers import use_primary
+        from org.models import Organization
+
+        # Stored for everyone: never from a lagging replica
+        with use_primary():
+            return Organization.objects.filter(pk=organization_id).exists()
+
+    return cached(f'org_active:{organization_id}:{version}', load)
+
+
+def is_organization_member(organization_id, user_id):
+    """
+    Whether the user owns the organization or has an active membership in
+    it. Cached under the organization version, which membership changes bump.
+    """
+    version = get_data_version(organization_scope(organization_id))
+
+    def load():
+        from api.db.routers import use_primary
+        from org.models import Organization, OrganizationMember
+
+        # Stored for everyone: never from a lagging replica
+        with use_primary():
+            return (
+                OrganizationMember.objects.filter(
+                    organization_id=organization_id, user_id=user_id, status=OrganizationMember.ACTIVE,
+                ).exists()
+                or Organization.objects.filter(pk=organization_id, user_id=user_id).exists()
+            )
+
+    return cached(f'is_member:{organization_id}:{version}:{user_id}', load)
+
+
+# <========== Response cache ==========> #
+
+def permission_fingerprint(organization_id, user, version):
+    """
+    Return a short hash of what the user is allowed to see in an organization.
+    Users sharing the same membership flags and permissions share cached
+    responses. The fingerprint itself is cached under the organization version,
+    so any membership or permission change recomputes it.
+    """
+    if not getattr(user, 'is_authenticated', False):
+        return 'anonymous'
+
+    def load():
+        from api.db.routers import use_primary
+        from org.models import OrganizationMember
+
+        with use_primary():
+            member = OrganizationMember.objects.filter(
+                organization_id=organization_id, user=user
+            ).only('organization_id', 'role_id', 'is_owner', 'is_admin', 'status').first()
+            if member is None:
+                return 'none'
+            permissions = sorted(member.get_permission_names())
+        raw = repr((member.is_owner, member.is_admin, member.status, permissions))
+        return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+    return cached(f'perm_fp:{organization_id}:{version}:{user.pk}', load)
+
+
+def role_permissions(organization_id, role_id):
+    """
+    Return the permission names of a role, cached under the organization
+    version: editing the role, or its permissions, recompiles the set.
+    """
+    version = get_data_version(organization_scope(organization_id))
+
+    def load():
+        from api.db.routers import use_primary
+        from core.models import Permission
+
+        with use_primary():
+            return sorted(Permission.objects.filter(roles=role_id).values_list('name', flat=True))
+
+    return cached(f'role_perms:{organization_id}:{version}:{role_id}', load)
+
+
+def permission_catalog():
+    """
+    Return the permission catalog as {id: name}, cached under its data
+    version. Warmed up when a process starts (see api/warmup.py).
+    """
+    version = get_data_version(PERMISSION_CATALOG_SCOPE)
+
+    def load():
+        from core.models import Permission
+
+        return dict(Permission.objects.values_list('pk', 'name'))
+
+    return cached(f'permission_catalog:{version}', load)
+
+
+def response_cache_key(scope, version, *parts):
+    raw = repr(parts)
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return f'response:{scope}:{version}:{digest}'
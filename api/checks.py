@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    SHARED_CACHE promises that every worker sees the data version bumps and
+    primary pins of the others, which a per-process cache cannot keep.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.SHARED_CACHE and backend in PER_PROCESS_CACHES:
+        return [Error(
+            f'SHARED_CACHE is set but the default cache ({backend}) is not shared between workers.',
+            hint='Set REDIS_URL, or unset SHARED_CACHE to turn response, query and authorization caching off.',
+            id='api.E001',
+        )]
+    return []
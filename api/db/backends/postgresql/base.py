@@ -0,0 +1,19 @@
+import time
+from django.db.backends.postgresql import base
+from api.db.stats import record_connect
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend recording how long it takes to open (or, with the
+    psycopg pool, to acquire) each connection.
+    """
+    connect_duration = None
+
+    def get_new_connection(self, conn_params):
+        start = time.perf_counter()
+        try:
+            return super().get_new_connection(conn_params)
+        finally:
+            self.connect_duration = time.perf_counter() - start
+            record_connect(self.alias, self.connect_duration)
@@ -0,0 +1,343 @@
+import json
+import re
+import time
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, models, transaction
+from api.middleware import fingerprint_sql
+
+
+# <========== Index advisor ==========> #
+#
+# Index decisions from the queries the application actually runs: the
+# benchmark scenarios are replayed with a QueryCapture attached, then every
+# captured query shape is explained with EXPLAIN (ANALYZE, BUFFERS) and the
+# plans are searched for scans throwing most of the rows they read away.
+# Their filter columns, equality ones first, make the suggested composite
+# index, unless an existing index already starts with them.
+#
+# pg_stat_user_indexes then lists the indexes the workload never used, and
+# the indexes whose columns are a prefix of another index are reported as
+# redundant. Only the latter works outside PostgreSQL.
+
+EXPLAINED_STATEMENTS = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+SCAN_NODES = {'Seq Scan', 'Index Scan', 'Index Only Scan', 'Bitmap Heap Scan'}
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PREDICATE = re.compile(r'(?:"?\w+"?\.)?"?([a-z_][a-z0-9_]*)"?\s*(<=|>=|=|<|>|IS\b)', re.IGNORECASE)
+
+
+class CapturedQuery:
+    """
+    The first query seen of a shape, with its parameters, and how often and
+    for how long the shape ran.
+    """
+    def __init__(self, fingerprint, alias, sql, params):
+        self.fingerprint = fingerprint
+        self.alias = alias
+        self.sql = sql
+        self.params = params
+        self.calls = 0
+        self.duration = 0.0
+
+    @property
+    def is_explainable(self):
+        return self.sql.lstrip().upper().startswith(EXPLAINED_STATEMENTS)
+
+
+class QueryCapture:
+    """
+    Execute wrapper keeping one sample of every query shape run through it.
+    """
+    def __init__(self):
+        self.queries = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            # executemany() batches are inserts: nothing to index for
+            if not many:
+                fingerprint = fingerprint_sql(sql)
+                query = self.queries.get(fingerprint)
+                if query is None:
+                    query = self.queries[fingerprint] = CapturedQuery(
+                        fingerprint, context['connection'].alias, sql, params,
+                    )
+                query.calls += 1
+                query.duration += time.perf_counter() - start
+
+    def most_expensive(self):
+        return sorted(self.queries.values(), key=lambda query: query.duration, reverse=True)
+
+
+# <========== Schema ==========> #
+
+def models_by_table():
+    return {model._meta.db_table: model for model in apps.get_models(include_auto_created=True)}
+
+
+def _conditional_index_names():
+    """
+    Partial and expression indexes: their columns alone say nothing about
+    what they cover.
+    """
+    names = set()
+    for model in apps.get_models(include_auto_created=True):
+        for index in [*model._meta.indexes, *model._meta.constraints]:
+            if getattr(index, 'condition', None) is not None or getattr(index, 'expressions', ()):
+                names.add(index.name)
+    return names
+
+
+def table_indexes(table, using=DEFAULT_DB_ALIAS):
+    """
+    The indexes of `table` as {name: (columns, unique)}, unique and primary
+    key constraints included.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return {
+        name: (tuple(info['columns']), bool(info['unique'] or info['primary_key']))
+        for name, info in constraints.items()
+        if (info['index'] or info['unique'] or info['primary_key'])
+        and info['columns'] and None not in info['columns']
+    }
+
+
+def _field_names(model, columns):
+    by_column = {field.column: field.name for field in model._meta.local_fields}
+    return [by_column.get(column, column) for column in columns]
+
+
+def suggest_index(model, columns):
+    """
+    The Meta.indexes entry for a composite index on `columns`.
+    """
+    fields = _field_names(model, columns)
+    index = models.Index(fields=fields)
+    index.set_name_with_model(model)
+    return f'{model._meta.label}: add models.Index(fields={fields!r}, name={index.name!r}) to Meta.indexes'
+
+
+def suggest_removal(model, name, columns):
+    for index in model._meta.indexes:
+        if index.name == name:
+            return f'{model._meta.label}: remove models.Index(fields={list(index.fields)!r}) from Meta.indexes'
+    if len(columns) == 1:
+        for field in model._meta.local_fields:
+            if field.column == columns[0] and field.db_index:
+                return f'{model._meta.label}: set db_index=False on {field.name}'
+    return f'{model._meta.label}: drop index {name} in a RunSQL migration'
+
+
+# <========== Plans ==========> #
+
+def explain(query):
+    """
+    The EXPLAIN (ANALYZE, BUFFERS) plan of a captured query. ANALYZE runs
+    the statement: it does so in a transaction that is always rolled back.
+    """
+    connection = connections[query.alias]
+    with transaction.atomic(using=query.alias):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query.sql}', query.params)
+            plan = cursor.fetchone()[0]
+        transaction.set_rollback(True, using=query.alias)
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def scan_nodes(plan):
+    if plan.get('Node Type') in SCAN_NODES:
+        yield plan
+    for child in plan.get('Plans', []):
+        yield from scan_nodes(child)
+
+
+def filter_columns(node, columns):
+    """
+    The columns of the table the scan node filters on, as (equality,
+    range) lists in the order they appear.
+    """
+    conditions = [node.get('Index Cond'), node.get('Recheck Cond'), node.get('Filter')]
+    conditions += [child.get('Index Cond') for child in node.get('Plans', []) if child['Node Type'] == 'Bitmap Index Scan']
+    equality, ranges = [], []
+    for condition in filter(None, conditions):
+        for column, operator in _PREDICATE.findall(_STRING.sub("''", condition)):
+            if column not in columns or column in equality or column in ranges:
+                continue
+            (equality if operator in ('=', 'IS') else ranges).append(column)
+    return equality, ranges
+
+
+def is_covered(indexes, equality, ranges):
+    """
+    Whether an index starts with the equality columns, in any order, followed
+    by the first range column.
+    """
+    for columns, _ in indexes.values():
+        if set(columns[:len(equality)]) != set(equality):
+            continue
+        if not ranges or columns[len(equality):len(equality) + 1] == (ranges[0],):
+            return True
+    return False
+
+
+def analyze_plan(plan, fingerprint, min_rows, tables, indexes):
+    """
+    Return the sequential scans and missing indexes found in a plan.
+    `tables` maps table names to models, `indexes` table names to their
+    table_indexes() and is filled as tables are met.
+    """
+    sequential_scans, missing = [], []
+    for node in scan_nodes(plan):
+        table = node.get('Relation Name')
+        model = tables.get(table)
+        if model is None:
+            continue
+        loops = node.get('Actual Loops', 1)
+        rows = node.get('Actual Rows', 0) * loops
+        removed = node.get('Rows Removed by Filter', 0) * loops
+        if node['Node Type'] == 'Seq Scan' and rows + removed >= min_rows:
+            sequential_scans.append({
+                'table': table,
+                'query': fingerprint,
+                'rows': rows,
+                'rows_removed': removed,
+                'buffers': node.get('Shared Hit Blocks', 0) + node.get('Shared Read Blocks', 0),
+                'filter': node.get('Filter'),
+            })
+        if removed < min_rows:
+            continue
+
+        equality, ranges = filter_columns(node, {field.column for field in model._meta.local_fields})
+        if not equality and not ranges:
+            continue
+        if table not in indexes:
+            indexes[table] = table_indexes(table)
+        if not is_covered(indexes[table], equality, ranges):
+            missing.append({'table': table, 'columns': tuple(equality + ranges[:1]), 'query': fingerprint, 'rows_removed': removed})
+    return sequential_scans, missing
+
+
+# <========== Index usage ==========> #
+
+def unused_indexes(tables, using=DEFAULT_DB_ALIAS):
+    """
+    Indexes of the application's tables pg_stat_user_indexes counts no scan
+    of. Unique indexes are kept whatever their use: they enforce constraints.
+    """
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        # Statistics reach the views when a transaction ends, or on demand
+        if connection.pg_version >= 150000:
+            cursor.execute('SELECT pg_stat_force_next_flush()')
+        cursor.execute('SELECT pg_stat_clear_snapshot()')
+        cursor.execute(
+            'SELECT s.relname, s.indexrelname, pg_relation_size(s.indexrelid) '
+            'FROM pg_stat_user_indexes s JOIN pg_index i ON i.indexrelid = s.indexrelid '
+            'WHERE s.idx_scan = 0 AND NOT i.indisunique AND NOT i.indisprimary '
+            'ORDER BY pg_relation_size(s.indexrelid) DESC'
+        )
+        rows = cursor.fetchall()
+    return [
+        {'table': table, 'index': name, 'size': size, 'suggestion': None}
+        for table, name, size in rows
+        if table in tables
+    ]
+
+
+def redundant_indexes(tables, using=DEFAULT_DB_ALIAS):
+    """
+    Non unique indexes whose columns start another index: every lookup they
+    serve, the longer (or unique) one serves too.
+    """
+    conditional = _conditional_index_names()
+    redundant = []
+    for table, model in sorted(tables.items()):
+        # Django manages the indexes of implicit m2m tables
+        if model._meta.auto_created:
+            continue
+        indexes = {
+            name: index for name, index in table_indexes(table, using).items()
+            if name not in conditional
+        }
+        for name, (columns, unique) in sorted(indexes.items()):
+            if unique:
+                continue
+            covering = [
+                (len(other_columns), other_unique, other)
+                for other, (other_columns, other_unique) in indexes.items()
+                if other != name and other_columns[:len(columns)] == columns
+                # Of two identical plain indexes, report only one
+                and (len(other_columns) > len(columns) or other_unique or other < name)
+            ]
+            if covering:
+                # Point to the index to keep: unique ones, then the longest
+                redundant.append({
+                    'table': table,
+                    'index': name,
+                    'columns': columns,
+                    'covered_by': max(covering, key=lambda cover: (cover[1], cover[0]))[2],
+                    'suggestion': suggest_removal(model, name, columns),
+                })
+    return redundant
+
+
+# <========== Report ==========> #
+
+def advise(capture, min_rows=1000, using=DEFAULT_DB_ALIAS):
+    """
+    Return the index report of a captured workload as a JSON serializable
+    dict. Plans and index usage are only read on PostgreSQL.
+    """
+    tables = models_by_table()
+    vendor = connections[using].vendor
+    queries = capture.most_expensive()
+    report = {
+        'database': vendor,
+        'queries': [
+            {'query': query.fingerprint, 'calls': query.calls, 'total_ms': round(query.duration * 1000, 3), 'sql': query.sql}
+            for query in queries
+        ],
+        'sequential_scans': [],
+        'missing_indexes': [],
+        'unused_indexes': [],
+        'redundant_indexes': redundant_indexes(tables, using),
+        'errors': [],
+    }
+    if vendor != 'postgresql':
+        return report
+
+    indexes, missing = {}, {}
+    for query in queries:
+        if not query.is_explainable or connections[query.alias].vendor != 'postgresql':
+            continue
+        try:
+            plan = explain(query)
+        except DatabaseError as exc:
+            report['errors'].append({'query': query.fingerprint, 'error': str(exc).strip()})
+            continue
+        sequential_scans, found = analyze_plan(plan, query.fingerprint, min_rows, tables, indexes)
+        report['sequential_scans'] += sequential_scans
+        for finding in found:
+            entry = missing.setdefault((finding['table'], finding['columns']), {
+                'table': finding['table'],
+                'columns': finding['columns'],
+                'queries': [],
+                'rows_removed': 0,
+                'suggestion': suggest_index(tables[finding['table']], finding['columns']),
+            })
+            entry['queries'].append(finding['query'])
+            entry['rows_removed'] += finding['rows_removed']
+
+    report['sequential_scans'].sort(key=lambda scan: scan['rows'] + scan['rows_removed'], reverse=True)
+    report['missing_indexes'] = sorted(missing.values(), key=lambda entry: entry['rows_removed'], reverse=True)
+    report['unused_indexes'] = unused_indexes(tables, using)
+    for entry in report['unused_indexes']:
+        columns = table_indexes(entry['table'], using).get(entry['index'], ((),))[0]
+        entry['suggestion'] = suggest_removal(tables[entry['table']], entry['index'], columns)
+    return report
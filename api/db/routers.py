@@ -0,0 +1,83 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# <========== Read replicas ==========> #
+#
+# Reads only go to a replica (settings.DATABASE_REPLICAS) inside a
+# `replica_reads()` block, which ReplicaReadMixin opens for safe requests.
+# Everything else, including any read made inside transaction.atomic(),
+# uses the primary. After a write the client is pinned to the primary for
+# DATABASE_REPLICA_PIN_SECONDS so it reads its own writes despite the
+# replication lag.
+
+PRIMARY_PIN_KEY = 'db_primary_pin:{}'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def enable_replica_reads(enabled=True):
+    """
+    Allow (or forbid) replica reads in the current context until the returned
+    token is passed to reset_replica_reads().
+    """
+    return _replica_reads.set(enabled)
+
+
+def reset_replica_reads(token):
+    _replica_reads.reset(token)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """
+    Allow (or, with enabled=False, forbid) replica reads in this block.
+    """
+    token = enable_replica_reads(enabled)
+    try:
+        yield
+    finally:
+        reset_replica_reads(token)
+
+
+def use_primary():
+    return replica_reads(enabled=False)
+
+
+def pin_to_primary(user):
+    if getattr(user, 'is_authenticated', False):
+        cache.set(PRIMARY_PIN_KEY.format(user.pk), True, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def is_pinned_to_primary(user):
+    if not getattr(user, 'is_authenticated', False):
+        return False
+    return cache.get(PRIMARY_PIN_KEY.format(user.pk), False)
+
+
+class ReplicaRouter:
+    """
+    Route reads to a random replica when allowed, writes and migrations to
+    the primary.
+    """
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'DATABASE_REPLICAS', None)
+        if not replicas or not _replica_reads.get():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas mirror the primary, objects read from either can be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,28 @@
+from collections import Counter
+from api import metrics
+
+
+# Per-process counters, keyed by (database alias, event)
+CONNECTION_STATS = Counter()
+
+
+def record_connect(alias, duration):
+    CONNECTION_STATS[(alias, 'connections')] += 1
+    CONNECTION_STATS[(alias, 'connect_seconds')] += duration
+    if duration > CONNECTION_STATS[(alias, 'connect_seconds_max')]:
+        CONNECTION_STATS[(alias, 'connect_seconds_max')] = duration
+    metrics.record_connect(alias, duration)
+
+
+def connection_stats():
+    """
+    Return the number of connections opened and the time spent opening them
+    per database alias.
+    """
+    stats = {}
+    for (alias, event), value in CONNECTION_STATS.items():
+        stats.setdefault(alias, {'connections': 0, 'connect_seconds': 0.0, 'connect_seconds_max': 0.0})[event] = value
+    for alias_stats in stats.values():
+        connections = alias_stats['connections']
+        alias_stats['connect_seconds_avg'] = alias_stats['connect_seconds'] / connections if connections else 0.0
+    return stats
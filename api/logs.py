@@ -0,0 +1,163 @@
+import atexit
+import copy
+import datetime
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from django.utils.functional import SimpleLazyObject, empty
+
+
+# <========== Logging ==========> #
+#
+# Log calls on the request path only interpolate the message and put the
+# record on a queue; a listener thread formats it and writes it to the
+# console and, outside serverless deployments, a rotating file. Records
+# carry the id of the request, organization and user they were logged for.
+
+_context = ContextVar('log_context', default=None)
+
+
+@contextmanager
+def request_log_context(request, request_id):
+    token = _context.set({'request': request, 'request_id': request_id, 'organization_id': None})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def bind_log_context(**values):
+    """
+    Add values to the log context of the current request.
+    """
+    context = _context.get()
+    if context is not None:
+        context.update(values)
+
+
+def _user_id(request):
+    # Never trigger authentication from a log call: only read a user the
+    # request already resolved
+    user = request.__dict__.get('user')
+    if isinstance(user, SimpleLazyObject):
+        user = None if user._wrapped is empty else user._wrapped
+    if user is None or not user.is_authenticated:
+        return None
+    return user.pk
+
+
+class RequestContextFilter(logging.Filter):
+    def filter(self, record):
+        context = _context.get()
+        if context is None:
+            # django.request logs the response outside of the middleware,
+            # but attaches the request to the record
+            request = getattr(record, 'request', None)
+            record.request_id = getattr(request, 'request_id', None)
+            record.organization_id = None
+            record.user_id = None if request is None else _user_id(request)
+        else:
+            record.request_id = context['request_id']
+            record.organization_id = context['organization_id']
+            record.user_id = _user_id(context['request'])
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a `rate` share of the records at or below `level`; records
+    above it are always kept.
+    """
+    def __init__(self, rate=1.0, level='INFO'):
+        super().__init__()
+        self.rate = rate
+        self.level = logging.getLevelName(level)
+
+    def filter(self, record):
+        return record.levelno > self.level or self.rate >= 1 or random.random() < self.rate
+
+
+class JSONFormatter(logging.Formatter):
+    CONTEXT_FIELDS = ('request_id', 'organization_id', 'user_id')
+
+    def format(self, record):
+        payload = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for field in self.CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exc_info'] = record.exc_text
+        return json.dumps(payload, default=str)
+
+
+class QueuedHandler(QueueHandler):
+    """
+    Queue records for a background listener writing them to stderr and,
+    when `filename` is set, to a size-rotated file.
+
+    Used from LOGGING through dictConfig; the formatter configured for this
+    handler is the one the sinks use.
+    """
+    def __init__(self, filename=None, max_bytes=10 * 1024 * 1024, backup_count=5):
+        super().__init__(queue.SimpleQueue())
+        self.sinks = [logging.StreamHandler(sys.stderr)]
+        if filename:
+            self.sinks.append(RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count))
+        self.listener = None
+        self._pid = None
+        self._start()
+        atexit.register(self.flush_and_stop)
+
+    def _start(self):
+        self.listener = QueueListener(self.queue, *self.sinks, respect_handler_level=True)
+        self.listener.start()
+        self._pid = os.getpid()
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        for sink in self.sinks:
+            sink.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Merge the message and render the traceback here, while the
+        # arguments are still in their logged state, but leave formatting
+        # the line to the listener
+        record = copy.copy(record)
+        record.message = record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.stack_info = None
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            # Forked (e.g. gunicorn --preload): the listener thread did not follow
+            self._start()
+        super().enqueue(record)
+
+    def flush_and_stop(self):
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+
+    def close(self):
+        self.flush_and_stop()
+        for sink in self.sinks:
+            sink.close()
+        super().close()
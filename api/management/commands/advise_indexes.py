@@ -0,0 +1,98 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+from api.benchmarks import runner
+from api.benchmarks.scenarios import SCENARIOS
+from api.benchmarks.seed import SIZES
+from api.db import indexes
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay the benchmark scenarios against seeded tenants in the test database, explain every query shape '
+        'they run and report sequential scans, missing composite indexes and unused or redundant indexes, with '
+        'the Meta.indexes changes to make. Plans and index usage need PostgreSQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='team', help=f"Comma separated tenant sizes ({', '.join(SIZES)}).")
+        parser.add_argument('--iterations', type=int, default=1, help='Requests per scenario.')
+        parser.add_argument('--attendance-days', type=int, default=365)
+        parser.add_argument('--employees', type=int, help='Override the number of employees of every tenant.')
+        parser.add_argument('--scenario', action='append', help='Only run scenarios starting with this name.')
+        parser.add_argument(
+            '--min-rows', type=int, default=1000,
+            help='Only report scans reading (or filtering out) at least this many rows.',
+        )
+        parser.add_argument('--top', type=int, default=10, help='Number of most expensive query shapes to list.')
+        parser.add_argument('--output', help='Also write the JSON report to this file.')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the benchmark database between runs.')
+
+    def handle(self, *args, **options):
+        sizes = [size.strip() for size in options['sizes'].split(',') if size.strip()]
+        unknown = set(sizes) - set(SIZES)
+        if unknown:
+            raise CommandError(f"Unknown sizes: {', '.join(sorted(unknown))}")
+
+        scenarios = SCENARIOS
+        if options['scenario']:
+            scenarios = [s for s in SCENARIOS if s.name.startswith(tuple(options['scenario']))]
+
+        capture = indexes.QueryCapture()
+        # Never seed the real database
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            runner.run(
+                sizes,
+                iterations=options['iterations'],
+                warmup=0,
+                attendance_days=options['attendance_days'],
+                employees=options['employees'],
+                scenarios=scenarios,
+                log=lambda message: self.stderr.write(message),
+                capture=capture,
+            )
+            report = indexes.advise(capture, min_rows=options['min_rows'])
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+        self.write_report(report, options['top'])
+
+    def write_report(self, report, top):
+        write = self.stdout.write
+        queries = report['queries']
+        write(f"{len(queries)} query shapes, {sum(q['calls'] for q in queries)} queries, on {report['database']}.")
+        for query in queries[:top]:
+            write(f"  {query['query']}  {query['calls']:>5} calls  {query['total_ms']:>9.2f} ms  {query['sql'][:120]}")
+
+        if report['database'] != 'postgresql':
+            write('\nEXPLAIN (ANALYZE, BUFFERS) and pg_stat_user_indexes need PostgreSQL: '
+                  'only redundant indexes were checked.')
+        else:
+            write('\nSequential scans:')
+            for scan in report['sequential_scans']:
+                write(f"  {scan['table']:<32} rows {scan['rows']:>8}  removed {scan['rows_removed']:>8}  "
+                      f"buffers {scan['buffers']:>6}  query {scan['query']}  filter {scan['filter']}")
+            write('\nMissing indexes:')
+            for entry in report['missing_indexes']:
+                write(f"  {entry['table']} ({', '.join(entry['columns'])}): {entry['rows_removed']} rows "
+                      f"filtered out by {', '.join(entry['queries'])}")
+                write(f"    {entry['suggestion']}")
+            write('\nUnused indexes:')
+            for entry in report['unused_indexes']:
+                write(f"  {entry['table']}.{entry['index']} ({entry['size']} bytes)")
+                write(f"    {entry['suggestion']}")
+            for error in report['errors']:
+                self.stderr.write(f"Could not explain {error['query']}: {error['error']}")
+
+        write('\nRedundant indexes:')
+        for entry in report['redundant_indexes']:
+            write(f"  {entry['table']}.{entry['index']} ({', '.join(entry['columns'])}) "
+                  f"is covered by {entry['covered_by']}")
+            write(f"    {entry['suggestion']}")
+
+        if report['missing_indexes'] or report['unused_indexes'] or report['redundant_indexes']:
+            write('\nApply the suggestions to the models and run `python manage.py makemigrations` for the migration.')
@@ -0,0 +1,70 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, teardown_databases
+from api.benchmarks import runner
+from api.benchmarks.scenarios import SCENARIOS
+from api.benchmarks.seed import SIZES
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed tenants of several sizes in the test database and measure latency '
+        'percentiles and query counts for every API route.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='solo,team', help=f"Comma separated tenant sizes ({', '.join(SIZES)}).")
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2, help='Unmeasured requests before each scenario.')
+        parser.add_argument('--attendance-days', type=int, default=365)
+        parser.add_argument('--employees', type=int, help='Override the number of employees of every tenant.')
+        parser.add_argument('--scenario', action='append', help='Only run scenarios starting with this name.')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+        parser.add_argument('--compare', help='Baseline report to compare against.')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Allowed p95 latency growth (0.2 = 20%%).')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the benchmark database between runs.')
+
+    def handle(self, *args, **options):
+        sizes = [size.strip() for size in options['sizes'].split(',') if size.strip()]
+        unknown = set(sizes) - set(SIZES)
+        if unknown:
+            raise CommandError(f"Unknown sizes: {', '.join(sorted(unknown))}")
+
+        scenarios = SCENARIOS
+        if options['scenario']:
+            scenarios = [s for s in SCENARIOS if s.name.startswith(tuple(options['scenario']))]
+
+        # Never seed the real database
+        old_config = setup_databases(verbosity=0, interactive=False, keepdb=options['keepdb'])
+        try:
+            report = runner.run(
+                sizes,
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                attendance_days=options['attendance_days'],
+                employees=options['employees'],
+                scenarios=scenarios,
+                log=lambda message: self.stderr.write(message),
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0, keepdb=options['keepdb'])
+
+        content = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(content)
+        else:
+            self.stdout.write(content)
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                rows = runner.compare(json.load(f), report, options['threshold'])
+            regressions = [row for row in rows if row['regression']]
+            for row in rows:
+                self.stderr.write(
+                    f"{'REGRESSION' if row['regression'] else 'ok':<10} {row['tenant']:<10} {row['scenario']:<32} "
+                    f"p95 {row['p95_before']:.2f} -> {row['p95_after']:.2f} ms ({row['p95_change']:+.0%})  "
+                    f"queries {row['queries_before']} -> {row['queries_after']}"
+                )
+            if regressions:
+                raise CommandError(f'{len(regressions)} scenario(s) regressed.')
@@ -0,0 +1,64 @@
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from django.core.management.base import BaseCommand, CommandError
+
+ENTRY_POINTS = {
+    # What a worker imports before it can serve its first request
+    'setup': 'import django; django.setup(); from django.urls import get_resolver; get_resolver().url_patterns',
+    # The serverless entry point, warm-up included
+    'wsgi': 'import svcs.wsgi',
+}
+
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(output):
+    """
+    Parse `python -X importtime` output into (module, self us, cumulative us,
+    depth) tuples.
+    """
+    modules = []
+    for line in output.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            modules.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+class Command(BaseCommand):
+    help = 'Import the application in a fresh interpreter and report the import time of each module.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entry', choices=sorted(ENTRY_POINTS), default='setup')
+        parser.add_argument('--top', type=int, default=30, help='Number of modules to list.')
+        parser.add_argument('--sort', choices=['self', 'cumulative'], default='self')
+        parser.add_argument('--by-package', action='store_true', help='Sum self time per top-level package.')
+
+    def handle(self, *args, **options):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', ENTRY_POINTS[options['entry']]],
+            capture_output=True, text=True, env=os.environ.copy(),
+        )
+        if result.returncode:
+            raise CommandError(f'Importing the application failed:\n{result.stderr[-2000:]}')
+
+        modules = parse_importtime(result.stderr)
+        total = sum(self_us for _, self_us, _, _ in modules)
+
+        if options['by_package']:
+            packages = defaultdict(int)
+            for module, self_us, _, _ in modules:
+                packages[module.split('.')[0]] += self_us
+            rows = [(package, self_us, self_us) for package, self_us in packages.items()]
+        else:
+            rows = [(module, self_us, cumulative_us) for module, self_us, cumulative_us, _ in modules]
+        rows.sort(key=lambda row: row[1] if options['sort'] == 'self' else row[2], reverse=True)
+
+        self.stdout.write(f"{'self ms':>9} {'cumul. ms':>10}  module")
+        for name, self_us, cumulative_us in rows[:options['top']]:
+            self.stdout.write(f'{self_us / 1000:9.1f} {cumulative_us / 1000:10.1f}  {name}')
+        self.stdout.write(f'\n{len(modules)} modules imported in {total / 1000:.1f} ms')
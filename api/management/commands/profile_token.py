@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api import profiling
+
+
+class Command(BaseCommand):
+    help = 'Print an X-Profile header value requesting a profile of the request it is sent with.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--memory', action='store_true', help='Also trace memory allocations (slower).')
+
+    def handle(self, *args, **options):
+        token = profiling.make_profile_token(profiling.MEMORY if options['memory'] else profiling.CPU)
+        if not settings.PROFILING_ENABLED:
+            self.stderr.write('PROFILING_ENABLED is off, the header will be ignored.')
+        self.stdout.write(f'X-Profile: {token}')
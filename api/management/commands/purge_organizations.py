@@ -0,0 +1,49 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from api import metrics
+from org.models import Organization
+from org.purge import purge_organization
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete the data of organizations deleted more than ORGANIZATION_RETENTION ago, table by table in '
+        'small batches. An interrupted run resumes where it stopped when started again. Run it with the '
+        'PROMETHEUS_MULTIPROC_DIR of the web workers so its counts reach their metrics endpoint.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', action='append', help='Only this organization id (repeatable).')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per statement.')
+        parser.add_argument('--pause', type=float, default=0.1, help='Seconds to wait between batches.')
+
+    def record_batch(self, model, rows, duration):
+        metrics.record_sweep(model._meta.db_table, 'purged', rows, duration)
+
+    def handle(self, *args, **options):
+        if not metrics.is_shared():
+            self.stderr.write(
+                'PROMETHEUS_MULTIPROC_DIR is not set: the sweep metrics of this run are not exported, '
+                'run it with the directory the workers use.'
+            )
+
+        organizations = Organization.all_objects.due_for_purge().order_by('deactivated_at')
+        if options['organization']:
+            organizations = organizations.filter(pk__in=options['organization'])
+        organization_ids = list(organizations.values_list('pk', flat=True))
+        if options['organization'] and len(organization_ids) != len(set(options['organization'])):
+            raise CommandError('Only organizations deleted more than the retention window ago can be purged.')
+
+        for organization_id in organization_ids:
+            start = time.perf_counter()
+            try:
+                deleted = purge_organization(
+                    organization_id, batch_size=options['batch_size'], pause=options['pause'],
+                    on_batch=self.record_batch,
+                )
+            except ValueError as exc:
+                # Restored while the purge ran
+                self.stderr.write(f'{organization_id}: skipped, {exc}')
+                continue
+            summary = ', '.join(f'{table} {rows}' for table, rows in deleted.items())
+            self.stdout.write(f'{organization_id}: purged in {time.perf_counter() - start:.1f}s ({summary})')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from org.models import Organization, OrganizationUsage
+
+
+class Command(BaseCommand):
+    help = 'Recount the usage counters of organizations and repair the ones that drifted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', action='append', help='Only this organization id (repeatable).')
+        parser.add_argument('--batch-size', type=int, default=500, help='Organizations recounted per transaction.')
+
+    def handle(self, *args, **options):
+        organizations = Organization.all_objects.order_by('pk')
+        if options['organization']:
+            organizations = organizations.filter(pk__in=options['organization'])
+
+        ids = list(organizations.values_list('pk', flat=True))
+        repaired = 0
+        for start in range(0, len(ids), options['batch_size']):
+            batch = Organization.all_objects.filter(pk__in=ids[start:start + options['batch_size']])
+            drifted = OrganizationUsage.objects.reconcile(batch)
+            for organization_id, changes in drifted.items():
+                summary = ', '.join(f'{counter} {stored} -> {actual}' for counter, (stored, actual) in changes.items())
+                self.stdout.write(f'{organization_id}: {summary}')
+            repaired += len(drifted)
+
+        self.stdout.write(f'{len(ids)} organizations checked, {repaired} repaired.')
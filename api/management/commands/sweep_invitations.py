@@ -0,0 +1,55 @@
+import datetime
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from api import metrics
+from org.models import OrganizationMemberInvitation
+
+
+class Command(BaseCommand):
+    help = (
+        'Expire pending invitations past their expiry and delete rejected or expired ones older than '
+        'INVITATION_RETENTION, in small batches. Meant to run periodically (cron), with the '
+        'PROMETHEUS_MULTIPROC_DIR of the web workers so its counts reach their metrics endpoint.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows changed per statement.')
+        parser.add_argument(
+            '--max-batches', type=int, default=100,
+            help='Stop each phase after this many batches; the next run picks up the rest.',
+        )
+        parser.add_argument('--pause', type=float, default=0.0, help='Seconds to wait between batches.')
+        parser.add_argument(
+            '--retention', type=int, default=settings.INVITATION_RETENTION,
+            help='Seconds to keep rejected and expired invitations for.',
+        )
+
+    def handle(self, *args, **options):
+        if not metrics.is_shared():
+            self.stderr.write(
+                'PROMETHEUS_MULTIPROC_DIR is not set: the sweep metrics of this run are not exported, '
+                'run it with the directory the workers use.'
+            )
+
+        invitations = OrganizationMemberInvitation.objects
+        before = timezone.now() - datetime.timedelta(seconds=options['retention'])
+
+        expired = self.sweep('expired', lambda: invitations.expire(options['batch_size']), options)
+        deleted = self.sweep('deleted', lambda: invitations.purge(before, options['batch_size']), options)
+
+        self.stdout.write(f'{expired} invitations expired, {deleted} deleted.')
+
+    def sweep(self, action, run_batch, options):
+        total = 0
+        for batch in range(options['max_batches']):
+            if batch and options['pause']:
+                time.sleep(options['pause'])
+            start = time.perf_counter()
+            rows = run_batch()
+            metrics.record_sweep(OrganizationMemberInvitation._meta.db_table, action, rows, time.perf_counter() - start)
+            total += rows
+            if rows < options['batch_size']:
+                break
+        return total
@@ -0,0 +1,122 @@
+import os
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess,
+)
+
+
+# <========== Prometheus metrics ==========> #
+#
+# Metrics live in the default prometheus_client registry. Under gunicorn,
+# set PROMETHEUS_MULTIPROC_DIR to an empty directory writable by the
+# workers (and start gunicorn with svcs/gunicorn.conf.py): every worker then
+# writes its values to memory-mapped files in that directory and the
+# endpoint, whichever worker serves it, aggregates all of them.
+#
+# The sweep commands run in their own (cron) process: their counts only
+# reach the endpoint when they run with the same PROMETHEUS_MULTIPROC_DIR
+# as the workers. Otherwise they are lost when the command exits, and only
+# the totals the commands print remain.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+REQUEST_LATENCY = Histogram(
+    'api_request_duration_seconds', 'Time spent handling API requests.',
+    ['view', 'method', 'status'], buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    'api_requests_in_flight', 'Requests being handled.', multiprocess_mode='livesum',
+)
+DB_QUERIES = Histogram(
+    'api_request_db_queries', 'Database queries run per request.',
+    ['view'], buckets=QUERY_COUNT_BUCKETS,
+)
+DB_TIME = Histogram(
+    'api_request_db_seconds', 'Time spent in database queries per request.',
+    ['view'], buckets=LATENCY_BUCKETS,
+)
+DB_CONNECT_TIME = Histogram(
+    'api_db_connect_seconds', 'Time spent opening database connections.',
+    ['alias'], buckets=LATENCY_BUCKETS,
+)
+AUTH_TIME = Histogram(
+    'api_auth_phase_seconds', 'Time spent authenticating requests, per phase (jwks, verify, user).',
+    ['phase'], buckets=LATENCY_BUCKETS,
+)
+CACHE_LOOKUPS = Counter(
+    'api_cache_lookups', 'Response and query cache lookups.', ['cache', 'result'],
+)
+SWEPT_ROWS = Counter(
+    'api_sweep_rows', 'Rows processed by the periodic sweep commands.', ['table', 'action'],
+)
+SWEEP_BATCH_TIME = Histogram(
+    'api_sweep_batch_seconds', 'Time spent per sweep batch.', ['table', 'action'], buckets=LATENCY_BUCKETS,
+)
+
+
+def view_label(request):
+    """
+    Name the view that handled a request: `<basename>-<action>` for
+    viewsets (e.g. `attendance-list`, `employee-create`), the url name for
+    other views.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+
+    actions = getattr(match.func, 'actions', None)
+    basename = getattr(match.func, 'initkwargs', {}).get('basename')
+    if actions and basename:
+        action = actions.get(request.method.lower())
+        if action:
+            return f'{basename}-{action}'
+    return match.url_name or match.view_name
+
+
+def observe_request(request, response, duration, timings=None):
+    view = view_label(request)
+    REQUEST_LATENCY.labels(view, request.method, f'{response.status_code // 100}xx').observe(duration)
+
+    stats = getattr(request, 'query_stats', None)
+    if stats is not None:
+        DB_QUERIES.labels(view).observe(stats.count)
+        DB_TIME.labels(view).observe(stats.duration)
+
+    if timings is not None:
+        for phase, seconds in timings.phases.items():
+            if phase.startswith('auth.'):
+                AUTH_TIME.labels(phase[len('auth.'):]).observe(seconds)
+
+
+def record_cache_lookup(cache, hit):
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def record_connect(alias, duration):
+    DB_CONNECT_TIME.labels(alias).observe(duration)
+
+
+def is_shared():
+    """
+    Whether metrics recorded by this process reach the endpoint of the
+    workers, i.e. outlive it.
+    """
+    return 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+
+def record_sweep(table, action, rows, duration):
+    SWEPT_ROWS.labels(table, action).inc(rows)
+    SWEEP_BATCH_TIME.labels(table, action).observe(duration)
+
+
+def export():
+    """
+    Return the metrics of every worker in the Prometheus text format, with
+    its content type.
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,402 @@
+import hashlib
+import logging
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from whitenoise.middleware import WhiteNoiseMiddleware
+from api import logs, metrics, profiling, timing
+from api.tenant import TenantContext
+
+logger = logging.getLogger(__name__)
+
+
+# <========== Sync and async ==========> #
+#
+# Every middleware of the chain runs in both modes. Under ASGI a single sync
+# middleware makes Django run the whole chain in a thread and wrap async
+# views in async_to_sync, which holds the thread through every await.
+
+class Middleware:
+    """
+    Base of the middlewares wrapping the rest of the chain. Subclasses
+    implement `handle(request)` as a generator:
+
+        def handle(self, request):
+            ...                     # before the view
+            response = yield        # the rest of the chain runs here
+            ...                     # after it
+            return response
+
+    which __call__ drives from sync or async code depending on the chain,
+    with the exceptions of the chain thrown in at the `yield`. Returning
+    before the `yield` answers without calling the rest of the chain.
+    A `process_view()` is plain sync code, run on the event loop as is.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+            if hasattr(self, 'process_view'):
+                # Django would run a sync process_view() in a thread
+                process_view = self.process_view
+
+                async def aprocess_view(request, view_func, view_args, view_kwargs):
+                    return process_view(request, view_func, view_args, view_kwargs)
+                self.process_view = aprocess_view
+
+    def handle(self, request):
+        return (yield)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        handler = self.handle(request)
+        try:
+            next(handler)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            response = self.get_response(request)
+        except BaseException as exc:
+            return self._resume(handler, exc=exc)
+        return self._resume(handler, response)
+
+    async def __acall__(self, request):
+        handler = self.handle(request)
+        try:
+            next(handler)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            response = await self.get_response(request)
+        except BaseException as exc:
+            return self._resume(handler, exc=exc)
+        return self._resume(handler, response)
+
+    def _resume(self, handler, response=None, exc=None):
+        try:
+            if exc is not None:
+                handler.throw(exc)
+            else:
+                handler.send(response)
+        except StopIteration as stop:
+            return stop.value
+        raise RuntimeError(f'{type(self).__name__}.handle() yielded more than once.')
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise, which is sync only, made usable in an async chain.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+# <========== Request id ==========> #
+
+_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{8,64}$')
+
+
+class RequestIdMiddleware(Middleware):
+    """
+    Give every request an id, reusing a well formed X-Request-ID set by the
+    proxy, and return it in the X-Request-ID response header.
+
+    Also opens the log context, so records logged while handling the
+    request carry its id, organization and user.
+    """
+    def handle(self, request):
+        request_id = request.headers.get('X-Request-ID', '')
+        if not _REQUEST_ID.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+
+        with logs.request_log_context(request, request_id):
+            response = yield
+        response['X-Request-ID'] = request_id
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        logs.bind_log_context(organization_id=view_kwargs.get('organization_pk'))
+
+
+# <========== Tenant context ==========> #
+
+class TenantContextMiddleware(Middleware):
+    """
+    Give requests to routes nested under an organization their TenantContext
+    as `request.tenant`, resolved lazily and once per request.
+    """
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        organization_id = view_kwargs.get('organization_pk')
+        if organization_id is not None:
+            request.tenant = TenantContext(organization_id)
+
+
+# <========== Metrics ==========> #
+
+class MetricsMiddleware(Middleware):
+    """
+    Record latency, database usage and auth phase timings of every request
+    in the Prometheus registry (see api/metrics.py).
+
+    Must sit outside QueryBudgetMiddleware, whose `request.query_stats` it
+    reads once the response is ready.
+    """
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def handle(self, request):
+        start = time.perf_counter()
+        with metrics.REQUESTS_IN_FLIGHT.track_inprogress(), timing.request_timings() as timings:
+            response = yield
+        metrics.observe_request(request, response, time.perf_counter() - start, timings)
+        return response
+
+
+# <========== Server-Timing ==========> #
+
+class ServerTimingMiddleware(Middleware):
+    """
+    Break every response down into phases in a Server-Timing header, shown
+    by browser devtools: authentication (and its jwks / verify / user
+    steps), permission checks, serialization, database, rendering and the
+    total. The rest of the total is view code.
+
+    Enabled with settings.SERVER_TIMING. Must sit outside
+    QueryBudgetMiddleware, which provides the database time.
+    """
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def handle(self, request):
+        start = time.perf_counter()
+        with timing.request_timings() as timings:
+            response = yield
+        total = time.perf_counter() - start
+
+        entries = []
+        auth = timings.total('auth')
+        if auth:
+            entries.append(('auth', auth, None))
+        entries.extend(
+            (phase, seconds, None) for phase, seconds in timings.phases.items() if phase != 'auth'
+        )
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None:
+            entries.append(('db', stats.duration, f'{stats.count} queries'))
+        entries.append(('total', total, None))
+
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={seconds * 1000:.1f}' + (f';desc="{description}"' if description else '')
+            for name, seconds, description in entries
+        )
+        # Let the allowed frontend origins read the timings from javascript too
+        if 'Access-Control-Allow-Origin' in response:
+            response['Timing-Allow-Origin'] = response['Access-Control-Allow-Origin']
+        return response
+
+
+# <========== Query budget ==========> #
+
+_IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+
+def fingerprint_sql(sql):
+    """
+    Reduce a query to its shape: literals and the length of IN lists are
+    dropped, so the same query run for every row of a page shares a
+    fingerprint.
+    """
+    shape = _STRING.sub('?', sql)
+    shape = _IN_LIST.sub('(...)', shape)
+    shape = _NUMBER.sub('?', shape)
+    return hashlib.md5(shape.encode(), usedforsecurity=False).hexdigest()[:12]
+
+
+class QueryStats:
+    """
+    Queries run while handling a request, collected with execute wrappers.
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+        self.samples = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            fingerprint = fingerprint_sql(sql)
+            self.shapes[fingerprint] += 1
+            self.samples.setdefault(fingerprint, sql)
+
+    def repeated(self, threshold):
+        """
+        Return (count, sample sql) for every query shape run at least
+        `threshold` times, the usual sign of an N+1.
+        """
+        return [
+            (count, self.samples[fingerprint])
+            for fingerprint, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+_query_stats = ContextVar('query_stats', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every connection (see api/signals.py),
+    adding the query to the QueryStats of the request being handled. The
+    stats follow the request's context into the thread running its ORM
+    calls, which under ASGI has connections of its own.
+    """
+    stats = _query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+class QueryBudgetMiddleware(Middleware):
+    """
+    Count the queries and database time of every request and log requests
+    going over their budget or repeating the same query shape.
+
+    The budget is settings.QUERY_BUDGET_DEFAULT unless the view declares
+    `query_budget`, either a number or a dict keyed by viewset action:
+
+        class AttendanceModelViewset(ModelViewSet):
+            query_budget = {'list': 6, 'create': 12}
+
+    With settings.QUERY_COUNT_HEADERS (on outside production) the counts are
+    also returned in X-Query-Count / X-Query-Time headers.
+    """
+    def handle(self, request):
+        request.query_stats = stats = QueryStats()
+        token = _query_stats.set(stats)
+        try:
+            response = yield
+        finally:
+            _query_stats.reset(token)
+
+        budget = self.get_budget(request)
+        repeated = stats.repeated(settings.QUERY_REPEAT_THRESHOLD)
+        over_budget = budget is not None and stats.count > budget
+        if over_budget or repeated:
+            logger.warning(
+                'Query budget: %s %s ran %d queries in %.1f ms (budget %s)%s',
+                request.method, request.path, stats.count, stats.duration * 1000, budget,
+                ''.join(f'\n  repeated {count}x: {sql}' for count, sql in repeated),
+            )
+
+        if settings.QUERY_COUNT_HEADERS:
+            response['X-Query-Count'] = str(stats.count)
+            response['X-Query-Time'] = f'{stats.duration * 1000:.1f}'
+            if over_budget:
+                response['X-Query-Budget-Exceeded'] = str(budget)
+            if repeated:
+                response['X-Query-Repeated'] = str(max(count for count, sql in repeated))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'cls', None)
+        budget = getattr(view_class, 'query_budget', None)
+        if isinstance(budget, dict):
+            action = (getattr(view_func, 'actions', None) or {}).get(request.method.lower())
+            budget = budget.get(action)
+        request.query_budget = budget
+
+    def get_budget(self, request):
+        budget = getattr(request, 'query_budget', None)
+        return settings.QUERY_BUDGET_DEFAULT if budget is None else budget
+
+
+# <========== Profiling ==========> #
+
+class ProfilingMiddleware(Middleware):
+    """
+    Profile requests carrying a signed X-Profile header, or picked with
+    probability PROFILING_SAMPLE_RATE, and store the profile under a fresh
+    id (returned in X-Profile-Id). The request id is only recorded with it:
+    clients choose it, and could overwrite or reuse another profile's key.
+
+    Removed from the middleware chain entirely unless PROFILING_ENABLED.
+    Under ASGI the CPU profile only sees the event loop thread, not the
+    view's sync code.
+    """
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def get_mode(self, request):
+        token = request.headers.get('X-Profile')
+        if token:
+            return profiling.read_profile_token(token)
+        if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            return profiling.MEMORY if settings.PROFILING_TRACEMALLOC else profiling.CPU
+        return None
+
+    def handle(self, request):
+        mode = self.get_mode(request)
+        if mode is None:
+            return (yield)
+
+        start = time.perf_counter()
+        with profiling.RequestProfile(mode) as profile:
+            response = yield
+        duration = time.perf_counter() - start
+
+        profile_id = uuid.uuid4().hex
+        profiling.store_profile(profile_id, profile, {
+            'request_id': getattr(request, 'request_id', None),
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 3),
+            'created_at': time.time(),
+        })
+        response['X-Profile-Id'] = profile_id
+        return response
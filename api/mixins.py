@@ -1,5 +1,24 @@
+import functools
+import hashlib
 import pytz
-from rest_framework.exceptions import ValidationError
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from rest_framework.exceptions import AuthenticationFailed, NotFound, ValidationError
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from api import metrics
+from api.cache import (
+    get_data_version, organization_scope, permission_fingerprint, response_cache_key
+)
+from api.db.routers import (
+    enable_replica_reads, is_pinned_to_primary, pin_to_primary, reset_replica_reads, use_primary
+)
+from api.tenant import TenantContext
 
 class TimezoneMixin:
     """
@@ -30,4 +49,287 @@ class TimezoneMixin:
         """
         context = super().get_serializer_context()
         context['timezone'] = self.get_timezone_from_request()
-        return context 
\ No newline at end of file
+        return context
+
+
+class ConditionalGetMixin:
+    """
+    Mixin adding ETag validators to the list and retrieve actions.
+
+    The validators are computed with a single aggregate query over the same
+    (filtered) queryset the action would serialize, so a matching
+    If-None-Match short-circuits with a 304 before the
+    full queryset is evaluated or serialized.
+
+    Validators are derived from MAX(last_modified_field) and COUNT(*), which
+    also catches deletions, plus the related aggregates views add. No
+    Last-Modified is sent: neither a deletion nor a change to a related row
+    in the payload moves the row's own timestamp, so If-Modified-Since
+    alone would serve stale representations.
+    """
+    last_modified_field = 'updated_at'
+
+    def get_validator_queryset(self):
+        """
+        Return the queryset the validators are computed from.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_validator_aggregates(self):
+        """
+        Return the aggregates describing the state of the requested resource.
+        Views can add aggregates over related rows their payload depends on.
+        """
+        return {
+            'last_modified': Max(self.last_modified_field),
+            'count': Count('pk'),
+        }
+
+    def get_validator_state(self):
+        """
+        Return a dict describing the current state of the requested resource.
+        """
+        return self.get_validator_queryset().order_by().aggregate(**self.get_validator_aggregates())
+
+    def get_etag(self, state):
+        """
+        Build a weak ETag from the resource state and the request variant
+        (path, query string, caller and timezone all change the payload).
+        """
+        variant = [
+            self.request.get_full_path(),
+            str(getattr(self.request.user, 'pk', '')),
+            self.request.headers.get('Accept', ''),
+        ]
+        if hasattr(self, 'get_timezone_from_request'):
+            variant.append(str(self.get_timezone_from_request()))
+
+        key = repr((sorted((k, str(v)) for k, v in state.items()), variant))
+        return 'W/' + quote_etag(hashlib.md5(key.encode(), usedforsecurity=False).hexdigest())
+
+    def _conditional_response(self, request, handler, *args, **kwargs):
+        state = self.get_validator_state()
+
+        # Nothing matched, let the regular handler produce its 404 / empty list
+        if self.action == 'retrieve' and not state['count']:
+            return handler(request, *args, **kwargs)
+
+        etag = self.get_etag(state)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional_response(request, super().retrieve, *args, **kwargs)
+
+
+class CachedResponseMixin:
+    """
+    Mixin caching successful read responses per data version.
+
+    Entries are keyed by (endpoint, url kwargs, normalized query params,
+    caller's permission fingerprint, scope data version). Writes bump the
+    scope version through model signals, so a write is never followed by a
+    stale read and nothing has to be deleted explicitly.
+
+    By default the scope is the organization named by `cache_scope_kwarg`.
+    Nothing is cached without a cache shared by every worker
+    (settings.SHARED_CACHE): the other workers would not see the bumps.
+    """
+    cache_actions = ('list', 'retrieve')
+    cache_scope_kwarg = 'organization_pk'
+
+    def get_cache_scope(self):
+        return organization_scope(self.kwargs[self.cache_scope_kwarg])
+
+    def get_cache_fingerprint(self, version):
+        return permission_fingerprint(self.kwargs[self.cache_scope_kwarg], self.request.user, version)
+
+    def get_cache_key(self):
+        scope = self.get_cache_scope()
+        version = get_data_version(scope)
+
+        params = sorted((key, sorted(values)) for key, values in self.request.query_params.lists())
+        variant = [self.request.accepted_media_type]
+        if hasattr(self, 'get_timezone_from_request'):
+            variant.append(str(self.get_timezone_from_request()))
+
+        return response_cache_key(
+            scope, version,
+            self.basename, self.action, sorted(self.kwargs.items()),
+            params, self.get_cache_fingerprint(version), variant,
+        )
+
+    def _cached_response(self, request, handler, *args, **kwargs):
+        if self.action not in self.cache_actions or not settings.SHARED_CACHE:
+            return handler(request, *args, **kwargs)
+
+        key = self.get_cache_key()
+        data = cache.get(key)
+        metrics.record_cache_lookup('response', hit=data is not None)
+        if data is not None:
+            return Response(data)
+
+        # Entries outlive the request: never store data a lagging replica served
+        with use_primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(request, super().retrieve, *args, **kwargs)
+
+
+class ProjectionMixin:
+    """
+    Mixin serving actions from a ProjectionSerializer instead of the
+    regular serializer, e.g. `projection_classes = {'list': EmployeeProjection}`.
+
+    The queryset is still built by get_queryset() / filter_queryset() and
+    paginated as usual; only the rows are read and rendered differently.
+    """
+    projection_classes = {}
+
+    def get_projection_class(self):
+        return self.projection_classes.get(self.action)
+
+    def get_projection(self):
+        return self.get_projection_class()(context=self.get_serializer_context())
+
+    def list(self, request, *args, **kwargs):
+        if self.get_projection_class() is None:
+            return super().list(request, *args, **kwargs)
+
+        projection = self.get_projection()
+        queryset = projection.project(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(projection.to_representation(page))
+        return Response(projection.to_representation(queryset))
+
+
+class AsyncViewMixin:
+    """
+    Serve the viewset as an async view when settings.ASYNC_VIEWS is on (i.e.
+    behind svcs/asgi.py).
+
+    Authenticators providing `aauthenticate()` run on the event loop, so a
+    slow JWKS fetch or user upsert no longer holds a thread, and leave their
+    result in `request.async_authentication` for their sync `authenticate()`.
+    Permissions, the ORM and serializers are synchronous in DRF and run in
+    a thread of the executor pool (thread_sensitive=False): the default,
+    single thread shared by every sync call of the process would handle
+    one request at a time. Pool threads keep their own connections, which
+    are checked the way the request signals check them in sync workers.
+    """
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not settings.ASYNC_VIEWS:
+            return view
+
+        def run_view(request, *args, **kwargs):
+            close_old_connections()
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                close_old_connections()
+
+        sync_view = sync_to_async(run_view, thread_sensitive=False)
+
+        async def async_view(request, *args, **kwargs):
+            request.async_authentication = {}
+            for authenticator_class in cls.authentication_classes:
+                authenticator = authenticator_class()
+                if not hasattr(authenticator, 'aauthenticate'):
+                    continue
+                try:
+                    result = await authenticator.aauthenticate(request)
+                except AuthenticationFailed as exc:
+                    result = exc
+                request.async_authentication[authenticator_class] = result
+                if result is not None:
+                    break
+            return await sync_view(request, *args, **kwargs)
+
+        functools.update_wrapper(async_view, view)
+        return async_view
+
+
+class ReplicaReadMixin:
+    """
+    Mixin sending the queries of safe requests to the read replicas.
+
+    A successful write pins the caller to the primary for
+    DATABASE_REPLICA_PIN_SECONDS, so their next reads see it. Authentication
+    runs before the replica is enabled and always reads from the primary.
+    The pin lives in the cache: without a shared one (settings.SHARED_CACHE)
+    the other workers would not see it, and every read uses the primary.
+    """
+    _replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if settings.SHARED_CACHE and request.method in SAFE_METHODS and not is_pinned_to_primary(request.user):
+            self._replica_token = enable_replica_reads()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self._replica_token is not None:
+            reset_replica_reads(self._replica_token)
+            self._replica_token = None
+        elif request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class OrganizationScopeMixin:
+    """
+    Mixin for the routes nested under an organization, reading it from the
+    request's TenantContext (`self.tenant`).
+
+    An unknown or deactivated organization is a 404 for every action, and
+    so is any organization the caller is not a member of, except for
+    `non_member_actions` (e.g. an invitee answering their invitation).
+    Serializers get the tenant, and its organization id, in their context.
+    """
+    non_member_actions = ()
+
+    @property
+    def tenant(self):
+        tenant = getattr(self.request, 'tenant', None)
+        if tenant is None:
+            # Without TenantContextMiddleware, e.g. a view called directly
+            tenant = self.request.tenant = TenantContext(self.kwargs['organization_pk'])
+        return tenant
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not self.tenant.is_active:
+            raise NotFound('Organization not found.')
+        if self.action in self.non_member_actions or request.user.is_staff:
+            return
+        if not self.tenant.is_member(request.user):
+            raise NotFound('Organization not found.')
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['tenant'] = self.tenant
+        context['organization_id'] = self.tenant.organization_id
+        return context
@@ -0,0 +1,24 @@
+from django.conf import settings
+from rest_framework import parsers
+from rest_framework.exceptions import ParseError
+from api.renderers import orjson, TimezoneAwareJSONRenderer
+
+
+class ORJSONParser(parsers.JSONParser):
+    """
+    JSON parser backed by orjson. Bodies in another charset than UTF-8 (or
+    without orjson installed) are handled by DRF's JSONParser.
+    """
+    renderer_class = TimezoneAwareJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+
+        if orjson is None or encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
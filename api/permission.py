@@ -1,4 +1,5 @@
 from rest_framework import permissions
+from api.timing import timed
 from org.serializers.member import OrganizationMember
 
 
@@ -13,11 +14,13 @@ class OrganizationPermission(permissions.BasePermission):
         self._member_cache = {}
         self._permission_cache = {}
         
+    @timed('permission')
     def has_permission(self, request, view):
         if request.method in permissions.SAFE_METHODS:
             return request.user.is_authenticated
         return request.user.is_authenticated
     
+    @timed('permission')
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
@@ -38,15 +41,21 @@ class OrganizationPermission(permissions.BasePermission):
         cache_key = f"{user.id}_{organization.id}"
         
         # Check if we've already queried this user's membership for this organization
+        tenant = getattr(request, 'tenant', None)
         if cache_key in self._member_cache:
             member = self._member_cache[cache_key]
+        elif tenant is not None and tenant.is_for(organization.id):
+            # Nested routes: the membership the scope check read, once per request
+            member = self._member_cache[cache_key] = tenant.get_member(user)
+            if member is None:
+                return False
         else:
             # Query the member directly with all permissions in a single query
             try:
                 member = OrganizationMember.objects.select_related(
                     'organization', 'user'
                 ).prefetch_related(
-                    'permissions'
+                    'permissions', 'revoked_permissions'
                 ).get(
                     user=user,
                     organization=organization
@@ -54,10 +63,6 @@ class OrganizationPermission(permissions.BasePermission):
                 # Cache the result
                 self._member_cache[cache_key] = member
                 
-                # Pre-cache all permissions for this member
-                permission_names = set(perm.name for perm in member.permissions.all())
-                self._permission_cache[cache_key] = permission_names
-                
             except OrganizationMember.DoesNotExist:
                 # No membership found
                 return False
@@ -78,9 +83,7 @@ class OrganizationPermission(permissions.BasePermission):
         if member.status != OrganizationMember.ACTIVE:
             return False
             
-        # Use cached permissions instead of making a new query
-        if cache_key in self._permission_cache:
-            return self.required_permission in self._permission_cache[cache_key]
-        
-        # Fallback to database query if cache is not available
-        return member.permissions.filter(name=self.required_permission).exists()
\ No newline at end of file
+        # Effective permissions (role + overrides), resolved once per member
+        if cache_key not in self._permission_cache:
+            self._permission_cache[cache_key] = member.get_permission_names()
+        return self.required_permission in self._permission_cache[cache_key]
\ No newline at end of file
@@ -0,0 +1,177 @@
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+
+
+# <========== Request profiling ==========> #
+#
+# A request is profiled when it carries a valid signed X-Profile header
+# (see `make_profile_token()` / `manage.py profile_token`) or is picked by
+# PROFILING_SAMPLE_RATE. Stacks are sampled from a background thread, so
+# the profiled code runs unmodified, and stored in the cache as folded
+# stacks ("frame;frame;frame count"), which flamegraph.pl, speedscope and
+# inferno read directly.
+
+PROFILE_KEY = 'profile:{}'
+PROFILE_INDEX_KEY = 'profile:index'
+PROFILE_INDEX_SIZE = 100
+TOKEN_SALT = 'api.profiling'
+CPU = 'cpu'
+MEMORY = 'memory'
+
+
+def make_profile_token(mode=CPU):
+    """
+    Return a value for the X-Profile header, valid for PROFILING_TOKEN_MAX_AGE.
+    `mode` is CPU, or MEMORY to also trace allocations.
+    """
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(mode)
+
+
+def read_profile_token(token):
+    """
+    Return the mode of a valid token, None otherwise.
+    """
+    try:
+        mode = signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    return mode if mode in (CPU, MEMORY) else None
+
+
+def _frame_name(code, base_dir):
+    filename = code.co_filename
+    if filename.startswith(base_dir):
+        filename = filename[len(base_dir):]
+    return f'{getattr(code, "co_qualname", code.co_name)} ({filename})'
+
+
+class StackSampler:
+    """
+    Sample the stack of the calling thread every `interval` seconds.
+    """
+    def __init__(self, interval):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._names = {}
+        self._base_dir = str(settings.BASE_DIR) + os.sep
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_id = None
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                name = self._names.get(code)
+                if name is None:
+                    name = self._names[code] = _frame_name(code, self._base_dir)
+                stack.append(name)
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+
+    def folded(self):
+        return '\n'.join(f'{stack} {count}' for stack, count in self.stacks.most_common())
+
+
+# tracemalloc is process wide: overlapping MEMORY profiles share it, and
+# the last one to finish stops it (unless something else had started it)
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_started_tracing = False
+
+
+def _start_tracing():
+    global _tracing_users, _started_tracing
+    with _tracing_lock:
+        if not _tracing_users:
+            _started_tracing = not tracemalloc.is_tracing()
+            if _started_tracing:
+                tracemalloc.start()
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if not _tracing_users and _started_tracing:
+            tracemalloc.stop()
+
+
+class RequestProfile:
+    """
+    Profile one request: stack sampling, plus allocation tracing in MEMORY mode.
+    """
+    def __init__(self, mode):
+        self.mode = mode
+        self.sampler = StackSampler(settings.PROFILING_INTERVAL)
+        self._snapshot = None
+        self.memory = None
+
+    def __enter__(self):
+        if self.mode == MEMORY:
+            _start_tracing()
+            self._snapshot = tracemalloc.take_snapshot()
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.sampler.stop()
+        if self._snapshot is not None:
+            try:
+                differences = tracemalloc.take_snapshot().compare_to(self._snapshot, 'lineno')
+                self.memory = [str(stat) for stat in differences[:25]]
+            finally:
+                _stop_tracing()
+
+
+def store_profile(profile_id, profile, metadata):
+    cache.set(PROFILE_KEY.format(profile_id), {
+        **metadata,
+        'id': profile_id,
+        'mode': profile.mode,
+        'interval': profile.sampler.interval,
+        'samples': profile.sampler.samples,
+        'folded': profile.sampler.folded(),
+        'memory': profile.memory,
+    }, settings.PROFILING_RETENTION)
+
+    index = cache.get(PROFILE_INDEX_KEY) or []
+    index = [profile_id] + [entry for entry in index if entry != profile_id]
+    cache.set(PROFILE_INDEX_KEY, index[:PROFILE_INDEX_SIZE], settings.PROFILING_RETENTION)
+
+
+def get_profile(profile_id):
+    return cache.get(PROFILE_KEY.format(profile_id))
+
+
+def recent_profiles():
+    """
+    Return the metadata of the most recent profiles still in the cache.
+    """
+    keys = [PROFILE_KEY.format(profile_id) for profile_id in cache.get(PROFILE_INDEX_KEY) or []]
+    profiles = cache.get_many(keys)
+    return [
+        {field: value for field, value in profiles[key].items() if field not in ('folded', 'memory')}
+        for key in keys if key in profiles
+    ]
@@ -0,0 +1,262 @@
+import copy
+import pytz
+from collections import defaultdict
+from django.db import models
+from django.utils import timezone
+from phonenumber_field.modelfields import PhoneNumberField
+from rest_framework import serializers
+from api.timing import timed
+from api.utils.tz import convert_datetime_to_timezone
+
+
+# <========== Projection serializers ==========> #
+#
+# Read-only serializers for hot list endpoints. A projection compiles its
+# field list into a single values_list() query (plus one query per
+# many-to-many field) and a row function mapping each tuple to the same dict
+# the equivalent ModelSerializer would produce, without instantiating model
+# objects or going through DRF's per-field machinery:
+#
+#     class AttendanceProjection(ProjectionSerializer):
+#         employee_name = Expression(Concat('employee__first_name', Value(' '), 'employee__last_name'))
+#
+#         class Meta:
+#             model = Attendance
+#             fields = ['id', 'employee', 'employee_name', 'date', 'status']
+#
+# Fields that are not declared are read from the model column of the same
+# name and formatted the way ModelSerializer formats that model field.
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _drf_datetime(value):
+    # Same output as serializers.DateTimeField with the default settings
+    if timezone.is_aware(value):
+        value = value.astimezone(timezone.get_current_timezone())
+    value = value.isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def converter_for(model_field):
+    """
+    Return the function formatting values of a model field, or None when the
+    database value is already what the ModelSerializer field would return.
+    """
+    if isinstance(model_field, models.DateTimeField):
+        return _drf_datetime
+    if isinstance(model_field, (models.DateField, models.TimeField)):
+        return _isoformat
+    if isinstance(model_field, (models.UUIDField, PhoneNumberField)) and not model_field.is_relation:
+        return str
+    if isinstance(model_field, models.DecimalField):
+        return serializers.DecimalField(
+            max_digits=model_field.max_digits, decimal_places=model_field.decimal_places,
+        ).to_representation
+    return None
+
+
+def _resolve_field(model, lookup):
+    """
+    Follow a `__` separated lookup and return the model field it ends on.
+    """
+    *path, name = lookup.split('__')
+    for part in path:
+        model = model._meta.get_field(part).related_model
+    return model._meta.get_field(name)
+
+
+class ProjectionField:
+    """
+    Base class of projection fields. A field reads its `columns()` from each
+    row and turns them into a single value with the function returned by
+    `compile()`.
+    """
+    def __init__(self, source=None):
+        self.source = source
+
+    def bind(self, name, projection):
+        self.field_name = name
+        self.source = self.source or name
+        self.projection = projection
+
+    @property
+    def model(self):
+        return self.projection.Meta.model
+
+    def columns(self):
+        return [self.source]
+
+    def annotations(self):
+        return {}
+
+    def compile(self, start):
+        convert = converter_for(_resolve_field(self.model, self.source))
+        if convert is None:
+            return lambda row: row[start]
+        return lambda row: None if row[start] is None else convert(row[start])
+
+
+class Column(ProjectionField):
+    """
+    A model column, formatted like the ModelSerializer field for it.
+    """
+
+
+class LocalDateTime(ProjectionField):
+    """
+    A datetime column converted to the timezone in the serializer context
+    (set by TimezoneMixin), like the serializers doing it in to_representation.
+    """
+    def compile(self, start):
+        target_timezone = self.projection.context.get('timezone', pytz.UTC)
+
+        def convert(row):
+            value = row[start]
+            if value is None:
+                return None
+            return convert_datetime_to_timezone(value, target_timezone).isoformat()
+        return convert
+
+
+class Expression(ProjectionField):
+    """
+    A value computed by the database, e.g. replacing a SerializerMethodField.
+    """
+    def __init__(self, expression):
+        super().__init__()
+        self.expression = expression
+
+    def columns(self):
+        return [self.field_name]
+
+    def annotations(self):
+        return {self.field_name: self.expression}
+
+    def compile(self, start):
+        return lambda row: row[start]
+
+
+class Nested(ProjectionField):
+    """
+    A forward foreign key rendered as a dict of the related model's fields,
+    or None when the key is null.
+    """
+    def __init__(self, fields, source=None):
+        super().__init__(source)
+        self.fields = fields
+
+    def columns(self):
+        return [self.source] + [f'{self.source}__{name}' for name in self.fields]
+
+    def compile(self, start):
+        related_model = _resolve_field(self.model, self.source).related_model
+        getters = []
+        for offset, name in enumerate(self.fields, start=start + 1):
+            convert = converter_for(related_model._meta.get_field(name))
+            getters.append((name, offset, convert))
+
+        def build(row):
+            if row[start] is None:
+                return None
+            return {
+                name: row[offset] if convert is None or row[offset] is None else convert(row[offset])
+                for name, offset, convert in getters
+            }
+        return build
+
+
+class Many(ProjectionField):
+    """
+    A many-to-many relation rendered as a list of dicts, fetched with one
+    extra query for the whole page (like prefetch_related).
+    """
+    def __init__(self, fields, source=None):
+        super().__init__(source)
+        self.fields = fields
+
+    def columns(self):
+        return []
+
+    def compile(self, start):
+        return lambda row: []
+
+    def fetch(self, pks):
+        model_field = self.model._meta.get_field(self.source)
+        related_model = model_field.related_model
+        query_name = model_field.related_query_name()
+        converters = [(name, converter_for(related_model._meta.get_field(name))) for name in self.fields]
+
+        related = defaultdict(list)
+        rows = related_model._default_manager.filter(
+            **{f'{query_name}__in': pks}
+        ).values_list(query_name, *self.fields)
+        for owner, *values in rows:
+            related[owner].append({
+                name: value if convert is None or value is None else convert(value)
+                for (name, convert), value in zip(converters, values)
+            })
+        return related
+
+
+class ProjectionSerializerMetaclass(type):
+    def __new__(cls, name, bases, attrs):
+        declared = {}
+        for base in reversed(bases):
+            declared.update(getattr(base, '_declared_fields', {}))
+        declared.update({
+            key: attrs.pop(key) for key, value in list(attrs.items())
+            if isinstance(value, ProjectionField)
+        })
+        attrs['_declared_fields'] = declared
+        return super().__new__(cls, name, bases, attrs)
+
+
+class ProjectionSerializer(metaclass=ProjectionSerializerMetaclass):
+    """
+    Read-only serializer producing dicts straight from values_list() rows.
+    """
+    def __init__(self, context=None):
+        self.context = context or {}
+        self.fields = {}
+        for name in self.Meta.fields:
+            field = copy.deepcopy(self._declared_fields.get(name)) or Column()
+            field.bind(name, self)
+            self.fields[name] = field
+
+        self._columns = ['pk']
+        self._annotations = {}
+        self._getters = []
+        self._many = []
+        for name, field in self.fields.items():
+            self._getters.append((name, field.compile(len(self._columns))))
+            self._columns.extend(field.columns())
+            self._annotations.update(field.annotations())
+            if isinstance(field, Many):
+                self._many.append(field)
+
+    def project(self, queryset):
+        """
+        Turn a model queryset into the values_list() queryset this projection reads.
+        """
+        queryset = queryset.prefetch_related(None)
+        if self._annotations:
+            queryset = queryset.annotate(**self._annotations)
+        return queryset.values_list(*self._columns)
+
+    @timed('serialize')
+    def to_representation(self, rows):
+        rows = list(rows)
+        data = [{name: getter(row) for name, getter in self._getters} for row in rows]
+
+        if self._many and rows:
+            pks = [row[0] for row in rows]
+            for field in self._many:
+                related = field.fetch(pks)
+                for pk, item in zip(pks, data):
+                    item[field.field_name] = related.get(pk, [])
+        return data
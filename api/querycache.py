@@ -0,0 +1,193 @@
+import functools
+import hashlib
+from collections import Counter
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from api import metrics
+from api.cache import bump_data_version, get_data_version, pending_data_versions
+from api.db.routers import use_primary
+
+
+# <========== Query cache ==========> #
+#
+# Opt-in caching of primary-key and simple-filter lookups:
+#
+#     Position.objects.cached().get(id=position_id)
+#     Department.objects.cached().filter(id=value, organization_id=org_id).exists()
+#
+# Each entry records the tables its SQL reads from and embeds their current
+# generation in its key. Any write to one of those tables (post_save,
+# post_delete, or update/bulk_update/bulk_create on a caching queryset) bumps
+# the table generation once the transaction commits, which orphans every
+# dependent entry.
+#
+# Like every cached read, lookups are only cached with a cache every worker
+# shares (settings.SHARED_CACHE).
+#
+# Only the tables of models with a CachingManager are tracked: lookups that
+# join any other table are not cached, and writes to other tables bump
+# nothing.
+
+QUERY_CACHE_KEY = 'query:{}:{}'
+MISSING = ('query-cache-missing',)
+
+# Per-process counters, keyed by (db_table, event)
+QUERY_CACHE_STATS = Counter()
+
+
+def table_scope(db_table):
+    return f'table:{db_table}'
+
+
+@functools.cache
+def caching_models():
+    """
+    The models whose managers serve cached lookups.
+    """
+    return tuple(
+        model for model in apps.get_models()
+        if any(issubclass(manager._queryset_class, CachingQuerySet) for manager in model._meta.managers)
+    )
+
+
+@functools.cache
+def cached_tables():
+    return frozenset(model._meta.db_table for model in caching_models())
+
+
+def invalidate_tables(*db_tables, using=None):
+    """
+    Orphan every cached lookup that reads from one of the given tables.
+    """
+    db_tables = [db_table for db_table in db_tables if db_table in cached_tables()]
+    if not db_tables:
+        return
+    for db_table in db_tables:
+        QUERY_CACHE_STATS[(db_table, 'invalidations')] += 1
+    bump_data_version(*(table_scope(db_table) for db_table in db_tables), using=using)
+
+
+def query_cache_stats():
+    """
+    Return hit / miss / invalidation counters and the hit rate per table.
+    """
+    stats = {}
+    for (db_table, event), count in QUERY_CACHE_STATS.items():
+        stats.setdefault(db_table, {'hits': 0, 'misses': 0, 'invalidations': 0})[event] = count
+    for table_stats in stats.values():
+        lookups = table_stats['hits'] + table_stats['misses']
+        table_stats['hit_rate'] = table_stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+class CachingQuerySet(models.QuerySet):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cache_reads = False
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._cache_reads = self._cache_reads
+        return clone
+
+    def cached(self):
+        """
+        Serve get() / exists() on this queryset from the query cache.
+        """
+        clone = self._chain()
+        clone._cache_reads = True
+        return clone
+
+    # <========== Reads ==========> #
+
+    def _tables(self):
+        return sorted({
+            alias.table_name for alias in self.query.alias_map.values()
+        } | {self.model._meta.db_table})
+
+    def _use_cache(self):
+        if not self._cache_reads or not settings.SHARED_CACHE:
+            return False
+        tables = self._tables()
+        # Writes to untracked tables would not orphan the entry
+        if not cached_tables().issuperset(tables):
+            return False
+        # A transaction's writes bump their tables when it commits, and may be
+        # rolled back: the tables it wrote to are read from the database until
+        # then, the other ones are still served from the cache.
+        pending = pending_data_versions(self.db)
+        return not any(table_scope(db_table) in pending for db_table in tables)
+
+    def _cache_key(self, method):
+        compiler = self.query.get_compiler(using=self.db)
+        sql, params = compiler.as_sql()
+        generations = [get_data_version(table_scope(db_table)) for db_table in self._tables()]
+
+        raw = repr((self.db, method, sql, params, generations))
+        digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+        return QUERY_CACHE_KEY.format(self.model._meta.db_table, digest)
+
+    def _cached_call(self, method, fetch):
+        db_table = self.model._meta.db_table
+        # Entries are shared by every reader, fill them from the primary only
+        with use_primary():
+            key = self._cache_key(method)
+            result = cache.get(key)
+            if result is not None:
+                QUERY_CACHE_STATS[(db_table, 'hits')] += 1
+                metrics.record_cache_lookup('query', hit=True)
+                return result
+
+            QUERY_CACHE_STATS[(db_table, 'misses')] += 1
+            metrics.record_cache_lookup('query', hit=False)
+            result = fetch()
+        cache.set(key, result, settings.QUERY_CACHE_TIMEOUT)
+        return result
+
+    def get(self, *args, **kwargs):
+        if not self._cache_reads:
+            return super().get(*args, **kwargs)
+
+        clone = self.filter(*args, **kwargs)
+        if not clone._use_cache():
+            return super(CachingQuerySet, clone).get()
+
+        def fetch():
+            try:
+                return super(CachingQuerySet, clone).get()
+            except self.model.DoesNotExist:
+                return MISSING
+
+        result = clone._cached_call('get', fetch)
+        if result == MISSING:
+            raise self.model.DoesNotExist(
+                f'{self.model._meta.object_name} matching query does not exist.'
+            )
+        return result
+
+    def exists(self):
+        if not self._use_cache():
+            return super().exists()
+        return self._cached_call('exists', super().exists)
+
+    # <========== Writes that bypass model signals ==========> #
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        invalidate_tables(self.model._meta.db_table, using=self.db)
+        return rows
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        invalidate_tables(self.model._meta.db_table, using=self.db)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        invalidate_tables(self.model._meta.db_table, using=self.db)
+        return objs
+
+
+CachingManager = models.Manager.from_queryset(CachingQuerySet)
@@ -0,0 +1,130 @@
+import datetime
+import json
+import math
+from decimal import Decimal
+from django.utils.functional import cached_property
+from phonenumber_field.phonenumber import PhoneNumber
+from rest_framework import renderers
+from rest_framework.compat import INDENT_SEPARATORS, LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils import encoders
+from api.timing import timed
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+
+class TimezoneAwareEncoder:
+    """
+    `default` hook shared by the orjson and the stdlib code paths.
+
+    Types orjson does not handle natively (Decimal, phone numbers, lazy
+    translations, querysets...) go through DRF's JSONEncoder so both paths
+    produce the same output. Datetimes are passed through on purpose so aware
+    values can be converted to the view's timezone (TimezoneMixin) and are
+    formatted exactly like DRF does ('Z' suffix for UTC).
+    """
+    def __init__(self, view=None):
+        self.view = view
+        self.fallback = encoders.JSONEncoder()
+
+    @cached_property
+    def timezone(self):
+        get_timezone = getattr(self.view, 'get_timezone_from_request', None)
+        if get_timezone is None:
+            return None
+        try:
+            return get_timezone()
+        except ValidationError:
+            # The view already reported the invalid timezone, render as-is
+            return None
+
+    def __call__(self, obj):
+        if isinstance(obj, datetime.datetime):
+            if obj.tzinfo is not None and self.timezone is not None:
+                obj = obj.astimezone(self.timezone)
+            representation = obj.isoformat()
+            if representation.endswith('+00:00'):
+                representation = representation[:-6] + 'Z'
+            return representation
+        if isinstance(obj, PhoneNumber):
+            return str(obj)
+        return self.fallback.default(obj)
+
+
+def has_non_finite(data):
+    """
+    Whether `data` holds a NaN or infinite number, which orjson renders as
+    null where the stdlib encoder writes NaN / Infinity or raises.
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, Decimal):
+            if not value.is_finite():
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class TimezoneAwareJSONRenderer(renderers.JSONRenderer):
+    """
+    JSON renderer backed by orjson.
+
+    Falls back to the stdlib encoder when orjson is unavailable, when an
+    indent orjson cannot produce is requested (the browsable API asks for 4)
+    or when orjson rejects the payload (e.g. integers above 64 bits).
+    NaN and infinite numbers are rejected like JSONRenderer does with
+    STRICT_JSON, and written as NaN / Infinity without it.
+    """
+    def get_orjson_options(self, indent):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    @timed('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        indent = self.get_indent(accepted_media_type, renderer_context)
+        default = TimezoneAwareEncoder(renderer_context.get('view'))
+
+        if orjson is not None and indent in (None, 2):
+            try:
+                ret = orjson.dumps(data, default=default, option=self.get_orjson_options(indent))
+            except orjson.JSONEncodeError:
+                ret = None
+            # orjson writes null for NaN / Infinity: only scan when there may be one
+            if ret is not None and b'null' in ret and has_non_finite(data):
+                if self.strict:
+                    raise ValueError('Out of range float values are not JSON compliant')
+                ret = None
+            if ret is not None:
+                # Keep the output a strict javascript subset, like JSONRenderer
+                if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+                    ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+                return ret
+
+        if indent is None:
+            separators = SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+        else:
+            separators = INDENT_SEPARATORS
+
+        ret = json.dumps(
+            data, default=default,
+            indent=indent, ensure_ascii=self.ensure_ascii,
+            allow_nan=not self.strict, separators=separators
+        )
+        ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+        return ret.encode()
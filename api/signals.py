@@ -0,0 +1,27 @@
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from api.querycache import caching_models, invalidate_tables
+
+
+def model_changed(sender, using, **kwargs):
+    invalidate_tables(sender._meta.db_table, using=using)
+
+
+def connect_query_cache():
+    # Only the tables cached lookups read from: every other model keeps
+    # signal-free saves and fast (signal-free) cascade deletes. m2m_changed is
+    # not needed: it is sent by the through table, which is not tracked, so no
+    # cached lookup reads it (lookups joining it are not cached).
+    for model in caching_models():
+        post_save.connect(model_changed, sender=model, dispatch_uid='query_cache_invalidate_model')
+        post_delete.connect(model_changed, sender=model, dispatch_uid='query_cache_invalidate_model')
+
+
+@receiver(connection_created, dispatch_uid='query_budget_wrapper')
+def install_query_wrapper(sender, connection, **kwargs):
+    from api.middleware import record_query
+
+    # Sent again on every reconnect of the same connection
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
@@ -0,0 +1,87 @@
+import uuid
+import pytz
+from django.utils.functional import cached_property
+from api.cache import is_active_organization, is_organization_member
+
+
+# <========== Tenant context ==========> #
+#
+# Routes nested under an organization (`organizations/<organization_pk>/...`)
+# get a TenantContext as `request.tenant` (see TenantContextMiddleware).
+# Viewsets, permissions and serializers ask it for the organization, its
+# preferences and the caller's membership instead of looking them up again:
+# each is read at most once per request, and only if something needs it.
+
+class TenantContext:
+    """
+    The organization a request is scoped to.
+    """
+    def __init__(self, organization_id):
+        try:
+            organization_id = uuid.UUID(str(organization_id))
+        except ValueError:
+            # Kept as is: no organization has it, is_active is False
+            pass
+        self.organization_id = organization_id
+        self._members = {}
+
+    @cached_property
+    def is_active(self):
+        return is_active_organization(self.organization_id)
+
+    @cached_property
+    def organization(self):
+        """
+        The organization row, with its usage counters. None when it does
+        not exist or is inactive.
+        """
+        from org.models import Organization
+
+        if not self.is_active:
+            return None
+        return Organization.objects.select_related('usage').filter(pk=self.organization_id).first()
+
+    @cached_property
+    def preferences(self):
+        from org.models import OrganizationPreferences
+
+        try:
+            # Through the query cache, invalidated whenever preferences change
+            return OrganizationPreferences.objects.cached().get(organization_id=self.organization_id)
+        except OrganizationPreferences.DoesNotExist:
+            return None
+
+    @property
+    def timezone(self):
+        return self.preferences.timezone if self.preferences is not None else pytz.UTC
+
+    def is_member(self, user):
+        if not getattr(user, 'is_authenticated', False):
+            return False
+        member = self._members.get(user.pk)
+        if member is not None and member.status == member.ACTIVE:
+            return True
+        return is_organization_member(self.organization_id, user.pk)
+
+    def get_member(self, user):
+        """
+        The user's membership with what permission checks read, or None.
+        Read from the primary: a lagging replica would still grant what was
+        just revoked.
+        """
+        if not getattr(user, 'is_authenticated', False):
+            return None
+        if user.pk not in self._members:
+            from api.db.routers import use_primary
+            from org.models import OrganizationMember
+
+            with use_primary():
+                self._members[user.pk] = OrganizationMember.objects.select_related(
+                    'organization', 'user',
+                ).prefetch_related(
+                    'permissions', 'revoked_permissions',
+                ).filter(organization_id=self.organization_id, user=user).first()
+        return self._members[user.pk]
+
+    def is_for(self, organization_id):
+        return str(self.organization_id) == str(organization_id)
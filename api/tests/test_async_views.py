@@ -0,0 +1,113 @@
+import inspect
+import sys
+import types
+import jwt
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.handlers.base import BaseHandler
+from django.test import AsyncClient
+from django.urls import path
+from cryptography.hazmat.primitives.asymmetric import rsa
+from django.core.cache import cache
+from rest_framework.test import APIRequestFactory
+from core.authentication import ClerkAuthentication
+from core.models import User
+from org.views import MyOrganizationViewSet
+
+
+@pytest.fixture
+def clerk(settings):
+    settings.CLERK_ISSUER = 'https://clerk.test'
+    settings.CLERK_AUDIENCE = 'hr-api'
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+    jwk['kid'] = 'test-key'
+    cache.set(settings.CLERK_JWKS_CACHE_KEY, {'keys': [jwk]})
+    yield private_key
+    cache.delete(settings.CLERK_JWKS_CACHE_KEY)
+
+
+def make_token(private_key, **claims):
+    payload = {'iss': 'https://clerk.test', 'aud': 'hr-api', 'sub': 'user_async', 'email': 'async@test.com', **claims}
+    return jwt.encode(payload, private_key, algorithm='RS256', headers={'kid': 'test-key'})
+
+
+@pytest.mark.django_db
+def test_aauthenticate_upserts_user(clerk):
+    request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {make_token(clerk)}')
+
+    user, _ = async_to_sync(ClerkAuthentication().aauthenticate)(request)
+
+    assert user.pk == 'user_async'
+    assert User.objects.filter(pk='user_async', email='async@test.com').exists()
+
+
+@pytest.mark.django_db
+def test_async_view_authenticates_on_the_event_loop(settings, clerk):
+    settings.ASYNC_VIEWS = True
+    view = MyOrganizationViewSet.as_view({'get': 'list'})
+    request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {make_token(clerk)}')
+
+    response = async_to_sync(view)(request)
+
+    assert inspect.iscoroutinefunction(view)
+    assert view.cls is MyOrganizationViewSet
+    assert response.status_code == 200
+    assert request.async_authentication[ClerkAuthentication][0].pk == 'user_async'
+
+
+@pytest.mark.django_db
+def test_async_view_reports_authentication_failures(settings, clerk):
+    settings.ASYNC_VIEWS = True
+    view = MyOrganizationViewSet.as_view({'get': 'list'})
+    request = APIRequestFactory().get('/', HTTP_AUTHORIZATION='Bearer not-a-jwt')
+
+    response = async_to_sync(view)(request)
+
+    assert response.status_code == 403
+    assert response.data == {'error': 'Invalid token'}
+
+
+def test_sync_views_by_default(settings):
+    settings.ASYNC_VIEWS = False
+
+    assert not inspect.iscoroutinefunction(MyOrganizationViewSet.as_view({'get': 'list'}))
+
+
+@pytest.fixture
+def async_urls(settings):
+    # as_view() picks the async view when the URLconf is imported
+    settings.ASYNC_VIEWS = True
+    urlconf = types.ModuleType('async_test_urls')
+    urlconf.urlpatterns = [path('api/my-organization/', MyOrganizationViewSet.as_view({'get': 'list'}))]
+    sys.modules[urlconf.__name__] = urlconf
+    settings.ROOT_URLCONF = urlconf.__name__
+    yield
+    del sys.modules[urlconf.__name__]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_asgi_chain_stays_async(settings, clerk, async_urls, monkeypatch):
+    settings.QUERY_COUNT_HEADERS = True
+    adapted = []
+    adapt_method_mode = BaseHandler.adapt_method_mode
+
+    def spy(self, is_async, method, method_is_async=None, debug=False, name=None):
+        if method_is_async is None:
+            method_is_async = iscoroutinefunction(method)
+        if is_async != method_is_async:
+            adapted.append(name or method)
+        return adapt_method_mode(self, is_async, method, method_is_async, debug, name)
+    monkeypatch.setattr(BaseHandler, 'adapt_method_mode', spy)
+
+    response = async_to_sync(AsyncClient().get)(
+        '/api/my-organization/', headers={'Authorization': f'Bearer {make_token(clerk)}'},
+    )
+
+    assert response.status_code == 200
+    assert response['X-Request-ID']
+    # The view's queries, run in a worker thread, are still counted
+    assert int(response['X-Query-Count']) > 0
+    # No middleware ran in a thread; Django's own CSRF process_view still does
+    assert [name for name in adapted if isinstance(name, str)] == []
+    assert [method for method in adapted if getattr(method, '__module__', '').startswith('api.')] == []
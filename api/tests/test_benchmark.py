@@ -0,0 +1,34 @@
+import pytest
+from api.benchmarks import runner
+from api.benchmarks.scenarios import SCENARIOS
+
+
+def test_percentile_interpolates():
+    assert runner.percentile([1, 2, 3, 4], 50) == 2.5
+    assert runner.percentile([5], 99) == 5
+
+
+@pytest.mark.django_db
+def test_benchmark_run_covers_every_route():
+    report = runner.run(['solo'], iterations=1, warmup=0, attendance_days=7, employees=3)
+
+    assert report['uncovered_routes'] == [
+        'my_invitations-accept', 'organizations-restore-organization', 'organizations-transfer-ownership', 'send-email',
+    ]
+    results = {result['scenario']: result for result in report['results']}
+    assert len(results) == len(SCENARIOS)
+    assert results['employees.list']['statuses'] == {'200': 1}
+    assert results['attendances.check_in']['statuses'] == {'201': 1}
+    assert results['employees.list']['queries']['max'] > 0
+
+
+def test_compare_flags_regressions():
+    def report(p95, queries):
+        return {'results': [{
+            'tenant': 'solo', 'scenario': 'employees.list',
+            'latency_ms': {'p95': p95}, 'queries': {'max': queries},
+        }]}
+
+    assert not runner.compare(report(10, 3), report(11, 3))[0]['regression']
+    assert runner.compare(report(10, 3), report(13, 3))[0]['regression']
+    assert runner.compare(report(10, 3), report(10, 4))[0]['regression']
@@ -0,0 +1,53 @@
+from rest_framework import status
+import pytest
+from hr.models import Department
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    def test_list_returns_etag(self, client, organization):
+        Department.objects.create(organization=organization, name='Sales')
+
+        response = client.get(f'/api/organizations/{organization.id}/departments/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'].startswith('W/"')
+
+    def test_matching_etag_returns_304(self, client, organization):
+        Department.objects.create(organization=organization, name='Sales')
+        url = f'/api/organizations/{organization.id}/departments/'
+        etag = client.get(url)['ETag']
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+
+    def test_write_changes_etag(self, client, organization):
+        department = Department.objects.create(organization=organization, name='Sales')
+        url = f'/api/organizations/{organization.id}/departments/'
+        etag = client.get(url)['ETag']
+
+        department.delete()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['ETag'] != etag
+
+    def test_detail_sends_only_an_etag(self, client, organization):
+        department = Department.objects.create(organization=organization, name='Sales')
+        url = f'/api/organizations/{organization.id}/departments/{department.id}/'
+        etag = client.get(url)['ETag']
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not response.has_header('Last-Modified')
+
+    def test_detail_ignores_if_modified_since(self, client, organization):
+        department = Department.objects.create(organization=organization, name='Sales')
+        url = f'/api/organizations/{organization.id}/departments/{department.id}/'
+
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT')
+
+        assert response.status_code == status.HTTP_200_OK
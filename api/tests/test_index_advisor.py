@@ -0,0 +1,56 @@
+import pytest
+from api.benchmarks import runner
+from api.db import indexes
+from hr.models import Attendance
+
+
+def attendance_scan(node_type, removed, **conditions):
+    return {
+        'Node Type': 'Nested Loop',
+        'Plans': [
+            {'Node Type': node_type, 'Relation Name': 'hr_attendance', 'Actual Rows': 20, 'Actual Loops': 1,
+             'Rows Removed by Filter': removed, 'Shared Hit Blocks': 40, 'Shared Read Blocks': 2, **conditions},
+            {'Node Type': 'Seq Scan', 'Relation Name': 'hr_employee', 'Actual Rows': 3, 'Actual Loops': 1},
+        ],
+    }
+
+
+@pytest.mark.django_db
+class TestIndexAdvisor:
+    def test_filtered_scans_suggest_a_composite_index(self):
+        plan = attendance_scan(
+            'Seq Scan', 5000,
+            Filter="((date >= '2024-01-01'::date) AND (organization_id = 'a0b1'::uuid) AND (status = 'late = 1'))",
+        )
+
+        scans, missing = indexes.analyze_plan(plan, 'abc123', 1000, indexes.models_by_table(), {})
+
+        assert [(scan['table'], scan['rows_removed'], scan['buffers']) for scan in scans] == [('hr_attendance', 5000, 42)]
+        assert [finding['columns'] for finding in missing] == [('organization_id', 'status', 'date')]
+        suggestion = indexes.suggest_index(Attendance, missing[0]['columns'])
+        assert "models.Index(fields=['organization', 'status', 'date']" in suggestion
+
+    def test_covered_and_small_scans_are_not_reported(self):
+        tables = indexes.models_by_table()
+        covered = attendance_scan(
+            'Index Scan', 5000, **{'Index Cond': '(employee_id = 7)', 'Filter': "(date = '2024-01-01'::date)"},
+        )
+        assert indexes.analyze_plan(covered, 'abc123', 1000, tables, {}) == ([], [])
+
+        small = attendance_scan('Seq Scan', 10, Filter="(organization_id = 'a0b1'::uuid)")
+        assert indexes.analyze_plan(small, 'abc123', 1000, tables, {}) == ([], [])
+
+    def test_captured_workload_reports_redundant_indexes(self):
+        capture = indexes.QueryCapture()
+        runner.run(['solo'], iterations=1, warmup=0, attendance_days=7, employees=3, capture=capture)
+
+        report = indexes.advise(capture)
+
+        assert report['database'] == 'sqlite'
+        assert report['queries'] and all(query['calls'] > 0 for query in report['queries'])
+        # Plans and index usage are PostgreSQL only
+        assert report['missing_indexes'] == report['unused_indexes'] == []
+        redundant = {entry['index']: entry for entry in report['redundant_indexes'] if entry['table'] == 'hr_attendance'}
+        employee_date = next(index.name for index in Attendance._meta.indexes if index.fields == ['employee', 'date'])
+        assert redundant[employee_date]['covered_by'] == 'unique_attendance_record_per_day'
+        assert 'remove models.Index' in redundant[employee_date]['suggestion']
@@ -0,0 +1,65 @@
+import json
+import logging
+import pytest
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory
+from api.logs import JSONFormatter, QueuedHandler, RequestContextFilter, SamplingFilter, bind_log_context, request_log_context
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / 'app.log'
+    handler = QueuedHandler(filename=str(path))
+    handler.setFormatter(JSONFormatter())
+    handler.addFilter(RequestContextFilter())
+    logger = logging.getLogger('test.queued')
+    logger.addHandler(handler)
+    logger.propagate = False
+    yield logger, handler, path
+    logger.removeHandler(handler)
+    handler.close()
+
+
+def read_records(handler, path):
+    handler.flush_and_stop()
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+@pytest.mark.django_db
+def test_records_carry_request_context(log_file):
+    logger, handler, path = log_file
+    user = get_user_model().objects.create_user(username='logged', email='logged@test.com', password='x')
+    request = RequestFactory().get('/')
+    request.user = user
+
+    with request_log_context(request, 'req-123'):
+        bind_log_context(organization_id='42')
+        logger.info('Checked in %s', 'Ada')
+    logger.warning('outside')
+
+    inside, outside = read_records(handler, path)
+    assert inside['message'] == 'Checked in Ada'
+    assert (inside['request_id'], inside['organization_id'], inside['user_id']) == ('req-123', '42', str(user.pk))
+    assert 'request_id' not in outside
+
+
+def test_exceptions_are_rendered_before_queueing(log_file):
+    logger, handler, path = log_file
+
+    try:
+        raise ValueError('boom')
+    except ValueError:
+        logger.exception('failed')
+
+    (record,) = read_records(handler, path)
+    assert 'ValueError: boom' in record['exc_info']
+
+
+def test_sampling_keeps_warnings():
+    sampling = SamplingFilter(rate=0.0)
+
+    def record(level):
+        return logging.LogRecord('test', level, __file__, 1, 'message', None, None)
+
+    assert not sampling.filter(record(logging.INFO))
+    assert sampling.filter(record(logging.WARNING))
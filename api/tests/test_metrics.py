@@ -0,0 +1,43 @@
+import pytest
+from rest_framework.test import APIClient
+from api.timing import request_timings, timed
+
+
+def test_timed_adds_to_the_current_request():
+    with timed('outside'):
+        pass
+
+    with request_timings() as timings:
+        with timed('auth.verify'):
+            pass
+        with timed('auth.user'):
+            pass
+        with request_timings() as nested:
+            assert nested is timings
+
+    assert list(timings.phases) == ['auth.verify', 'auth.user']
+    assert timings.total('auth') == timings.phases['auth.verify'] + timings.phases['auth.user']
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_requires_token(settings):
+    settings.METRICS_TOKEN = ''
+    assert APIClient().get('/api/metrics/').status_code == 403
+
+    settings.METRICS_TOKEN = 'scrape-secret'
+    assert APIClient().get('/api/metrics/', HTTP_AUTHORIZATION='Bearer wrong').status_code == 403
+
+
+@pytest.mark.django_db
+def test_requests_are_recorded_per_view(settings, staff_client):
+    settings.METRICS_TOKEN = 'scrape-secret'
+    staff_client.get('/api/permissions/')
+
+    response = APIClient().get('/api/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret')
+
+    assert response.status_code == 200
+    body = response.content.decode()
+    assert 'api_request_duration_seconds_count{method="GET",status="2xx",view="permissions-list"}' in body
+    assert 'api_request_db_queries_count{view="permissions-list"}' in body
+    assert 'api_cache_lookups_total{cache="response",result=' in body
+    assert 'api_requests_in_flight' in body
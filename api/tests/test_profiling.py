@@ -0,0 +1,84 @@
+import tracemalloc
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
+from api import profiling
+
+
+@pytest.fixture
+def profiling_enabled(settings):
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_INTERVAL = 0.001
+
+
+def test_overlapping_memory_profiles_share_tracemalloc():
+    assert not tracemalloc.is_tracing()
+    first = profiling.RequestProfile(profiling.MEMORY).__enter__()
+    second = profiling.RequestProfile(profiling.MEMORY).__enter__()
+
+    first.__exit__(None, None, None)
+    assert tracemalloc.is_tracing()
+    second.__exit__(None, None, None)
+
+    assert first.memory is not None and second.memory is not None
+    assert not tracemalloc.is_tracing()
+
+
+def test_profile_token_round_trip():
+    assert profiling.read_profile_token(profiling.make_profile_token()) == profiling.CPU
+    assert profiling.read_profile_token(profiling.make_profile_token(profiling.MEMORY)) == profiling.MEMORY
+    assert profiling.read_profile_token('cpu:forged') is None
+
+
+@pytest.mark.django_db
+def test_requests_without_token_are_not_profiled(profiling_enabled, staff_client):
+    response = staff_client.get('/api/permissions/')
+
+    assert response.status_code == 200
+    assert 'X-Profile-Id' not in response
+    assert response['X-Request-ID']
+
+
+@pytest.mark.django_db
+def test_signed_header_profiles_request(profiling_enabled, staff_client):
+    response = staff_client.get(
+        '/api/permissions/',
+        HTTP_X_PROFILE=profiling.make_profile_token(profiling.MEMORY),
+        HTTP_X_REQUEST_ID='bench-request-0001',
+    )
+
+    profile_id = response['X-Profile-Id']
+    assert profile_id != 'bench-request-0001'
+
+    listing = staff_client.get('/api/profiles/')
+    assert [(profile['id'], profile['request_id']) for profile in listing.data] == [(profile_id, 'bench-request-0001')]
+    assert listing.data[0]['path'] == '/api/permissions/'
+    assert 'folded' not in listing.data[0]
+
+    detail = staff_client.get(f'/api/profiles/{profile_id}/', {'format': 'json'})
+    assert detail.data['mode'] == profiling.MEMORY
+    assert detail.data['memory'] is not None
+
+    download = staff_client.get(f'/api/profiles/{profile_id}/')
+    assert download['Content-Type'].startswith('text/plain')
+    assert f'profile-{profile_id}.folded' in download['Content-Disposition']
+
+
+@pytest.mark.django_db
+def test_reused_request_ids_keep_their_own_profiles(profiling_enabled, staff_client):
+    token = profiling.make_profile_token()
+    first = staff_client.get('/api/permissions/', HTTP_X_PROFILE=token, HTTP_X_REQUEST_ID='bench-request-0001')
+    second = staff_client.get('/api/permissions/', HTTP_X_PROFILE=token, HTTP_X_REQUEST_ID='bench-request-0001')
+
+    assert first['X-Profile-Id'] != second['X-Profile-Id']
+    assert len(staff_client.get('/api/profiles/').data) == 2
+    assert staff_client.get('/api/profiles/bench-request-0001/').status_code == 404
+
+
+@pytest.mark.django_db
+def test_profiles_require_staff(profiling_enabled):
+    User = get_user_model()
+    client = APIClient()
+    client.force_authenticate(user=User.objects.create_user(username='member', email='m@test.com', password='x'))
+
+    assert client.get('/api/profiles/').status_code == 403
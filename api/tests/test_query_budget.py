@@ -0,0 +1,77 @@
+import datetime
+import logging
+import pytest
+from django.db import connection
+from api.middleware import QueryStats, fingerprint_sql
+from hr.models import Attendance, Department, Employee
+
+
+@pytest.fixture
+def employees(organization):
+    return [
+        Employee.objects.create(
+            organization=organization,
+            first_name=f'Employee{index}',
+            last_name='Walker',
+            date_of_birth=datetime.date(1990, 5, 17),
+            gender='F',
+            phone_number=f'+1202555012{index}',
+            address='1 Main St',
+        )
+        for index in range(6)
+    ]
+
+
+def test_fingerprint_ignores_literals_and_in_list_length():
+    assert fingerprint_sql('SELECT * FROM "hr_employee" WHERE "id" IN (%s, %s)') == \
+        fingerprint_sql('SELECT * FROM "hr_employee" WHERE "id" IN (%s, %s, %s)')
+    assert fingerprint_sql("SELECT * FROM t WHERE a = 'x' LIMIT 21") == \
+        fingerprint_sql("SELECT * FROM t WHERE a = 'y' LIMIT 1")
+    assert fingerprint_sql('SELECT a FROM t') != fingerprint_sql('SELECT b FROM t')
+
+
+@pytest.mark.django_db
+def test_query_stats_flags_repeated_shapes(employees):
+    stats = QueryStats()
+
+    with connection.execute_wrapper(stats):
+        for employee in Employee.objects.all():
+            Attendance.objects.filter(employee=employee).exists()
+
+    assert stats.count == 7
+    assert [count for count, sql in stats.repeated(5)] == [6]
+
+
+@pytest.mark.django_db
+class TestQueryBudgetMiddleware:
+    def test_adds_query_count_headers(self, client, organization):
+        response = client.get(f'/api/organizations/{organization.id}/departments/')
+
+        assert int(response['X-Query-Count']) > 0
+        assert float(response['X-Query-Time']) >= 0
+
+    def test_logs_requests_over_budget(self, client, organization, settings, caplog):
+        settings.QUERY_BUDGET_DEFAULT = 0
+
+        with caplog.at_level(logging.WARNING, logger='api.middleware'):
+            response = client.get(f'/api/organizations/{organization.id}/departments/')
+
+        assert response['X-Query-Budget-Exceeded'] == '0'
+        assert 'Query budget' in caplog.text
+
+    def test_list_endpoints_have_no_n_plus_one(self, client, organization, employees):
+        for employee in employees:
+            Attendance.objects.create(
+                organization=organization, employee=employee, date=datetime.date.today(),
+                time_in=datetime.time(9, 0), status='present',
+            )
+        Department.objects.create(organization=organization, name='Sales', manager=employees[0])
+
+        for url in [
+            f'/api/organizations/{organization.id}/attendances/',
+            f'/api/organizations/{organization.id}/departments/',
+        ]:
+            response = client.get(url)
+
+            assert response.status_code == 200
+            assert 'X-Query-Repeated' not in response
@@ -0,0 +1,95 @@
+import pytest
+from django.db import transaction
+from django.db.models.signals import post_save
+from hr.models import Department, Employee
+from api.cache import get_data_version
+from api.querycache import QUERY_CACHE_STATS, invalidate_tables, table_scope
+
+
+@pytest.fixture
+def department(organization):
+    return Department.objects.create(organization=organization, name='Sales')
+
+
+@pytest.mark.django_db(transaction=True)
+class TestQueryCache:
+    def test_repeated_lookup_hits_cache(self, department, django_assert_num_queries):
+        Department.objects.cached().get(id=department.id)
+        hits = QUERY_CACHE_STATS[('hr_department', 'hits')]
+
+        with django_assert_num_queries(0):
+            cached = Department.objects.cached().get(id=department.id)
+
+        assert cached.name == 'Sales'
+        assert QUERY_CACHE_STATS[('hr_department', 'hits')] == hits + 1
+
+    def test_save_invalidates_lookup(self, department):
+        Department.objects.cached().get(id=department.id)
+
+        department.name = 'Marketing'
+        department.save()
+
+        assert Department.objects.cached().get(id=department.id).name == 'Marketing'
+
+    def test_update_invalidates_exists(self, department):
+        lookup = Department.objects.cached().filter(id=department.id, name='Sales')
+        assert lookup.exists()
+
+        Department.objects.filter(id=department.id).update(name='Marketing')
+
+        assert not Department.objects.cached().filter(id=department.id, name='Sales').exists()
+
+    def test_missing_row_raises(self, department):
+        with pytest.raises(Department.DoesNotExist):
+            Department.objects.cached().get(id=department.id + 1)
+
+    def test_atomic_blocks_read_unwritten_tables_from_cache(self, department, django_assert_num_queries):
+        Department.objects.cached().get(id=department.id)
+
+        with transaction.atomic():
+            with django_assert_num_queries(0):
+                Department.objects.cached().get(id=department.id)
+
+            department.name = 'Marketing'
+            department.save()
+            # Written by this transaction: read from the database
+            assert Department.objects.cached().get(id=department.id).name == 'Marketing'
+
+        assert Department.objects.cached().get(id=department.id).name == 'Marketing'
+
+    def test_only_cached_tables_are_invalidated(self, department):
+        employee_scope = table_scope(Employee._meta.db_table)
+        version = get_data_version(employee_scope)
+
+        invalidate_tables(Employee._meta.db_table)
+
+        assert get_data_version(employee_scope) == version
+        connected = {lookup_key for lookup_key, *_ in post_save.receivers}
+        assert ('query_cache_invalidate_model', id(Department)) in connected
+        assert ('query_cache_invalidate_model', id(Employee)) not in connected
+
+    def test_rolled_back_writes_are_forgotten(self, department, django_assert_num_queries):
+        scope = table_scope(Department._meta.db_table)
+        version = get_data_version(scope)
+
+        with pytest.raises(RuntimeError), transaction.atomic():
+            department.name = 'Marketing'
+            department.save()
+            raise RuntimeError
+
+        Department.objects.cached().get(id=department.id)
+        with transaction.atomic():
+            # Nothing pending from the rolled back transaction
+            with django_assert_num_queries(0):
+                Department.objects.cached().get(id=department.id)
+        assert get_data_version(scope) == version
+
+    def test_rolled_back_savepoints_are_forgotten(self, department, django_assert_num_queries):
+        Department.objects.cached().get(id=department.id)
+
+        with transaction.atomic():
+            with pytest.raises(RuntimeError), transaction.atomic():
+                department.save()
+                raise RuntimeError
+            with django_assert_num_queries(0):
+                Department.objects.cached().get(id=department.id)
@@ -0,0 +1,88 @@
+import datetime
+import json
+from io import BytesIO
+import uuid
+from decimal import Decimal
+import pytest
+import pytz
+from phonenumber_field.phonenumber import PhoneNumber
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from api.parsers import ORJSONParser
+from api.renderers import TimezoneAwareJSONRenderer
+
+
+class TimezoneView:
+    def get_timezone_from_request(self):
+        return pytz.timezone('Africa/Cairo')
+
+
+def render(data, view=None, indent=None):
+    renderer_context = {'view': view}
+    if indent:
+        renderer_context['indent'] = indent
+    return TimezoneAwareJSONRenderer().render(data, 'application/json', renderer_context)
+
+
+class TestTimezoneAwareJSONRenderer:
+    def test_matches_drf_output(self):
+        data = {
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'salary': Decimal('1500.50'),
+            'hire_date': datetime.date(2025, 1, 2),
+            'shift_start': datetime.time(9, 30),
+            'check_in': datetime.datetime(2025, 1, 2, 9, 30, 15, 123456, tzinfo=pytz.UTC),
+        }
+
+        expected = JSONRenderer().render(data, 'application/json', {})
+
+        assert json.loads(render(data)) == json.loads(expected)
+
+    def test_renders_phone_numbers(self):
+        data = {'phone': PhoneNumber.from_string('+12025550123')}
+
+        assert json.loads(render(data)) == {'phone': '+12025550123'}
+
+    def test_applies_view_timezone(self):
+        data = {'check_in': datetime.datetime(2025, 1, 2, 9, 0, tzinfo=pytz.UTC)}
+
+        assert json.loads(render(data, view=TimezoneView())) == {
+            'check_in': '2025-01-02T11:00:00+02:00'
+        }
+
+    def test_browsable_indent_falls_back(self):
+        data = {'salary': Decimal('10.5'), 'items': [1, 2]}
+
+        content = render(data, indent=4)
+
+        assert content.startswith(b'{\n    "salary": 10.5')
+
+    def test_oversized_integers_fall_back(self):
+        assert json.loads(render({'value': 2 ** 70})) == {'value': 2 ** 70}
+
+    def test_non_finite_numbers_follow_strict_json(self):
+        data = {'ratio': None, 'values': [1.5, float('nan')], 'total': Decimal('Infinity')}
+
+        for value in (data, {'values': [float('-inf')], 'ratio': None}):
+            with pytest.raises(ValueError):
+                render(value)
+            with pytest.raises(ValueError):
+                JSONRenderer().render(value, 'application/json', {})
+
+        renderer = TimezoneAwareJSONRenderer()
+        renderer.strict = False
+        assert renderer.render({'values': [float('nan')], 'ratio': None}, 'application/json', {}) == (
+            b'{"values":[NaN],"ratio":null}'
+        )
+        assert render({'ratio': None, 'values': [1.5]}) == b'{"ratio":null,"values":[1.5]}'
+
+
+class TestORJSONParser:
+    def test_parses_utf8(self):
+        data = ORJSONParser().parse(BytesIO('{"name": "Café"}'.encode()), 'application/json', {})
+
+        assert data == {'name': 'Café'}
+
+    def test_invalid_json_raises_parse_error(self):
+        with pytest.raises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"name": '), 'application/json', {})
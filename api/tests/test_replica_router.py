@@ -0,0 +1,97 @@
+import pytest
+from django.db import connections, transaction
+from django.test.utils import CaptureQueriesContext
+from api.db.routers import ReplicaRouter, is_pinned_to_primary, replica_reads, use_primary
+from hr.models import Department
+
+
+class TestReplicaRouter:
+    @pytest.fixture(autouse=True)
+    def replicas(self, settings):
+        settings.DATABASE_REPLICAS = ['replica_0']
+
+    def test_reads_use_primary_by_default(self):
+        assert ReplicaRouter().db_for_read(Department) == 'default'
+
+    def test_reads_use_replica_when_enabled(self):
+        with replica_reads():
+            assert ReplicaRouter().db_for_read(Department) == 'replica_0'
+            with use_primary():
+                assert ReplicaRouter().db_for_read(Department) == 'default'
+
+    def test_writes_use_primary(self):
+        with replica_reads():
+            assert ReplicaRouter().db_for_write(Department) == 'default'
+
+    @pytest.mark.django_db
+    def test_atomic_blocks_use_primary(self):
+        with replica_reads(), transaction.atomic():
+            assert ReplicaRouter().db_for_read(Department) == 'default'
+
+    def test_migrations_only_run_on_primary(self):
+        router = ReplicaRouter()
+
+        assert router.allow_migrate('default', 'hr')
+        assert not router.allow_migrate('replica_0', 'hr')
+
+
+@pytest.mark.django_db
+def test_write_pins_client_to_primary(client, organization):
+    assert not is_pinned_to_primary(organization.user)
+    response = client.post(f'/api/organizations/{organization.id}/departments/', {'name': 'Sales'})
+
+    assert response.status_code == 201
+    assert is_pinned_to_primary(organization.user)
+
+
+@pytest.fixture(scope='module')
+def mirror_alias(django_db_setup):
+    """
+    A replica alias mirroring the test database, as DATABASE_REPLICA_URLS
+    entries are (TEST: {'MIRROR': 'default'}). Registered before the test
+    database access is set up, which only allows the aliases it knows.
+    """
+    connections.settings['mirror'] = {**connections['default'].settings_dict, 'TEST': {'MIRROR': 'default'}}
+    connections['mirror'].creation.set_as_test_mirror(connections['default'].settings_dict)
+    yield 'mirror'
+    connections['mirror'].close()
+    del connections['mirror']
+    del connections.settings['mirror']
+
+
+@pytest.fixture
+def mirror(mirror_alias, settings):
+    settings.DATABASE_REPLICAS = [mirror_alias]
+    return connections[mirror_alias]
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'mirror'])
+def test_safe_requests_read_from_the_replica_until_a_write(mirror, client, organization):
+    Department.objects.create(organization=organization, name='Sales')
+    path = f'/api/organizations/{organization.id}/departments/'
+
+    with CaptureQueriesContext(mirror) as replica_queries:
+        response = client.get(path)
+    assert response.status_code == 200
+    assert [department['name'] for department in response.data] == ['Sales']
+    assert any('FROM "hr_department"' in query['sql'] for query in replica_queries.captured_queries)
+
+    response = client.post(path, {'name': 'Marketing'})
+    assert response.status_code == 201
+
+    with CaptureQueriesContext(mirror) as replica_queries:
+        response = client.get(path)
+    assert sorted(department['name'] for department in response.data) == ['Marketing', 'Sales']
+    assert replica_queries.captured_queries == []
+
+
+@pytest.mark.django_db(transaction=True, databases=['default', 'mirror'])
+def test_memberships_are_read_from_the_primary(mirror, client, organization):
+    path = f'/api/organizations/{organization.id}/departments/'
+
+    with CaptureQueriesContext(mirror) as replica_queries:
+        response = client.get(path)
+
+    assert response.status_code == 200
+    assert any('FROM "hr_department"' in query['sql'] for query in replica_queries.captured_queries)
+    assert not any('FROM "Org_Member"' in query['sql'] for query in replica_queries.captured_queries)
@@ -0,0 +1,72 @@
+from rest_framework.test import APIClient
+from rest_framework import status
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from api.checks import check_shared_cache
+from core.models import Permission
+from hr.models import Department
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+    def test_repeated_read_is_served_from_cache(self, client, organization, django_assert_max_num_queries):
+        Department.objects.create(organization=organization, name='Sales')
+        url = f'/api/organizations/{organization.id}/departments/'
+        client.get(url)
+
+        # Only the conditional GET validator query is left
+        with django_assert_max_num_queries(1):
+            response = client.get(url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [d['name'] for d in response.data] == ['Sales']
+
+    def test_write_invalidates_cached_read(self, client, organization, django_capture_on_commit_callbacks):
+        url = f'/api/organizations/{organization.id}/departments/'
+        assert client.get(url).data == []
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Department.objects.create(organization=organization, name='Sales')
+
+        response = client.get(url)
+
+        assert [d['name'] for d in response.data] == ['Sales']
+
+    def test_nothing_is_cached_without_a_shared_cache(self, client, organization, settings):
+        settings.SHARED_CACHE = False
+        Department.objects.create(organization=organization, name='Sales')
+        url = f'/api/organizations/{organization.id}/departments/'
+
+        with CaptureQueriesContext(connection) as first:
+            client.get(url)
+        with CaptureQueriesContext(connection) as second:
+            response = client.get(url)
+
+        # The response, and the tenant and permission facts, are read again
+        assert len(second) == len(first)
+        assert [d['name'] for d in response.data] == ['Sales']
+
+
+def test_shared_cache_must_be_shared():
+    locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache'}}
+
+    with override_settings(SHARED_CACHE=True, CACHES=locmem):
+        assert [error.id for error in check_shared_cache(None)] == ['api.E001']
+    with override_settings(SHARED_CACHE=False, CACHES=locmem):
+        assert check_shared_cache(None) == []
+    with override_settings(SHARED_CACHE=True, CACHES=redis):
+        assert check_shared_cache(None) == []
+
+
+@pytest.mark.django_db
+def test_permission_catalog_requires_authentication(client):
+    for name in (Permission.EDIT_ORGANIZATION_MEMBER, Permission.CREATE_MEMBER_INVITATION):
+        Permission.objects.get_or_create(name=name)
+    assert APIClient().get('/api/permissions/').status_code in (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN)
+
+    response = client.get('/api/permissions/')
+    assert response.status_code == status.HTTP_200_OK
+    ids = [permission['id'] for permission in response.data['results']]
+    assert len(ids) >= 2 and ids == sorted(ids)
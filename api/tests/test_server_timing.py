@@ -0,0 +1,59 @@
+import pytest
+from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient, APIRequestFactory
+from api.permission import OrganizationPermission
+from api.timing import request_timings, timed
+from core.serializers import SimpleUserSerializer
+from hr.models import Employee
+from hr.serializers import EmployeeProjection
+
+
+@pytest.fixture
+def user():
+    User = get_user_model()
+    return User.objects.create_user(username='timed', email='timed@test.com', password='testpass')
+
+
+@pytest.mark.django_db
+def test_server_timing_header(settings, user):
+    settings.SERVER_TIMING = True
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    response = client.get('/api/my-invitations/', HTTP_ORIGIN='http://localhost:3000')
+
+    names = [entry.split(';')[0] for entry in response['Server-Timing'].split(', ')]
+    assert names[-1] == 'total'
+    assert {'serialize', 'render', 'db'} <= set(names)
+    assert 'queries"' in response['Server-Timing']
+    assert response['Timing-Allow-Origin'] == 'http://localhost:3000'
+
+
+@pytest.mark.django_db
+def test_server_timing_is_off_by_default(settings, user):
+    settings.SERVER_TIMING = False
+    client = APIClient()
+    client.force_authenticate(user=user)
+
+    assert 'Server-Timing' not in client.get('/api/permissions/')
+
+
+@pytest.mark.django_db
+def test_permission_checks_are_timed(user):
+    request = APIRequestFactory().get('/')
+    request.user = user
+
+    with request_timings() as timings:
+        assert OrganizationPermission().has_permission(request, None)
+
+    assert 'permission' in timings.phases
+
+
+@pytest.mark.django_db
+def test_serialization_is_timed_once(user):
+    with request_timings() as timings:
+        with timed('serialize'):
+            assert SimpleUserSerializer(user).data
+        EmployeeProjection().to_representation(EmployeeProjection().project(Employee.objects.none()))
+
+    assert list(timings.phases) == ['serialize']
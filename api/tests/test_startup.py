@@ -0,0 +1,76 @@
+import pytest
+from api.management.commands.importtime import parse_importtime
+from api.cache import permission_catalog
+from api.warmup import warm_up
+from core.models import Permission
+from core import authentication
+
+
+def test_parse_importtime():
+    output = (
+        'import time: self [us] | cumulative | imported package\n'
+        'import time:       308 |      37055 |   email_validator\n'
+        'import time:       251 |      37305 | api.utils.validate_email\n'
+    )
+
+    assert parse_importtime(output) == [
+        ('email_validator', 308, 37055, 1),
+        ('api.utils.validate_email', 251, 37305, 0),
+    ]
+
+
+@pytest.mark.django_db
+def test_warm_up_keeps_going_after_a_failed_step(monkeypatch):
+    def unreachable():
+        raise OSError('network down')
+
+    monkeypatch.setitem(authentication.__dict__, 'get_jwks', unreachable)
+
+    durations = warm_up(['jwks', 'urls', 'drf', 'permissions'])
+
+    assert list(durations) == ['jwks', 'urls', 'drf', 'permissions']
+
+
+def test_warm_up_fetches_the_jwks_once_with_a_short_timeout(monkeypatch, settings):
+    settings.WARMUP_JWKS_TIMEOUT = 0.5
+    calls = []
+
+    def unreachable(url, timeout):
+        calls.append(timeout)
+        raise authentication.requests.Timeout
+
+    monkeypatch.setattr(authentication.requests, 'get', unreachable)
+    monkeypatch.setattr(authentication.time, 'sleep', lambda seconds: pytest.fail('retried'))
+
+    warm_up(['jwks'])
+
+    assert calls == [0.5]
+
+
+@pytest.mark.django_db
+def test_warm_up_loads_the_permission_catalog(django_assert_num_queries, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        permission, _ = Permission.objects.get_or_create(name=Permission.EDIT_ORGANIZATION_MEMBER)
+
+    warm_up(['permissions'])
+
+    with django_assert_num_queries(0):
+        assert permission_catalog()[permission.pk] == permission.name
+
+
+def test_public_keys_are_parsed_once(monkeypatch):
+    calls = []
+
+    class FakeJWK:
+        def __init__(self, jwk):
+            calls.append(jwk)
+            self.key = object()
+
+    monkeypatch.setattr(authentication.jwt, 'PyJWK', FakeJWK)
+    monkeypatch.setattr(authentication, '_public_keys', {})
+    jwk = {'kid': 'key-1', 'n': 'abc'}
+
+    assert authentication.get_public_key(jwk) is authentication.get_public_key(dict(jwk))
+    assert len(calls) == 1
+    authentication.get_public_key({'kid': 'key-1', 'n': 'rotated'})
+    assert len(calls) == 2
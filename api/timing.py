@@ -0,0 +1,97 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+# <========== Request phase timings ==========> #
+#
+# Code on the request path wraps its expensive phases in `timed()`:
+#
+#     with timed('auth.verify'):
+#         decoded_token = jwt.decode(...)
+#
+# and the durations are collected on the RequestTimings of the request being
+# handled (opened by the middleware with `request_timings()`). Outside of a
+# request `timed()` does nothing. A phase entered again inside itself
+# (e.g. a serializer reading another one's `.data`) is only counted once.
+
+_timings = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Seconds spent per phase while handling one request, in first-seen order.
+    """
+    def __init__(self):
+        self.phases = {}
+        self.running = set()
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def total(self, prefix):
+        """
+        Return the time spent in every phase named `prefix` or `prefix.*`.
+        """
+        return sum(
+            seconds for phase, seconds in self.phases.items()
+            if phase == prefix or phase.startswith(prefix + '.')
+        )
+
+
+def current_timings():
+    return _timings.get()
+
+
+@contextmanager
+def request_timings():
+    """
+    Collect the timings of the request handled inside the block. Nested
+    calls share the RequestTimings opened by the outermost one.
+    """
+    timings = _timings.get()
+    if timings is not None:
+        yield timings
+        return
+
+    timings = RequestTimings()
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+@contextmanager
+def timed(phase):
+    timings = _timings.get()
+    if timings is None or phase in timings.running:
+        yield
+        return
+
+    timings.running.add(phase)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.running.discard(phase)
+        timings.add(phase, time.perf_counter() - start)
+
+
+def time_serializers():
+    """
+    Time every serializer `.data` read (where DRF turns instances into
+    primitives) as the 'serialize' phase.
+    """
+    from rest_framework.serializers import BaseSerializer
+
+    data = BaseSerializer.data
+    if getattr(data.fget, 'timed', False):
+        return
+
+    def timed_data(self):
+        with timed('serialize'):
+            return data.fget(self)
+
+    timed_data.timed = True
+    BaseSerializer.data = property(timed_data)
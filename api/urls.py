@@ -1,8 +1,9 @@
 from django.urls import path, include
 from rest_framework_nested import routers
-from org.views import OrganizationViewSet , OrganizationMemberInvitationViewSet, OrganizationMemberViewSet, MyOrganizationViewSet
+from org.views import OrganizationViewSet , OrganizationMemberInvitationViewSet, OrganizationMemberViewSet, MyOrganizationViewSet, OrganizationRoleViewSet, MyInvitationViewSet
 from hr.views import DepartmentModelViewset, PositionModelViewset, EmployeeModelViewset, AttendanceModelViewset
-from . views import send_email
+from core.views import PermissionViewSet
+from . views import send_email, export_metrics, ProfileViewSet
 
 
 router = routers.DefaultRouter()
@@ -10,12 +11,21 @@ router.register(r'organizations', OrganizationViewSet, basename='organizations')
 
 router.register('my-organization', MyOrganizationViewSet, basename='my_organization')
 
+router.register('my-invitations', MyInvitationViewSet, basename='my_invitations')
+
+router.register('permissions', PermissionViewSet, basename='permissions')
+
+router.register('profiles', ProfileViewSet, basename='profiles')
+
 member_router = routers.NestedDefaultRouter(router, r'organizations', lookup='organization')
 member_router.register(r'members', OrganizationMemberViewSet, basename='member')
 
 invitation_router = routers.NestedDefaultRouter(router, r'organizations', lookup='organization')
 invitation_router.register(r'invitations', OrganizationMemberInvitationViewSet, basename='invitation')
 
+role_router = routers.NestedDefaultRouter(router, r'organizations', lookup='organization')
+role_router.register(r'roles', OrganizationRoleViewSet, basename='role')
+
 
 department_router = routers.NestedDefaultRouter(router, r'organizations', lookup='organization')
 department_router.register(r'departments', DepartmentModelViewset, basename='department')
@@ -37,7 +47,9 @@ urlpatterns = [
      path(r'', include(router.urls)),
      path(r'', include(member_router.urls)),
      path(r'', include(invitation_router.urls)),
+     path(r'', include(role_router.urls)),
      path('send-email/', send_email, name='send-email'),
+     path('metrics/', export_metrics, name='metrics'),
      path(r'', include(department_router.urls)),
      path(r'', include(position_router.urls)),
      path(r'', include(employee_router.urls)),
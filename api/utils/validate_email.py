@@ -1,19 +1,40 @@
-from email_validator import validate_email as email_validator, EmailNotValidError
+from asgiref.sync import async_to_sync
 from rest_framework import serializers
 from django.utils.translation import gettext_lazy as _
+from api import aio
 from org.models import Organization, OrganizationMemberInvitation
 
+DISPOSABLE_DOMAINS = {
+    'tempmail.com', 'throwawaymail.com', 'mailinator.com',
+    'guerrillamail.com', 'sharklasers.com', 'yopmail.com',
+    'temp-mail.org', '10minutemail.com', 'trashmail.com',
+}
+
+
+async def anormalize_email(value):
+    """
+    Async counterpart of `email_validator(value, check_deliverability=True)`:
+    the syntax is checked locally and deliverability over async DNS.
+    Returns the normalized address.
+    """
+    from email_validator import validate_email as email_validator, EmailUndeliverableError
+    validation = email_validator(value, check_deliverability=False)
+    if not await aio.accepts_email(validation.ascii_domain):
+        raise EmailUndeliverableError(f'The domain name {validation.ascii_domain} does not accept email.')
+    return validation.normalized
+
 def validate_email(value, instance=None):
     """
     Validates organization email format and business rules.
     """
+    # Imported on first use: email_validator builds large tables at import
+    from email_validator import EmailNotValidError
     try:
-        # Normalize and validate email (includes DNS check)
-        validation = email_validator(value, check_deliverability=True)
-        normalized_email = validation.normalized
+        # Normalize and check deliverability over async DNS
+        normalized_email = async_to_sync(anormalize_email)(value)
         
         # Check for uniqueness
-        query = Organization.objects.filter(email__iexact=normalized_email)
+        query = Organization.objects.iexact('email', normalized_email)
         if instance:
             query = query.exclude(id=instance.id)
         if query.exists():
@@ -21,13 +42,7 @@ def validate_email(value, instance=None):
         
         # Check for disposable email domains
         domain = normalized_email.split('@')[1]
-        disposable_domains = {
-            'tempmail.com', 'throwawaymail.com', 'mailinator.com', 
-            'guerrillamail.com', 'sharklasers.com', 'yopmail.com',
-            'temp-mail.org', '10minutemail.com', 'trashmail.com',
-        }
-        
-        if domain.lower() in disposable_domains:
+        if domain.lower() in DISPOSABLE_DOMAINS:
             raise serializers.ValidationError(
                 _('Please use a permanent email address. Disposable email addresses are not allowed.')
             )
@@ -44,14 +59,13 @@ def validate_email_invitation(value, organization_id, instance=None):
     Ensures the same organization cannot send multiple invitations to the same email
     if the first invitation is pending or accepted.
     """
+    from email_validator import EmailNotValidError
     try:
-        # Normalize and validate email (includes DNS check)
-        validation = email_validator(value, check_deliverability=True)
-        normalized_email = validation.normalized
+        # Normalize and check deliverability over async DNS
+        normalized_email = async_to_sync(anormalize_email)(value)
         
         # Check for existing invitation with same email for the same organization
-        query = OrganizationMemberInvitation.objects.filter(
-            email__iexact=normalized_email,
+        query = OrganizationMemberInvitation.objects.for_email(normalized_email).filter(
             organization_id=organization_id,
             status__in=[OrganizationMemberInvitation.PENDING, OrganizationMemberInvitation.ACCEPTED]
         )
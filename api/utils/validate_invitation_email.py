@@ -1,5 +1,7 @@
+import asyncio
+from asgiref.sync import async_to_sync
 from rest_framework import serializers
-from email_validator import validate_email as email_validator, EmailNotValidError
+from api.utils.validate_email import anormalize_email
 from org.models import OrganizationMemberInvitation
 from django.utils.translation import gettext_lazy as _
 
@@ -10,14 +12,14 @@ def validate_email_invitation(value, organization_id, instance=None):
     Ensures the same company cannot send multiple invitations to the same email
     if the first invitation is pending or accepted.
     """
+    # Imported on first use: email_validator builds large tables at import
+    from email_validator import EmailNotValidError
     try:
-        # Normalize and validate email (includes DNS check)
-        validation = email_validator(value, check_deliverability=True)
-        normalized_email = validation.normalized
+        # Normalize and check deliverability over async DNS
+        normalized_email = async_to_sync(anormalize_email)(value)
         
         # Check for existing invitation with same email for the same company
-        query = OrganizationMemberInvitation.objects.filter(
-            email__iexact=normalized_email,
+        query = OrganizationMemberInvitation.objects.for_email(normalized_email).filter(
             organization_id=organization_id,
             status__in=[OrganizationMemberInvitation.PENDING, OrganizationMemberInvitation.ACCEPTED]
         )
@@ -32,3 +34,22 @@ def validate_email_invitation(value, organization_id, instance=None):
         
     except EmailNotValidError as e:
         raise serializers.ValidationError(str(e))
+
+
+async def anormalize_emails(values, concurrency=20):
+    """
+    Normalize and check the deliverability of many addresses at once, at
+    most `concurrency` DNS lookups in flight. Returns, in order, a
+    (normalized address, None) or (None, error message) pair per value.
+    """
+    from email_validator import EmailNotValidError
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def check(value):
+        async with semaphore:
+            try:
+                return await anormalize_email(value), None
+            except EmailNotValidError as e:
+                return None, str(e)
+
+    return await asyncio.gather(*(check(value) for value in values))
@@ -29,7 +29,7 @@ def validate_organization_name(value, instance=None):
     value = value.strip()
     
     # Check for existing company with same name
-    query = Organization.objects.filter(name__iexact=value)
+    query = Organization.objects.iexact('name', value)
     if instance:
         query = query.exclude(id=instance.id)
     if query.exists():
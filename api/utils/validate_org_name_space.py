@@ -30,7 +30,7 @@ def validate_organization_name_space(value, instance=None):
     value = value.lower().strip()
     
     # Check for existing organization with same name space
-    query = Organization.objects.filter(name_space__iexact=value)
+    query = Organization.objects.iexact('name_space', value)
     if instance:
         query = query.exclude(id=instance.id)
     if query.exists():
@@ -35,7 +35,7 @@ def validate_tax_id(value, instance=None):
     
     # Check for uniqueness if tax ID is being validated
     if normalized_value:
-        query = Organization.objects.filter(tax_id__iexact=normalized_value)
+        query = Organization.objects.iexact('tax_id', normalized_value)
         if instance:
             query = query.exclude(id=instance.id)
         if query.exists():
@@ -1,32 +1,71 @@
+import hmac
+from rest_framework import viewsets
+from rest_framework.exceptions import NotFound
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from django.conf import settings
-from django.http import JsonResponse
-from django.core.mail import EmailMessage, get_connection, BadHeaderError
+from django.http import HttpResponse, JsonResponse
+from django.core.mail import EmailMessage, BadHeaderError
 from templated_mail.mail import BaseEmailMessage
+from api import aio, metrics, profiling
 
-def send_email(request):
+async def send_email(request):
 
     subject = "Hello from Django SMTP"
     recipient_list = ["delivered@resend.dev"]
     from_email = "onboarding@resend.dev"
     message = "<strong>it works!</strong>"
 
-    with get_connection(
-        host=settings.RESEND_SMTP_HOST,
-        port=settings.RESEND_SMTP_PORT,
-        username=settings.RESEND_SMTP_USERNAME,
-        password=settings.RESEND_API_KEY,
-        use_tls=True,
-        ) as connection:
-            try:
-                message = EmailMessage(
-                    subject=subject,
-                    body=message,
-                    to=recipient_list,
-                    from_email=from_email,
-                    connection=connection)
-                # message.attach_file(file_path)
-                message.send()
-            except BadHeaderError:
-                return JsonResponse({"status": "error", "message": "Invalid header found."})
-    return JsonResponse({"status": "ok"})
\ No newline at end of file
+    try:
+        message = EmailMessage(
+            subject=subject,
+            body=message,
+            to=recipient_list,
+            from_email=from_email)
+        # message.attach_file(file_path)
+        await aio.send_message(
+            message,
+            host=settings.RESEND_SMTP_HOST,
+            port=settings.RESEND_SMTP_PORT,
+            username=settings.RESEND_SMTP_USERNAME,
+            password=settings.RESEND_API_KEY,
+        )
+    except BadHeaderError:
+        return JsonResponse({"status": "error", "message": "Invalid header found."})
+    return JsonResponse({"status": "ok"})
+
+
+def export_metrics(request):
+    """
+    Prometheus scrape endpoint, protected by settings.METRICS_TOKEN.
+    """
+    token = settings.METRICS_TOKEN
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not token or not hmac.compare_digest(supplied.encode(), token.encode()):
+        return HttpResponse(status=403)
+
+    body, content_type = metrics.export()
+    return HttpResponse(body, content_type=content_type)
+
+
+class ProfileViewSet(viewsets.ViewSet):
+    """
+    Request profiles captured by ProfilingMiddleware. A profile is downloaded
+    as folded stacks, ready for flamegraph.pl or speedscope; `?format=json`
+    returns it with its metadata and allocation diff instead.
+    """
+    permission_classes = [IsAdminUser]
+
+    def list(self, request):
+        return Response(profiling.recent_profiles())
+
+    def retrieve(self, request, pk=None):
+        profile = profiling.get_profile(pk)
+        if profile is None:
+            raise NotFound('Profile not found or expired.')
+        if request.query_params.get('format') == 'json':
+            return Response(profile)
+
+        response = HttpResponse(profile['folded'], content_type='text/plain; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename="profile-{pk}.folded"'
+        return response
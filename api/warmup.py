@@ -0,0 +1,70 @@
+import logging
+import time
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+# <========== Warm-up ==========> #
+#
+# Run by svcs/wsgi.py once the application is loaded, so the work the first
+# request of a fresh (serverless) instance would otherwise do lazily happens
+# during init. Every step is optional: a failure is logged and the instance
+# starts anyway.
+
+def resolve_urls():
+    # Imports every view, serializer and viewset module and builds the
+    # reverse lookup tables
+    resolver = get_resolver()
+    resolver.url_patterns
+    resolver.reverse_dict
+
+
+def load_drf_settings():
+    # DRF imports the classes named in its settings on first access
+    from rest_framework.settings import api_settings
+    for name in api_settings.import_strings:
+        getattr(api_settings, name)
+
+
+def load_permissions():
+    # Read by the permission checks of member updates
+    from api.cache import permission_catalog
+    permission_catalog()
+
+
+def load_jwks():
+    # Runs at import: a slow or unreachable Clerk must not hold the worker
+    # back for the full retry budget of a request
+    from core.authentication import get_jwks, get_public_key
+    for key in get_jwks(timeout=settings.WARMUP_JWKS_TIMEOUT, max_retries=1).get('keys', []):
+        get_public_key(key)
+
+
+STEPS = {
+    'urls': resolve_urls,
+    'drf': load_drf_settings,
+    'permissions': load_permissions,
+    'jwks': load_jwks,
+}
+
+
+def warm_up(steps=None):
+    """
+    Run the warm-up steps named in settings.WARMUP_STEPS (all by default)
+    and return the seconds each one took.
+    """
+    durations = {}
+    for name in settings.WARMUP_STEPS if steps is None else steps:
+        start = time.perf_counter()
+        try:
+            STEPS[name]()
+        except Exception:
+            logger.warning('Warm-up step %s failed', name, exc_info=True)
+        durations[name] = time.perf_counter() - start
+    logger.info('Warm-up: %s', ', '.join(f'{name} {seconds * 1000:.1f} ms' for name, seconds in durations.items()))
+    # Never hand a connection opened here to forked workers (gunicorn --preload)
+    connections.close_all()
+    return durations
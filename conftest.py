@@ -0,0 +1,54 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from org.models import Organization, OrganizationMember
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # The cache outlives a test's database: versions, cached responses and
+    # primary pins would leak into the next one
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def owner():
+    return get_user_model().objects.create_user(username='owner', email='owner@test.com', password='testpass')
+
+
+@pytest.fixture
+def organization(owner):
+    """
+    A team organization with its owner as an active admin member.
+    """
+    organization = Organization.objects.create(
+        user=owner, name='Test Org', name_space='test-org', email='org@test.com',
+        phone='+12025550123', organization_type=Organization.TEAM,
+    )
+    OrganizationMember.objects.create(
+        organization=organization, user=owner, status=OrganizationMember.ACTIVE, is_owner=True, is_admin=True,
+    )
+    return organization
+
+
+@pytest.fixture
+def client(owner):
+    """
+    An API client authenticated as the owner.
+    """
+    client = APIClient()
+    client.force_authenticate(user=owner)
+    return client
+
+
+@pytest.fixture
+def staff_client():
+    user = get_user_model().objects.create_user(
+        username='staff', email='staff@test.com', password='testpass', is_staff=True,
+    )
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
@@ -1,9 +1,13 @@
+import asyncio
 import jwt
 import requests
+from contextlib import contextmanager
 from django.core.cache import cache
 from django.conf import settings
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
+from api import aio
+from api.timing import timed
 from .models import User
 import time
 from django.db import transaction
@@ -13,56 +17,102 @@ CLERK_JWKS_TTL = 3600
 
 logger = logging.getLogger(__name__)
 
+# Parsed public keys by kid, so the RSA key is not rebuilt on every request
+_public_keys = {}
+
+
+def get_jwks(timeout=5, max_retries=3):
+    """
+    Return Clerk's JWKS, from the cache or fetched from Clerk with up to
+    `max_retries` attempts of `timeout` seconds each.
+    """
+    # Try fetching JWKS from cache
+    jwks = cache.get(settings.CLERK_JWKS_CACHE_KEY)
+    if not jwks:
+        # Fetch JWKS from Clerk
+        retry_count = 0
+        while retry_count < max_retries:
+            try:
+                response = requests.get(settings.CLERK_JWKS_URL, timeout=timeout)
+                response.raise_for_status()
+                break
+            except requests.RequestException:
+                retry_count += 1
+                if retry_count == max_retries:
+                    raise
+                time.sleep(0.5)  # Short delay before retry
+        jwks = response.json()
+        cache.set(settings.CLERK_JWKS_CACHE_KEY, jwks, CLERK_JWKS_TTL)  # Cache it
+    return jwks
+
+
+async def aget_jwks():
+    """
+    Non-blocking get_jwks().
+    """
+    jwks = await cache.aget(settings.CLERK_JWKS_CACHE_KEY)
+    if not jwks:
+        retry_count = 0
+        max_retries = 3
+        while True:
+            try:
+                jwks = await aio.get_json(settings.CLERK_JWKS_URL, timeout=5)
+                break
+            except aio.http_errors():
+                retry_count += 1
+                if retry_count == max_retries:
+                    raise
+                await asyncio.sleep(0.5)  # Short delay before retry
+        await cache.aset(settings.CLERK_JWKS_CACHE_KEY, jwks, CLERK_JWKS_TTL)
+    return jwks
+
+
+def get_public_key(jwk):
+    kid = jwk.get("kid")
+    cached = _public_keys.get(kid)
+    if cached is None or cached[0] != jwk:
+        cached = _public_keys[kid] = (jwk, jwt.PyJWK(jwk).key)
+    return cached[1]
+
+
 class ClerkAuthentication(BaseAuthentication):
-    def authenticate(self, request):
+    """
+    Authenticate Clerk session tokens. `aauthenticate()` is the non-blocking
+    variant run by AsyncViewMixin under ASGI; `authenticate()` then returns
+    the result it left in `request.async_authentication`.
+    """
+    def get_token(self, request):
         auth_header = request.headers.get("Authorization")
         if not auth_header or not auth_header.startswith("Bearer "):
             return None
+        return auth_header.split(" ")[1]
 
-        token = auth_header.split(" ")[1]
+    def get_kid(self, token):
+        # Get token header to find the 'kid'
+        unverified_header = jwt.get_unverified_header(token)
+        kid = unverified_header.get("kid")
+        if not kid:
+            raise AuthenticationFailed("Missing 'kid' in token header")
+        return kid
 
-        try:
-            # Get token header to find the 'kid'
-            unverified_header = jwt.get_unverified_header(token)
-            kid = unverified_header.get("kid")
-            if not kid:
-                raise AuthenticationFailed("Missing 'kid' in token header")
-
-            # Try fetching JWKS from cache
-            jwks = cache.get(settings.CLERK_JWKS_CACHE_KEY)
-            if not jwks:
-                # Fetch JWKS from Clerk
-                retry_count = 0
-                max_retries = 3
-                while retry_count < max_retries:
-                    try:
-                        response = requests.get(settings.CLERK_JWKS_URL, timeout=5)
-                        response.raise_for_status()
-                        break
-                    except requests.RequestException:
-                        retry_count += 1
-                        if retry_count == max_retries:
-                            raise
-                        time.sleep(0.5)  # Short delay before retry
-                jwks = response.json()
-                cache.set(settings.CLERK_JWKS_CACHE_KEY, jwks, CLERK_JWKS_TTL)  # Cache it
-
-            # Validate JWKS response
-            if "keys" not in jwks:
-                raise AuthenticationFailed("Invalid JWKS format")
-
-            # Find the matching key
-            public_key = None
-            for key in jwks["keys"]:
-                if key.get("kid") == kid:
-                    public_key = jwt.PyJWK(key).key
-                    break
-            
-            if not public_key:
-                raise AuthenticationFailed("No matching key found in JWKS")
+    def decode(self, token, kid, jwks):
+        # Validate JWKS response
+        if "keys" not in jwks:
+            raise AuthenticationFailed("Invalid JWKS format")
+
+        # Find the matching key
+        public_key = None
+        for key in jwks["keys"]:
+            if key.get("kid") == kid:
+                public_key = get_public_key(key)
+                break
+
+        if not public_key:
+            raise AuthenticationFailed("No matching key found in JWKS")
 
+        with timed('auth.verify'):
             # Decode and verify token
-            decoded_token = jwt.decode(
+            return jwt.decode(
                 token,
                 public_key,
                 algorithms=["RS256"],
@@ -72,32 +122,71 @@ class ClerkAuthentication(BaseAuthentication):
                 leeway=30  # 30 seconds leeway for clock skew
             )
 
-            # Extract user details
-            user_id = decoded_token.get("sub")  
-            email = decoded_token.get("email")
-            username = decoded_token.get("username") or email 
-            first_name = decoded_token.get("first_name", "")
-            last_name = decoded_token.get("last_name", "")
-            image_url = decoded_token.get("image_url", "")
+    def get_user_fields(self, decoded_token):
+        # Extract user details
+        user_id = decoded_token.get("sub")
+        email = decoded_token.get("email")
+        username = decoded_token.get("username") or email
+        first_name = decoded_token.get("first_name", "")
+        last_name = decoded_token.get("last_name", "")
+        image_url = decoded_token.get("image_url", "")
 
-            if not user_id or not email:
-                raise AuthenticationFailed("Invalid token: Missing user ID or email")
-
-            # Create or update the user
-            with transaction.atomic():
-                user, _ = User.objects.get_or_create(
-                   id=user_id,
-                    defaults={"email": email, "first_name": first_name, "last_name": last_name, 'username':username, 'image_url':image_url},
-                )
-
-            return user, None
+        if not user_id or not email:
+            raise AuthenticationFailed("Invalid token: Missing user ID or email")
+        return user_id, {"email": email, "first_name": first_name, "last_name": last_name, 'username': username, 'image_url': image_url}
 
+    @contextmanager
+    def failures(self, request):
+        """
+        Turn token, JWKS and JWK errors into AuthenticationFailed.
+        """
+        try:
+            yield
         except jwt.ExpiredSignatureError:
             logger.warning(f"Token expired for request to {request.path}")
             raise AuthenticationFailed("Token expired")
         except jwt.InvalidTokenError:
             raise AuthenticationFailed("Invalid token")
-        except requests.RequestException:
+        except aio.http_errors():
             raise AuthenticationFailed("Unable to fetch JWKS")
         except ValueError as e:
-            raise AuthenticationFailed(f"Invalid JWK format ({str(e)})")
\ No newline at end of file
+            raise AuthenticationFailed(f"Invalid JWK format ({str(e)})")
+
+    def authenticate(self, request):
+        authenticated = getattr(request, 'async_authentication', {}).get(type(self))
+        if authenticated is not None:
+            if isinstance(authenticated, AuthenticationFailed):
+                raise authenticated
+            return authenticated
+
+        token = self.get_token(request)
+        if token is None:
+            return None
+
+        with self.failures(request):
+            kid = self.get_kid(token)
+            with timed('auth.jwks'):
+                jwks = get_jwks()
+            user_id, defaults = self.get_user_fields(self.decode(token, kid, jwks))
+
+            # Create or update the user
+            with timed('auth.user'), transaction.atomic():
+                user, _ = User.objects.get_or_create(id=user_id, defaults=defaults)
+
+            return user, None
+
+    async def aauthenticate(self, request):
+        token = self.get_token(request)
+        if token is None:
+            return None
+
+        with self.failures(request):
+            kid = self.get_kid(token)
+            with timed('auth.jwks'):
+                jwks = await aget_jwks()
+            user_id, defaults = self.get_user_fields(self.decode(token, kid, jwks))
+
+            with timed('auth.user'):
+                user, _ = await User.objects.aget_or_create(id=user_id, defaults=defaults)
+
+            return user, None
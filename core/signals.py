@@ -0,0 +1,9 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from api.cache import PERMISSION_CATALOG_SCOPE, bump_data_version
+from core.models import Permission
+
+
+@receiver([post_save, post_delete], sender=Permission)
+def permission_catalog_changed(sender, instance, **kwargs):
+    bump_data_version(PERMISSION_CATALOG_SCOPE)
@@ -1,11 +1,13 @@
 
-from rest_framework import viewsets, status
+from rest_framework import decorators, viewsets, status
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view
 from rest_framework.permissions import IsAuthenticated
-from django.contrib.auth.models import Permission
 from api.pagination import CustomPagination
+from api.mixins import CachedResponseMixin
+from core.models import Permission
 from core.serializers import PermissionSerializer
+from api.cache import PERMISSION_CATALOG_SCOPE
 import pytz
 
 
@@ -14,13 +16,21 @@ def health_check(request):
 
 
     
-class PermissionViewSet(viewsets.ReadOnlyModelViewSet):
+class PermissionViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    permission_classes = [IsAuthenticated]
     pagination_class = CustomPagination
-    queryset = Permission.objects.all()
+    queryset = Permission.objects.order_by('id')
     serializer_class = PermissionSerializer
 
+    def get_cache_scope(self):
+        return PERMISSION_CATALOG_SCOPE
+
+    def get_cache_fingerprint(self, version):
+        # The catalog is the same for every caller
+        return ''
+
     @api_view(['PUT'])
-    @permission_classes([IsAuthenticated])
+    @decorators.permission_classes([IsAuthenticated])
     def update_user_timezone(request):
         """
         Update the authenticated user's timezone preference
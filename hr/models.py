@@ -4,6 +4,7 @@ from django.utils.translation import gettext_lazy as _
 from phonenumber_field.modelfields import PhoneNumberField
 from core.models import User
 from org.models import Organization
+from api.querycache import CachingManager
 import random
 
 def generate_unique_employee_id():
@@ -21,7 +22,9 @@ class Department(models.Model):
     description = models.TextField(blank=True, null=True)
     manager = models.ForeignKey('Employee', on_delete=models.SET_NULL, null=True, blank=True, related_name='managed_department')
     image_url = models.URLField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CachingManager()
 
     class Meta:
         indexes = [
@@ -42,6 +45,9 @@ class Position(models.Model):
     description = models.TextField(blank=True, null=True)
     salary_range_min = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     salary_range_max = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CachingManager()
 
     class Meta:
         indexes = [
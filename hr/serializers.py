@@ -7,8 +7,10 @@ from phonenumber_field.modelfields import PhoneNumberField
 from api.utils.tz import convert_datetime_to_timezone
 from hr.models import Department, Employee, Position, EmploymentDetails, Attendance
 from django.db import transaction
+from django.db.models import CharField, Value
+from django.db.models.functions import Concat
 from org.models import OrganizationPreferences
-from django.core.cache import cache
+from api.projection import ProjectionSerializer, Expression, LocalDateTime
 
 class SimpleEmployeeSerializer(serializers.ModelSerializer):
     """Simplified serializer for Employee model, used for nested representations."""
@@ -86,10 +88,12 @@ class CreatePositionSerializer(serializers.ModelSerializer):
     def validate_department_id(self, value):
         organization_id = self.context.get('organization_id')
 
-        if not Department.objects.filter(id=value).exists():
+        try:
+            department = Department.objects.cached().get(id=value)
+        except Department.DoesNotExist:
             raise serializers.ValidationError(_("Department does not exist."))
         
-        if organization_id and not Department.objects.filter(id=value, organization_id=organization_id).exists():
+        if organization_id and str(department.organization_id) != str(organization_id):
             raise serializers.ValidationError(_("Department does not belong to this organization."))
         
         return value
@@ -115,12 +119,14 @@ class UpdatePositionSerializer(serializers.ModelSerializer):
         
         
     def validate_department_id(self, value):
-        if not Department.objects.filter(id=value).exists():
+        try:
+            department = Department.objects.cached().get(id=value)
+        except Department.DoesNotExist:
             raise serializers.ValidationError(_("Department does not exist."))
         
         # Ensure department belongs to the current company
         organization_id = self.context.get('organization_id')
-        if organization_id and not Department.objects.filter(id=value, organization_id=organization_id).exists():
+        if organization_id and str(department.organization_id) != str(organization_id):
             raise serializers.ValidationError(_("Department does not belong to this organization."))
 
         return value
@@ -183,6 +189,18 @@ class EmployeeSerializer(serializers.ModelSerializer):
         return representation
 
 
+class EmployeeProjection(ProjectionSerializer):
+    """
+    Read-only projection of EmployeeSerializer for list pages.
+    """
+    created_at = LocalDateTime()
+    updated_at = LocalDateTime()
+
+    class Meta:
+        model = Employee
+        fields = EmployeeSerializer.Meta.fields
+
+
 class EmploymentDetailsSerializer(serializers.ModelSerializer):
     """
     Serializer for the EmploymentDetails model with employment-related information.
@@ -266,7 +284,7 @@ class CreateEmployeeSerializer(serializers.ModelSerializer):
     def validate_position_id(self, value):
         organization_id = self.context['organization_id']
         # Check if the position belongs to a department in the current company
-        if not Position.objects.select_related('department').filter(
+        if not Position.objects.cached().filter(
             id=value,
             department__organization_id=organization_id
         ).exists():
@@ -339,7 +357,7 @@ class CreateEmployeeSerializer(serializers.ModelSerializer):
         if 'position_id' in employment_details_data:
             position_id = employment_details_data.pop('position_id')
             try:
-                position = Position.objects.get(id=position_id)
+                position = Position.objects.cached().get(id=position_id)
                 employment_details_data['position'] = position
             except Position.DoesNotExist:
                 raise serializers.ValidationError(_("Position does not exist."))
@@ -402,7 +420,7 @@ class UpdateEmploymentDetailsSerializer(serializers.ModelSerializer):
     def validate_position_id(self, value):
         organization_id = self.context['organization_id']
         # Check if the position belongs to a department in the current company
-        if not Position.objects.filter(
+        if not Position.objects.cached().filter(
             id=value,
             department__organization_id=organization_id
         ).exists():
@@ -461,6 +479,19 @@ class AttendanceSerializer(serializers.ModelSerializer):
         return f"{obj.employee.first_name} {obj.employee.last_name}"
 
 
+class AttendanceProjection(ProjectionSerializer):
+    """
+    Read-only projection of AttendanceSerializer for list pages.
+    """
+    employee_name = Expression(
+        Concat('employee__first_name', Value(' '), 'employee__last_name', output_field=CharField())
+    )
+
+    class Meta:
+        model = Attendance
+        fields = AttendanceSerializer.Meta.fields
+
+
 class CheckInOutSerializer(serializers.Serializer):
     """
     Serializer for handling employee check-in and check-out operations.
@@ -484,24 +515,16 @@ class CheckInOutSerializer(serializers.Serializer):
     def _get_organization_timezone(self, organization_id):
         """
         Helper method to get the organization's timezone.
-        Uses caching to reduce database queries.
+        Uses the query cache, which is invalidated whenever preferences change.
         """
-        cache_key = f"org_timezone_{organization_id}"
-        cached_timezone = cache.get(cache_key)
-        
-        if cached_timezone:
-            return cached_timezone
-        
+        tenant = self.context.get('tenant')
+        if tenant is not None and tenant.is_for(organization_id):
+            return tenant.timezone
         try:
-            org_preferences = OrganizationPreferences.objects.select_related('organization').get(
+            org_preferences = OrganizationPreferences.objects.cached().get(
                 organization_id=organization_id
             )
-            organization_timezone = org_preferences.timezone
-            
-            # Cache the timezone for 1 hour (3600 seconds)
-            cache.set(cache_key, organization_timezone, 3600)
-            
-            return organization_timezone
+            return org_preferences.timezone
         except OrganizationPreferences.DoesNotExist:
             # Default to UTC if preferences not found
             return pytz.UTC
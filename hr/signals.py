@@ -0,0 +1,76 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
+from api.cache import bump_organization_version
+from hr.models import Department, Position, Employee, EmploymentDetails, Attendance, Payroll
+from org.models import Organization
+from org.signals import track_usage
+
+
+def parent_organization(parent_field):
+    """
+    Return a function mapping a row, and the origin of its deletion (None on
+    save), to the organization of its `parent_field` foreign key.
+
+    A cascade sends post_delete once per child row before deleting the
+    parents, so the organization comes from the origin of the deletion (the
+    parent or organization deleted, or a queryset of parents, loaded once),
+    not from one query per row.
+    """
+    def get_organization_id(instance, origin=None):
+        field = instance._meta.get_field(parent_field)
+        if field.is_cached(instance):
+            return getattr(instance, parent_field).organization_id
+        parent_model, parent_id = field.related_model, getattr(instance, field.attname)
+
+        if isinstance(origin, Organization):
+            return origin.pk
+        if isinstance(origin, parent_model) and origin.pk == parent_id:
+            return origin.organization_id
+        if isinstance(origin, QuerySet) and origin.model is parent_model:
+            # Every row of the deletion maps through the same parents: one query
+            organizations = getattr(origin, '_parent_organizations', None)
+            if organizations is None:
+                organizations = origin._parent_organizations = dict(
+                    parent_model._base_manager.using(origin.db).filter(
+                        pk__in=origin.values('pk'),
+                    ).values_list('pk', 'organization_id')
+                )
+            if parent_id in organizations:
+                return organizations[parent_id]
+
+        return parent_model._base_manager.filter(pk=parent_id).values_list('organization_id', flat=True).first()
+
+    return get_organization_id
+
+
+position_organization = parent_organization('department')
+employee_data_organization = parent_organization('employee')
+
+
+def organization_data_changed(sender, instance, **kwargs):
+    bump_organization_version(instance.organization_id)
+
+
+def position_changed(sender, instance, origin=None, **kwargs):
+    bump_organization_version(position_organization(instance, origin))
+
+
+def employee_data_changed(sender, instance, origin=None, **kwargs):
+    bump_organization_version(employee_data_organization(instance, origin))
+
+
+for model, handler in (
+    (Department, organization_data_changed),
+    (Employee, organization_data_changed),
+    (Attendance, organization_data_changed),
+    (Position, position_changed),
+    (EmploymentDetails, employee_data_changed),
+    (Payroll, employee_data_changed),
+):
+    post_save.connect(handler, sender=model, dispatch_uid=f'org_version_save_{model.__name__}')
+    post_delete.connect(handler, sender=model, dispatch_uid=f'org_version_delete_{model.__name__}')
+
+
+track_usage(Employee, 'employees', lambda employee, origin: employee.organization_id)
+track_usage(Department, 'departments', lambda department, origin: department.organization_id)
+track_usage(Position, 'positions', position_organization)
@@ -0,0 +1,71 @@
+import datetime
+import pytest
+import pytz
+from rest_framework.test import APIClient
+from api.cache import is_active_organization, is_organization_member
+from hr.models import Attendance, Employee
+from hr.serializers import (
+    AttendanceProjection, AttendanceSerializer, EmployeeProjection, EmployeeSerializer
+)
+
+
+def project(projection_class, queryset, context):
+    projection = projection_class(context=context)
+    return projection.to_representation(projection.project(queryset))
+
+
+@pytest.fixture
+def employees(organization):
+    return [
+        Employee.objects.create(
+            organization=organization,
+            first_name=first_name,
+            last_name='Walker',
+            date_of_birth=datetime.date(1990, 5, 17),
+            gender='F',
+            phone_number=phone_number,
+            address='1 Main St',
+        )
+        for first_name, phone_number in [('Alice', '+12025550111'), ('Bella', '+12025550112')]
+    ]
+
+
+@pytest.mark.django_db
+class TestProjections:
+    def test_employee_projection_matches_serializer(self, organization, employees):
+        queryset = Employee.objects.filter(organization=organization).order_by('id')
+        context = {'timezone': pytz.timezone('America/New_York')}
+
+        expected = EmployeeSerializer(queryset, many=True, context=context).data
+
+        assert project(EmployeeProjection, queryset, context) == expected
+
+    def test_attendance_projection_matches_serializer(self, organization, employees):
+        for employee in employees:
+            Attendance.objects.create(
+                organization=organization,
+                employee=employee,
+                date=datetime.date(2025, 3, 1),
+                time_in=datetime.time(9, 0),
+                time_out=datetime.time(17, 30) if employee.first_name == 'Alice' else None,
+                status='present',
+            )
+        queryset = Attendance.objects.filter(organization=organization).order_by('id')
+
+        expected = AttendanceSerializer(queryset, many=True).data
+
+        assert project(AttendanceProjection, queryset, {}) == expected
+
+    def test_list_endpoint_uses_single_query(self, organization, employees, django_assert_num_queries):
+        client = APIClient()
+        client.force_authenticate(user=organization.user)
+        # Cached until the organization (or its memberships) change
+        is_active_organization(organization.id)
+        is_organization_member(organization.id, organization.user_id)
+
+        # Validator aggregate + page
+        with django_assert_num_queries(2):
+            response = client.get(f'/api/organizations/{organization.id}/employees/')
+
+        assert len(response.data) == 2
+        assert response.data[0]['phone_number'].startswith('+1202555011')
@@ -3,26 +3,30 @@ from hr.serializers import(
      DepartmentSerializer, CreateDepartmentSerializer, Department,  UpdateDepartmentSerializer, CreatePositionSerializer, UpdatePositionSerializer, PositionSerializer, Position, CreateEmployeeSerializer, UpdateEmployeeSerializer, EmployeeSerializer, Employee
 
 )
-from api.mixins import TimezoneMixin
+from api.mixins import AsyncViewMixin, OrganizationScopeMixin, TimezoneMixin, ConditionalGetMixin, CachedResponseMixin, ProjectionMixin, ReplicaReadMixin
 from core.models import Permission
 from django.utils.translation import gettext as _
 from rest_framework.exceptions import PermissionDenied
-from hr.serializers import CheckInOutSerializer, Attendance, AttendanceSerializer
+from hr.serializers import CheckInOutSerializer, Attendance, AttendanceSerializer, AttendanceProjection, EmployeeProjection
 from rest_framework.response import Response
 from rest_framework import status
 from hr.models import EmploymentDetails
 from datetime import datetime, date, timedelta
-from org.models import OrganizationPreferences
-import pytz
-from django.core.cache import cache
+from django.db.models import Max
 from django_filters.rest_framework import DjangoFilterBackend
 from hr.filters import AttendanceFilter
 from api.pagination import CustomPagination
 
 
-class DepartmentModelViewset(ModelViewSet):
+class DepartmentModelViewset(AsyncViewMixin, OrganizationScopeMixin, ReplicaReadMixin, ConditionalGetMixin, CachedResponseMixin, ModelViewSet):
     def get_queryset(self):
-        return Department.objects.filter(organization_id=self.kwargs['organization_pk'])
+        return Department.objects.select_related('manager').filter(organization_id=self.tenant.organization_id)
+    
+    def get_validator_aggregates(self):
+        aggregates = super().get_validator_aggregates()
+        # The nested manager is part of the payload
+        aggregates['manager_modified'] = Max('manager__updated_at')
+        return aggregates
     
     def get_serializer_class(self):
         if self.request.method in 'POST':
@@ -31,9 +35,6 @@ class DepartmentModelViewset(ModelViewSet):
             return UpdateDepartmentSerializer
         return DepartmentSerializer
     
-    def get_serializer_context(self):
-        return {'organization_id': self.kwargs['organization_pk']}
-    
     
     # def get_permissions(self):
     #     if self.request.method in ['HEAD', 'OPTIONS']:
@@ -65,9 +66,9 @@ class DepartmentModelViewset(ModelViewSet):
         
         
         serializer.save()
-class PositionModelViewset(ModelViewSet):
+class PositionModelViewset(AsyncViewMixin, OrganizationScopeMixin, ReplicaReadMixin, ConditionalGetMixin, CachedResponseMixin, ModelViewSet):
     def get_queryset(self):
-        return Position.objects.select_related('department').filter(department__organization_id=self.kwargs['organization_pk'])
+        return Position.objects.select_related('department').filter(department__organization_id=self.tenant.organization_id)
     
     def get_serializer_class(self):
         if self.request.method in 'POST':
@@ -76,15 +77,15 @@ class PositionModelViewset(ModelViewSet):
             return UpdatePositionSerializer
         return PositionSerializer
     
-    def get_serializer_context(self):
-        return {'organization_id': self.kwargs['organization_pk']}
-    
     
     
     
-class EmployeeModelViewset(TimezoneMixin, ModelViewSet):
+class EmployeeModelViewset(AsyncViewMixin, OrganizationScopeMixin, ReplicaReadMixin, ConditionalGetMixin, TimezoneMixin, ProjectionMixin, ModelViewSet):
+    projection_classes = {'list': EmployeeProjection}
+    query_budget = {'list': 6, 'retrieve': 6}
+
     def get_queryset(self):
-        return Employee.objects.filter(organization_id=self.kwargs['organization_pk'])
+        return Employee.objects.filter(organization_id=self.tenant.organization_id)
     
     def get_serializer_class(self):
         if self.request.method in 'POST':
@@ -93,19 +94,16 @@ class EmployeeModelViewset(TimezoneMixin, ModelViewSet):
             return UpdateEmployeeSerializer
         return EmployeeSerializer
     
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['organization_id'] = self.kwargs['organization_pk']
-        return context
-    
     
 
-class AttendanceModelViewset(TimezoneMixin, ModelViewSet):
+class AttendanceModelViewset(AsyncViewMixin, OrganizationScopeMixin, ReplicaReadMixin, TimezoneMixin, ProjectionMixin, ModelViewSet):
     filter_backends = [DjangoFilterBackend]
     filterset_class = AttendanceFilter
     pagination_class = CustomPagination
+    projection_classes = {'list': AttendanceProjection}
+    query_budget = {'list': 6, 'retrieve': 6}
     def get_queryset(self):
-        queryset = Attendance.objects.filter(organization_id=self.kwargs['organization_pk'])
+        queryset = Attendance.objects.select_related('employee').filter(organization_id=self.tenant.organization_id)
         
         # By default, filter to show only current date's attendance records
         if not self.request.query_params.get('date__gte') and not self.request.query_params.get('date__lte'):
@@ -125,36 +123,11 @@ class AttendanceModelViewset(TimezoneMixin, ModelViewSet):
             return CheckInOutSerializer
         return AttendanceSerializer
     
-    def get_serializer_context(self):
-        context = super().get_serializer_context()
-        context['organization_id'] = self.kwargs['organization_pk']
-        return context
-    
     def get_organization_timezone(self):
         """
-        Get the organization's timezone from preferences.
-        Uses caching to reduce database queries.
+        Get the organization's timezone from preferences, UTC when it has none.
         """
-        organization_id = self.kwargs['organization_pk']
-        cache_key = f"org_timezone_{organization_id}"
-        cached_timezone = cache.get(cache_key)
-        
-        if cached_timezone:
-            return cached_timezone
-        
-        try:
-            org_preferences = OrganizationPreferences.objects.select_related('organization').get(
-                organization_id=organization_id
-            )
-            organization_timezone = org_preferences.timezone
-            
-            # Cache the timezone for 1 hour (3600 seconds)
-            cache.set(cache_key, organization_timezone, 3600)
-            
-            return organization_timezone
-        except OrganizationPreferences.DoesNotExist:
-            # Default to UTC if preferences not found
-            return pytz.UTC
+        return self.tenant.timezone
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
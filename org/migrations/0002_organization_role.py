@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('org', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organizationmember',
+            name='revoked_permissions',
+            field=models.ManyToManyField(blank=True, related_name='revoked_members', to='core.permission'),
+        ),
+        migrations.CreateModel(
+            name='OrganizationRole',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('description', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='roles', to='org.organization')),
+                ('permissions', models.ManyToManyField(blank=True, related_name='roles', to='core.permission')),
+            ],
+            options={
+                'verbose_name_plural': 'Roles',
+                'db_table': 'Org_Role',
+            },
+        ),
+        migrations.AddField(
+            model_name='organizationmember',
+            name='role',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='members', to='org.organizationrole'),
+        ),
+        migrations.AddConstraint(
+            model_name='organizationrole',
+            constraint=models.UniqueConstraint(fields=('organization', 'name'), name='unique_role_name_per_organization'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+COUNTERS = {
+    'members': 'members',
+    'employees': 'employees',
+    'departments': 'departments',
+    'positions': 'departments__positions',
+}
+
+
+def count_usage(apps, schema_editor):
+    Organization = apps.get_model('org', 'Organization')
+    OrganizationUsage = apps.get_model('org', 'OrganizationUsage')
+
+    usage = {pk: OrganizationUsage(organization_id=pk) for pk in Organization.objects.values_list('pk', flat=True)}
+    for counter, relation in COUNTERS.items():
+        for pk, count in Organization.objects.annotate(count=models.Count(relation)).values_list('pk', 'count'):
+            setattr(usage[pk], counter, count)
+    OrganizationUsage.objects.bulk_create(usage.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('org', '0002_organization_role'),
+        ('hr', '0002_department_updated_at_position_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrganizationUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('members', models.PositiveIntegerField(default=0)),
+                ('employees', models.PositiveIntegerField(default=0)),
+                ('departments', models.PositiveIntegerField(default=0)),
+                ('positions', models.PositiveIntegerField(default=0)),
+                ('organization', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='org.organization')),
+            ],
+            options={
+                'verbose_name_plural': 'Usage',
+                'db_table': 'Org_Usage',
+            },
+        ),
+        migrations.RunPython(count_usage, migrations.RunPython.noop),
+    ]
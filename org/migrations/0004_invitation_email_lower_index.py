@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:43
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('org', '0003_organization_usage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='organizationmemberinvitation',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='org_invitation_email_lower'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:50
+
+import datetime
+import org.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_expiry(apps, schema_editor):
+    # Existing invitations expire when their tokens would have, with the
+    # INVITATION_TOKEN_MAX_AGE default of the time: migrations must not
+    # depend on settings that change later
+    OrganizationMemberInvitation = apps.get_model('org', 'OrganizationMemberInvitation')
+    OrganizationMemberInvitation.objects.using(schema_editor.connection.alias).update(
+        expires_at=models.F('invited_at') + datetime.timedelta(days=7),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('org', '0004_invitation_email_lower_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='organizationmemberinvitation',
+            name='Org_Member__status_1fc809_idx',
+        ),
+        migrations.AddField(
+            model_name='organizationmemberinvitation',
+            name='expires_at',
+            field=models.DateTimeField(default=org.models.invitation_expiry),
+        ),
+        migrations.RunPython(backfill_expiry, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='organizationmemberinvitation',
+            name='status',
+            field=models.CharField(choices=[('PENDING', 'Pending'), ('ACCEPTED', 'Accepted'), ('REJECTED', 'Rejected'), ('EXPIRED', 'Expired')], default='PENDING', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='organizationmemberinvitation',
+            index=models.Index(fields=['status', 'expires_at'], name='org_invitation_status_expiry'),
+        ),
+    ]
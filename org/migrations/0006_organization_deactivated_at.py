@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:54
+
+from django.db import migrations, models
+
+
+def backfill_deactivated_at(apps, schema_editor):
+    # Organizations deleted before the column existed: their last update is
+    # the closest record of when
+    Organization = apps.get_model('org', 'Organization')
+    Organization.objects.using(schema_editor.connection.alias).filter(is_active=False).update(
+        deactivated_at=models.F('updated_at'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('org', '0005_invitation_expiry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='organization',
+            name='deactivated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_deactivated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 5.1.7 on 2026-10-19 17:57
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('org', '0006_organization_deactivated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='organization',
+            name='unique_info',
+        ),
+        migrations.RemoveIndex(
+            model_name='organization',
+            name='Organizatio_name_80f4d3_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='organization',
+            name='Organizatio_email_3055d3_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='organization',
+            name='Organizatio_phone_2b2614_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='organization',
+            name='Organizatio_name_sp_f2a667_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='organizationmember',
+            name='Org_Member_organiz_88dd19_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='organizationmember',
+            name='Org_Member_user_id_657941_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='organizationmemberinvitation',
+            name='Org_Member__organiz_678c37_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='organizationmemberinvitation',
+            name='Org_Member__email_ad7af8_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='payment',
+            name='Org_Payment_invoice_872180_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='paymentmethod',
+            name='Org_Payment_token_i_8d2f18_idx',
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(django.db.models.functions.text.Lower('name'), condition=models.Q(('is_active', True)), name='org_active_name_lower'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(django.db.models.functions.text.Lower('email'), condition=models.Q(('is_active', True)), name='org_active_email_lower'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(django.db.models.functions.text.Lower('name_space'), condition=models.Q(('is_active', True)), name='org_active_name_space_lower'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(django.db.models.functions.text.Lower('tax_id'), condition=models.Q(('is_active', True)), name='org_active_tax_id_lower'),
+        ),
+        migrations.AddIndex(
+            model_name='organization',
+            index=models.Index(condition=models.Q(('is_active', False)), fields=['deactivated_at'], name='org_inactive_deactivated_at'),
+        ),
+    ]
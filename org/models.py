@@ -1,20 +1,139 @@
 
-from django.db import models
+import datetime
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models.functions import Greatest, Lower
 import uuid
 from django.conf import settings
+from django.core import signing
+from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
 from django_countries.fields import CountryField
 from timezone_field import TimeZoneField
+from rest_framework.exceptions import ValidationError
 from core.models import User, Permission, Language
+from api.cache import bump_organization_version
+from api.querycache import CachingManager, invalidate_tables
 
 # <========== Organization Manager ==========> #
 class OrganizationManager(models.Manager):
     def get_queryset(self):
         return super().get_queryset().filter(is_active=True)
+
+    def iexact(self, field, value):
+        """
+        Active organizations whose `field` equals `value` case-insensitively,
+        looked up through the partial Lower(field) indexes: `field__iexact`
+        compares UPPER() and could use neither them nor the unique indexes.
+        """
+        return self.alias(**{f'{field}_lower': Lower(field)}).filter(**{f'{field}_lower': value.lower()})
     
 class AllOrganizationManager(models.Manager):
     def get_queryset(self):
         return super().get_queryset()
+
+    def due_for_purge(self):
+        """
+        Organizations deleted more than settings.ORGANIZATION_RETENTION ago.
+        """
+        cutoff = timezone.now() - datetime.timedelta(seconds=settings.ORGANIZATION_RETENTION)
+        return self.filter(is_active=False, deactivated_at__lte=cutoff)
+
+
+# <========== Organization Member QuerySet ==========> #
+class OrganizationMemberQuerySet(models.QuerySet):
+    """
+    Set-based writes for many members at once.
+
+    update() and the bulk permission writes below run a fixed number of
+    queries whatever the number of members, but send no model or m2m
+    signals, so they bump the organization and query cache versions the
+    signal handlers would have.
+    """
+
+    def _changed(self, organization_ids, *db_tables):
+        invalidate_tables(*db_tables, using=self.db)
+        for organization_id in organization_ids:
+            bump_organization_version(organization_id, using=self.db)
+
+    def _organization_ids(self):
+        return set(self.order_by().values_list('organization_id', flat=True).distinct())
+
+    def update(self, **kwargs):
+        organization_ids = self._organization_ids()
+        rows = super().update(**kwargs)
+        if rows:
+            self._changed(organization_ids, self.model._meta.db_table)
+        return rows
+
+    def _permission_links(self, field='permissions'):
+        # The link rows are deleted with _raw_delete(): delete() would load
+        # them and send post_delete for each one, since the query cache
+        # listens to every model
+        through = getattr(self.model, field).through
+        return through, through.objects.using(self.db).filter(organizationmember__in=self.values('pk'))
+
+    def _add_links(self, field, permission_ids):
+        """
+        Link every member of the queryset to the given permissions through
+        `field`, inserting only the missing links. Return the number added.
+        """
+        permission_ids = set(permission_ids)
+        member_ids = list(self.values_list('pk', flat=True))
+        if not member_ids or not permission_ids:
+            return 0
+
+        through, links = self._permission_links(field)
+        existing = set(links.filter(permission_id__in=permission_ids).values_list('organizationmember_id', 'permission_id'))
+        missing = [
+            through(organizationmember_id=member_id, permission_id=permission_id)
+            for member_id in member_ids
+            for permission_id in permission_ids
+            if (member_id, permission_id) not in existing
+        ]
+        if missing:
+            through.objects.using(self.db).bulk_create(missing, ignore_conflicts=True)
+            self._changed(self._organization_ids(), through._meta.db_table)
+        return len(missing)
+
+    def _remove_links(self, field, permission_ids):
+        permission_ids = set(permission_ids)
+        if not permission_ids:
+            return 0
+        through, links = self._permission_links(field)
+        removed = links.filter(permission_id__in=permission_ids)._raw_delete(self.db)
+        if removed:
+            self._changed(self._organization_ids(), through._meta.db_table)
+        return removed
+
+    def grant_permissions(self, permission_ids):
+        """
+        Give every member of the queryset the given permissions, inserting
+        only the missing links and lifting their revocations. Return the
+        number of links added.
+        """
+        self._remove_links('revoked_permissions', permission_ids)
+        return self._add_links('permissions', permission_ids)
+
+    def revoke_permissions(self, permission_ids):
+        """
+        Take the given permissions away from every member of the queryset:
+        remove their own links and revoke them, so permissions their role
+        grants are taken away too. Return the number of links (removed,
+        revocations added).
+        """
+        return self._remove_links('permissions', permission_ids), self._add_links('revoked_permissions', permission_ids)
+
+    def set_permissions(self, permission_ids):
+        """
+        Give every member of the queryset exactly the given permissions on
+        top of their role's. Return the number of links (added, removed).
+        """
+        permission_ids = set(permission_ids)
+        through, links = self._permission_links()
+        removed = links.exclude(permission_id__in=permission_ids)._raw_delete(self.db)
+        if removed:
+            self._changed(self._organization_ids(), through._meta.db_table)
+        return self.grant_permissions(permission_ids), removed
     
     
 # <========== Organization Model ==========> #
@@ -50,6 +169,8 @@ class Organization(models.Model):
     tax_id = models.CharField(max_length=255, blank=True, null=True)
     industry = models.CharField(max_length=100, blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    # When is_active was last cleared: the data is purged a retention window later
+    deactivated_at = models.DateTimeField(null=True, blank=True, editable=False)
     is_verified = models.BooleanField(default=False)
     logo_url = models.URLField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -63,16 +184,15 @@ class Organization(models.Model):
         db_table = 'Organization'
         verbose_name_plural = "Organizations"
         
+        # name, email, phone and name_space are unique: their unique indexes
+        # serve exact lookups. Case-insensitive checks only look at active
+        # organizations, the purge only at inactive ones.
         indexes = [
-            
-            models.Index(fields=['name']),
-            models.Index(fields=['email']),
-            models.Index(fields=['phone']),
-            models.Index(fields=['name_space']),
-        ]
-        
-        constraints = [
-            models.UniqueConstraint(fields=['name', 'email', 'phone', 'name_space'], name='unique_info')
+            models.Index(Lower('name'), condition=models.Q(is_active=True), name='org_active_name_lower'),
+            models.Index(Lower('email'), condition=models.Q(is_active=True), name='org_active_email_lower'),
+            models.Index(Lower('name_space'), condition=models.Q(is_active=True), name='org_active_name_space_lower'),
+            models.Index(Lower('tax_id'), condition=models.Q(is_active=True), name='org_active_tax_id_lower'),
+            models.Index(fields=['deactivated_at'], condition=models.Q(is_active=False), name='org_inactive_deactivated_at'),
         ]
         
     
@@ -80,20 +200,53 @@ class Organization(models.Model):
         """Return the maximum number of members allowed for this organization type."""
         return self.MEMBER_LIMITS.get(self.organization_type, 1)
     
+    @classmethod
+    def member_limit_expression(cls, organization_id='organization_id'):
+        """
+        The member limit of the organization referenced by `organization_id`,
+        computed by the database, for queries that should not fetch the
+        organization first. A correlated subquery: filtering on it keeps the
+        query on its own table, where a join would make an UPDATE select its
+        rows through `id IN (SELECT ...)`.
+        """
+        limit = models.Case(
+            *[
+                models.When(organization_type=organization_type, then=models.Value(limit))
+                for organization_type, limit in cls.MEMBER_LIMITS.items()
+            ],
+            default=models.Value(1),
+        )
+        return models.Subquery(
+            cls.all_objects.filter(pk=models.OuterRef(organization_id)).annotate(limit=limit).values('limit')[:1]
+        )
+    
+    def get_usage_limit(self, counter):
+        """Return the plan limit of a usage counter, None when it is unlimited."""
+        if counter == 'members':
+            return self.get_member_limit()
+        return None
+    
+    def get_member_count(self):
+        """Return the number of members, from the usage counters when they exist."""
+        try:
+            return self.usage.members
+        except OrganizationUsage.DoesNotExist:
+            return self.members.count()
+    
     def can_add_member(self):
         """Check if the organization can add more members."""
-        current_member_count = self.members.only('id').count()
-        return current_member_count < self.get_member_limit()
+        return self.get_member_count() < self.get_member_limit()
     
     def get_available_members(self):
         """Return the number of available members for the organization."""
-        return self.get_member_limit() - self.members.only('id').count()
+        return self.get_member_limit() - self.get_member_count()
         
     def __str__(self):
         return self.name
     
     def soft_delete(self):
         self.is_active = False
+        self.deactivated_at = timezone.now()
         self.save()
         
     def is_member(self, user):
@@ -107,6 +260,131 @@ class Organization(models.Model):
         
 
 
+# <========== Organization Usage Model ==========> #
+class UsageLimitExceeded(ValidationError):
+    default_detail = 'The organization has reached the limit of its plan.'
+    default_code = 'usage_limit_exceeded'
+
+
+class OrganizationUsageManager(models.Manager):
+    def reserve(self, organization_id, counter, limit=None, amount=1):
+        """
+        Add `amount` to a usage counter unless that takes it over `limit`
+        (a number, or an expression such as Organization.member_limit_expression()),
+        with a single conditional UPDATE: concurrent reservations queue on
+        the row lock and each one sees the count the previous one left.
+        Raise UsageLimitExceeded when the limit is reached.
+        """
+        for attempt in range(2):
+            usage = self.filter(organization_id=organization_id)
+            if limit is not None:
+                usage = usage.filter(**{f'{counter}__lte': limit - amount})
+            if usage.update(**{counter: models.F(counter) + amount}):
+                return
+            if attempt or self.filter(organization_id=organization_id).exists():
+                break
+            # Organization created before the counters existed
+            self.reconcile(Organization.all_objects.filter(pk=organization_id))
+        raise UsageLimitExceeded(f'The organization has reached the {counter} limit of its plan.')
+
+    def release(self, organization_id, counter, amount=1):
+        self.filter(organization_id=organization_id).update(
+            **{counter: Greatest(models.F(counter) - amount, 0)}
+        )
+
+    def reconcile(self, organizations):
+        """
+        Recount the usage of the given organizations and return the
+        counters that had drifted, as {organization_id: {counter: (stored, actual)}}.
+        """
+        with transaction.atomic(using=self.db):
+            # Lock the counters first: reservations in flight hold the row
+            # lock until they commit, so the counts below include them
+            stored = {
+                usage.organization_id: usage
+                for usage in self.select_for_update().filter(organization__in=organizations)
+            }
+
+            # One grouped count per counter: annotating them all on one query
+            # would join every relation against every other
+            actual = {}
+            for counter, relation in OrganizationUsage.COUNTERS.items():
+                counts = organizations.annotate(count=models.Count(relation)).values_list('pk', 'count')
+                for organization_id, count in counts:
+                    actual.setdefault(organization_id, {})[counter] = count
+
+            drifted = {}
+            for organization_id, counts in actual.items():
+                usage = stored.get(organization_id)
+                if usage is None:
+                    self.get_or_create(organization_id=organization_id, defaults=counts)
+                    continue
+                changes = {
+                    counter: (getattr(usage, counter), count)
+                    for counter, count in counts.items() if getattr(usage, counter) != count
+                }
+                if changes:
+                    self.filter(pk=usage.pk).update(**counts)
+                    drifted[organization_id] = changes
+        return drifted
+
+
+class OrganizationUsage(models.Model):
+    """
+    Row counts of an organization kept next to its plan limits, so limit
+    checks read one row instead of counting. Maintained by the signals in
+    org/signals.py and hr/signals.py; `manage.py reconcile_usage` repairs
+    drift from writes that bypass them (bulk_create, raw SQL).
+    """
+    # Counter -> relation of Organization it counts
+    COUNTERS = {
+        'members': 'members',
+        'employees': 'employees',
+        'departments': 'departments',
+        'positions': 'departments__positions',
+    }
+
+    organization = models.OneToOneField(Organization, on_delete=models.CASCADE, related_name='usage')
+    members = models.PositiveIntegerField(default=0)
+    employees = models.PositiveIntegerField(default=0)
+    departments = models.PositiveIntegerField(default=0)
+    positions = models.PositiveIntegerField(default=0)
+
+    objects = OrganizationUsageManager()
+
+    class Meta:
+        db_table = 'Org_Usage'
+        verbose_name_plural = "Usage"
+
+    def __str__(self):
+        return f"Usage of {self.organization_id}"
+
+
+# <========== Organization Role Model ==========> #
+class OrganizationRole(models.Model):
+    """
+    A named set of permissions members of an organization are assigned to.
+    Members get the role's permissions without copies of them: changing a
+    role changes what every member holding it can do.
+    """
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='roles')
+    name = models.CharField(max_length=100)
+    description = models.TextField(blank=True, default='')
+    permissions = models.ManyToManyField(Permission, related_name='roles', blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'Org_Role'
+        verbose_name_plural = "Roles"
+        constraints = [
+            models.UniqueConstraint(fields=['organization', 'name'], name='unique_role_name_per_organization')
+        ]
+
+    def __str__(self):
+        return f"{self.name} (Organization: {self.organization_id})"
+
+
 class OrganizationMember(models.Model):
     ACTIVE = "ACTIVE"
     INACTIVE = "INACTIVE"
@@ -120,37 +398,190 @@ class OrganizationMember(models.Model):
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='members')
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='memberships')
     status = models.CharField(max_length=20, choices=MEMBER_STATUS_CHOICES, default=INACTIVE)
+    role = models.ForeignKey(OrganizationRole, on_delete=models.SET_NULL, related_name='members', null=True, blank=True)
+    # Per-member overrides of the role: extra permissions, and role permissions taken away
     permissions = models.ManyToManyField(Permission, related_name='members', blank=True)
+    revoked_permissions = models.ManyToManyField(Permission, related_name='revoked_members', blank=True)
     joined_at = models.DateTimeField(null=True, blank=True) #TODO: remove null=True, blank=True
     is_owner = models.BooleanField(default=False)
     is_admin = models.BooleanField(default=False)   
     last_active_at = models.DateTimeField(null=True, blank=True) 
     
+    objects = OrganizationMemberQuerySet.as_manager()
+    
     class Meta:
         db_table = 'Org_Member'
         verbose_name_plural = "Members"
         constraints = [
             models.UniqueConstraint(fields=['organization', 'user'], name='unique_user_per_organization')
         ]
+        # organization and user are covered by their foreign key indexes
         indexes = [
-            models.Index(fields=['organization']),
-            models.Index(fields=['user']),
             models.Index(fields=['status']),
         ]
     
     def __str__(self):
         return f"{self.user} (Organization: {self.organization.name})"
-    
-    
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+        # New members are reserved against the plan limit in pre_save: the
+        # reservation and the insert commit, or roll back, together
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            super().save(*args, **kwargs)
+
+    def get_permission_names(self):
+        """
+        Return the names of the member's effective permissions: every
+        permission for the owner, otherwise the role's permissions plus the
+        member's own, minus the revoked ones.
+        """
+        if self.is_owner:
+            return {name for name, _ in Permission.PERMISSION_CHOICES}
+
+        from api.cache import role_permissions
+
+        names = set(role_permissions(self.organization_id, self.role_id)) if self.role_id else set()
+        names |= {permission.name for permission in self.permissions.all()}
+        names -= {permission.name for permission in self.revoked_permissions.all()}
+        return names
+    
+    
+def invitation_expiry():
+    return timezone.now() + datetime.timedelta(seconds=settings.INVITATION_TOKEN_MAX_AGE)
+
+
+class OrganizationMemberInvitationQuerySet(models.QuerySet):
+    def _changed(self, organization_id):
+        # update() and bulk_create() send no post_save
+        invalidate_tables(self.model._meta.db_table, using=self.db)
+        bump_organization_version(organization_id, using=self.db)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        for organization_id in {invitation.organization_id for invitation in objs}:
+            self._changed(organization_id)
+        return objs
+
+    def pending(self):
+        """
+        Invitations that can still be accepted or rejected.
+        """
+        return self.filter(status=self.model.PENDING, expires_at__gt=timezone.now())
+
+    def for_email(self, email):
+        """
+        Invitations sent to `email`, compared case-insensitively through the
+        Lower(email) index.
+        """
+        return self.alias(email_lower=Lower('email')).filter(email_lower=email.strip().lower())
+
+    def accept(self, invitation_id, organization_id, user):
+        """
+        Accept a pending invitation for `user`: claim it with a conditional
+        UPDATE, so concurrent accepts cannot both succeed, and create the
+        membership in the same transaction. Return the new member, or None
+        when the invitation is no longer pending.
+        """
+        try:
+            with transaction.atomic(using=self.db):
+                claimed = self.pending().filter(
+                    pk=invitation_id, organization_id=organization_id,
+                ).update(status=self.model.ACCEPTED, is_updated=True)
+                if not claimed:
+                    return None
+                member = OrganizationMember.objects.using(self.db).create(
+                    organization_id=organization_id,
+                    user=user,
+                    status=OrganizationMember.ACTIVE,
+                    joined_at=timezone.now(),
+                )
+        except IntegrityError:
+            raise ValidationError('You are already a member of this organization.')
+        self._changed(organization_id)
+        return member
+
+    def reject(self, invitation_id, organization_id):
+        """
+        Reject a pending invitation. Return whether it was still pending.
+        """
+        rejected = self.pending().filter(
+            pk=invitation_id, organization_id=organization_id,
+        ).update(status=self.model.REJECTED, is_updated=True)
+        if rejected:
+            self._changed(organization_id)
+        return bool(rejected)
+
+    def expire(self, batch_size=1000):
+        """
+        Mark up to `batch_size` pending invitations past their expiry as
+        EXPIRED. Return the number of rows changed.
+        """
+        quote_name = connections[self.db].ops.quote_name
+        return self._sweep(
+            self.filter(status=self.model.PENDING, expires_at__lte=timezone.now()),
+            batch_size,
+            f'UPDATE {quote_name(self.model._meta.db_table)} '
+            f'SET {quote_name("status")} = %s, {quote_name("is_updated")} = %s',
+            [self.model.EXPIRED, True],
+        )
+
+    def purge(self, before, batch_size=1000):
+        """
+        Delete up to `batch_size` rejected or expired invitations that
+        expired before `before`. Return the number of rows deleted.
+        """
+        quote_name = connections[self.db].ops.quote_name
+        return self._sweep(
+            self.filter(status__in=[self.model.REJECTED, self.model.EXPIRED], expires_at__lt=before),
+            batch_size,
+            f'DELETE FROM {quote_name(self.model._meta.db_table)}',
+            [],
+        )
+
+    def _sweep(self, queryset, batch_size, statement, params):
+        # One statement per batch:
+        #   <statement> WHERE id IN (SELECT id ... LIMIT n FOR UPDATE SKIP LOCKED)
+        # Row locks last as long as that statement only, and rows held by a
+        # concurrent accept or reject are skipped instead of waited for: a
+        # later batch picks them up if they still match.
+        ids = queryset.order_by('pk').select_for_update(skip_locked=True).values('pk')[:batch_size]
+        connection = connections[self.db]
+        quote_name = connection.ops.quote_name
+        # Raw rows hold the column as the backend stores it
+        to_python = self.model._meta.get_field('organization').target_field.to_python
+        with transaction.atomic(using=self.db):
+            subquery, subquery_params = ids.query.get_compiler(using=self.db).as_sql()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'{statement} WHERE {quote_name("id")} IN ({subquery}) '
+                    f'RETURNING {quote_name("organization_id")}',
+                    [*params, *subquery_params],
+                )
+                organization_ids = [to_python(row[0]) for row in cursor.fetchall()]
+        # Raw statements send no signals
+        if organization_ids:
+            invalidate_tables(self.model._meta.db_table, using=self.db)
+            for organization_id in set(organization_ids):
+                bump_organization_version(organization_id, using=self.db)
+        return len(organization_ids)
+
+
 class OrganizationMemberInvitation(models.Model):
+    TOKEN_SALT = 'org.invitation'
+
     PENDING = "PENDING"
     ACCEPTED = "ACCEPTED"
     REJECTED = "REJECTED"
+    EXPIRED = "EXPIRED"
     
     INVITATION_STATUS_CHOICES = [
         (PENDING, "Pending"),
         (ACCEPTED, "Accepted"),
         (REJECTED, "Rejected"),
+        (EXPIRED, "Expired"),
     ]
     
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='invitations')
@@ -158,9 +589,12 @@ class OrganizationMemberInvitation(models.Model):
     message = models.TextField(blank=True, null=True)
     status = models.CharField(max_length=10, choices=INVITATION_STATUS_CHOICES, default=PENDING)
     invited_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(default=invitation_expiry)
     invited_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='+', null=True)
     is_updated = models.BooleanField(editable=False, default=False)
     
+    objects = OrganizationMemberInvitationQuerySet.as_manager()
+    
     class Meta:
         db_table = 'Org_Member_Invitation'
         verbose_name_plural = "Member Invitations"
@@ -178,15 +612,44 @@ class OrganizationMemberInvitation(models.Model):
             )
         ]
         
+        # organization is covered by its foreign key index, email lookups go
+        # through Lower(email)
         indexes = [
-            models.Index(fields=['organization']),
-            models.Index(fields=['email']),
-            models.Index(fields=['status']),
+            # Also serves status-only lookups; the sweepers filter on both
+            models.Index(fields=['status', 'expires_at'], name='org_invitation_status_expiry'),
+            models.Index(Lower('email'), name='org_invitation_email_lower'),
         ]
         
     def __str__(self):
         return f"{self.email} (Organization: {self.organization.name})"
 
+    @property
+    def is_expired(self):
+        return self.status == self.EXPIRED or (self.status == self.PENDING and self.expires_at <= timezone.now())
+
+    def make_token(self):
+        """
+        Return a signed token naming this invitation, its organization and
+        the invited email, valid for settings.INVITATION_TOKEN_MAX_AGE.
+        """
+        return signing.TimestampSigner(salt=self.TOKEN_SALT).sign_object({
+            'organization': str(self.organization_id),
+            'invitation': self.pk,
+            'email': self.email.strip().lower(),
+        })
+
+    @classmethod
+    def read_token(cls, token):
+        """
+        Return the payload of a valid, unexpired token, None otherwise.
+        """
+        try:
+            return signing.TimestampSigner(salt=cls.TOKEN_SALT).unsign_object(
+                token, max_age=settings.INVITATION_TOKEN_MAX_AGE
+            )
+        except signing.BadSignature:
+            return None
+
 
         
 # <========== Address Model ==========> #
@@ -339,6 +802,8 @@ class OrganizationPreferences(models.Model):
     language = models.OneToOneField(Language, on_delete=models.CASCADE, related_name='preferences')
     timezone = TimeZoneField(default='UTC')
     
+    objects = CachingManager()
+    
     def __str__(self):
         return f"Preferences for {self.organization.name}"
     
@@ -437,7 +902,6 @@ class Payment(models.Model):
         indexes = [
             models.Index(fields=['payment_status']),
             models.Index(fields=['payment_date']),
-            models.Index(fields=['invoice_number']),
         ]
         
 
@@ -479,7 +943,6 @@ class PaymentMethod(models.Model):
         db_table = 'Org_Payment_Method'
         indexes = [
             models.Index(fields=["method_type"]),
-            models.Index(fields=["token_id"]),
         ]
         
         
@@ -0,0 +1,124 @@
+import time
+from api.cache import bump_organization_version
+from api.querycache import invalidate_tables
+from hr.models import Attendance, Department, Employee, EmploymentDetails, Payroll, Position
+from org.models import (
+    Address, InvoiceConfig, NotificationAlert, NotificationPreference, Organization, OrganizationMember,
+    OrganizationMemberInvitation, OrganizationPreferences, OrganizationRole, OrganizationUsage, Payment,
+    PaymentMethod, SubscriptionPlan,
+)
+
+
+# <========== Organization purge ==========> #
+#
+# Deleting an Organization row cascades to every table holding its data in a
+# single transaction, which locks them for as long as the largest tenants take
+# to delete (minutes for millions of attendance rows). The purge deletes the
+# data first, table by table, children before parents, in small batches that
+# each commit on their own, then the now empty organization.
+#
+# Every step deletes whatever is left of the organization's rows, so an
+# interrupted purge resumes where it stopped when run again.
+
+def _links(field):
+    """
+    An m2m through table, with the lookup from its rows to the organization.
+    """
+    through = field.remote_field.through
+    return through, f'{field.m2m_field_name()}__organization_id'
+
+
+# (model, lookup to the organization id), in deletion order
+PURGE_PLAN = [
+    (Attendance, 'organization_id'),
+    (Payroll, 'employee__organization_id'),
+    (EmploymentDetails, 'employee__organization_id'),
+    (Employee, 'organization_id'),
+    (Position, 'department__organization_id'),
+    (Department, 'organization_id'),
+    _links(OrganizationMember._meta.get_field('permissions')),
+    _links(OrganizationMember._meta.get_field('revoked_permissions')),
+    (OrganizationMember, 'organization_id'),
+    _links(OrganizationRole._meta.get_field('permissions')),
+    (OrganizationRole, 'organization_id'),
+    (OrganizationMemberInvitation, 'organization_id'),
+    (NotificationAlert, 'organization_id'),
+    (Payment, 'organization_id'),
+    (PaymentMethod, 'organization_id'),
+    (SubscriptionPlan, 'organization_id'),
+    (InvoiceConfig, 'organization_id'),
+    (Address, 'organization_id'),
+    (NotificationPreference, 'organization_id'),
+    (OrganizationPreferences, 'organization_id'),
+    (OrganizationUsage, 'organization_id'),
+]
+
+
+def delete_in_batches(queryset, batch_size, pause=0.0):
+    """
+    Delete the rows of `queryset` `batch_size` at a time, one statement per
+    batch:
+
+        DELETE FROM <table> WHERE id IN (SELECT id ... LIMIT n)
+
+    Rows are deleted with _raw_delete(): no cascade collection and no
+    signals, so the caller deletes children first and invalidates caches.
+    Yields the number of rows deleted and the time taken per batch.
+    """
+    model = queryset.model
+    while True:
+        start = time.perf_counter()
+        batch = queryset.order_by().values('pk')[:batch_size]
+        deleted = model._base_manager.using(queryset.db).filter(pk__in=batch)._raw_delete(queryset.db)
+        if deleted:
+            yield deleted, time.perf_counter() - start
+        if deleted < batch_size:
+            return
+        if pause:
+            time.sleep(pause)
+
+
+def _check_inactive(organization_id):
+    """
+    Raise ValueError unless the organization exists and is inactive.
+    """
+    if not Organization.all_objects.filter(pk=organization_id, is_active=False).exists():
+        raise ValueError(f'Organization {organization_id} is missing or active.')
+
+
+def purge_organization(organization_id, batch_size=1000, pause=0.0, on_batch=None):
+    """
+    Delete an inactive organization and all of its data in bounded batches,
+    sleeping `pause` seconds between them. `on_batch(model, rows, duration)`
+    is called after each batch. Return the number of rows deleted per table.
+
+    The organization is checked to still be inactive before every table, so
+    a restore while the purge runs stops it there (ValueError); the tables
+    already purged stay empty.
+    """
+    _check_inactive(organization_id)
+
+    # Departments point to their manager: unlink them before deleting employees
+    if Department._base_manager.filter(organization_id=organization_id, manager__isnull=False).update(manager=None):
+        invalidate_tables(Department._meta.db_table)
+
+    deleted = {}
+    for model, lookup in PURGE_PLAN:
+        _check_inactive(organization_id)
+        # Managers may hide rows (e.g. inactive ones): the base manager sees all
+        queryset = model._base_manager.filter(**{lookup: organization_id})
+        for rows, duration in delete_in_batches(queryset, batch_size, pause):
+            deleted[model._meta.db_table] = deleted.get(model._meta.db_table, 0) + rows
+            if on_batch is not None:
+                on_batch(model, rows, duration)
+        if model._meta.db_table in deleted:
+            invalidate_tables(model._meta.db_table)
+
+    # Only empty relations are left to cascade to. The inactive filter makes
+    # the check and the delete one statement: a restore in between wins.
+    _, rows = Organization.all_objects.filter(pk=organization_id, is_active=False).delete()
+    if not rows.get(Organization._meta.label):
+        raise ValueError(f'Organization {organization_id} is missing or active.')
+    deleted[Organization._meta.db_table] = 1
+    bump_organization_version(organization_id)
+    return deleted
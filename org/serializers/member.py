@@ -1,16 +1,32 @@
 from rest_framework import serializers
-from api.utils.validate_invitation_email import validate_email_invitation
+from asgiref.sync import async_to_sync
+from django.db import IntegrityError
+from django.db.models.functions import Lower
+from api.cache import permission_catalog
+from api.utils.validate_invitation_email import anormalize_emails, validate_email_invitation
 from django.utils import timezone
 from django.db import transaction
+from core.models import Permission
 from core.serializers import SimpleUserSerializer, SimplePermissionSerializer
-from org.models import OrganizationMember, OrganizationMemberInvitation
+from org.models import OrganizationMember, OrganizationMemberInvitation, OrganizationRole, UsageLimitExceeded
+from org.serializers.role import SimpleOrganizationRoleSerializer
+from org.serializers.org import SimpleOrganizationSerializer
 import pytz
 from django.utils import timezone as tz
 from api.utils.tz import convert_datetime_to_timezone
+from api.projection import ProjectionSerializer, LocalDateTime, Nested, Many
+
+def validate_organization_role(role, organization_id):
+    if role is not None and str(role.organization_id) != str(organization_id):
+        raise serializers.ValidationError("Role not found in this organization.")
+    return role
+
 
 class OrganizationMemberSerializer(serializers.ModelSerializer):
     user = SimpleUserSerializer(read_only=True)
+    role = SimpleOrganizationRoleSerializer(read_only=True)
     permissions = SimplePermissionSerializer(many=True, read_only=True)
+    revoked_permissions = SimplePermissionSerializer(many=True, read_only=True)
     
     
     class Meta:
@@ -18,7 +34,7 @@ class OrganizationMemberSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'user',
             'is_owner', 'is_admin', 'status',
-            'joined_at', 'last_active_at', 'permissions'
+            'joined_at', 'last_active_at', 'role', 'permissions', 'revoked_permissions'
         ]
         
     def validate_status(self, value):
@@ -28,16 +44,33 @@ class OrganizationMemberSerializer(serializers.ModelSerializer):
     
     
     
+class OrganizationMemberProjection(ProjectionSerializer):
+    """
+    Read-only projection of OrganizationMemberSerializer for list pages.
+    """
+    user = Nested(SimpleUserSerializer.Meta.fields)
+    role = Nested(SimpleOrganizationRoleSerializer.Meta.fields)
+    permissions = Many(SimplePermissionSerializer.Meta.fields)
+    revoked_permissions = Many(SimplePermissionSerializer.Meta.fields)
+
+    class Meta:
+        model = OrganizationMember
+        fields = OrganizationMemberSerializer.Meta.fields
+
+
 class UpdateOrganizationMemberSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrganizationMember
-        fields = ['status', 'is_admin', 'permissions']
+        fields = ['status', 'is_admin', 'role', 'permissions', 'revoked_permissions']
         
     def validate_status(self, value):
         if value not in [OrganizationMember.ACTIVE, OrganizationMember.INACTIVE]:
             raise serializers.ValidationError("Invalid status")
         return value
         
+    def validate_role(self, value):
+        return validate_organization_role(value, self.context['organization_id'])
+        
     def validate(self, attrs):
         # Only prevent is_owner modification, allow other field updates
         if 'is_owner' in attrs:
@@ -52,12 +85,94 @@ class UpdateOrganizationMemberSerializer(serializers.ModelSerializer):
         validated_data.pop('is_owner', None)
         return super().update(instance, validated_data)
 
+
+
+class BulkUpdateOrganizationMemberSerializer(serializers.Serializer):
+    """
+    Apply the same changes to many members of an organization: one UPDATE
+    for status / is_admin / role, then diff-based writes to the permission links.
+    `permissions` replaces the permissions of the members; `grant_permissions`
+    and `revoke_permissions` add to or remove from them. Revoking also takes
+    away what the members' role grants, through their revoked permissions.
+    """
+    MAX_MEMBERS = 500
+
+    members = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=MAX_MEMBERS
+    )
+    status = serializers.ChoiceField(choices=OrganizationMember.MEMBER_STATUS_CHOICES, required=False)
+    is_admin = serializers.BooleanField(required=False)
+    role = serializers.PrimaryKeyRelatedField(queryset=OrganizationRole.objects.all(), required=False, allow_null=True)
+    permissions = serializers.ListField(child=serializers.IntegerField(), required=False)
+    grant_permissions = serializers.ListField(child=serializers.IntegerField(), required=False)
+    revoke_permissions = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+    PERMISSION_FIELDS = ['permissions', 'grant_permissions', 'revoke_permissions']
+
+    def validate_members(self, value):
+        member_ids = set(value)
+        members = OrganizationMember.objects.filter(
+            organization_id=self.context['organization_id'], pk__in=member_ids
+        ).values_list('pk', 'is_owner')
+        found = dict(members)
+
+        unknown = sorted(member_ids - found.keys())
+        if unknown:
+            raise serializers.ValidationError(f"Members not found in this organization: {unknown}")
+        if any(found.values()):
+            raise serializers.ValidationError("Owner membership cannot be modified.")
+        return sorted(member_ids)
+
+    def validate_role(self, value):
+        return validate_organization_role(value, self.context['organization_id'])
+
+    def validate(self, attrs):
+        if 'permissions' in attrs and ('grant_permissions' in attrs or 'revoke_permissions' in attrs):
+            raise serializers.ValidationError(
+                "Use either permissions, or grant_permissions / revoke_permissions."
+            )
+        if set(attrs.get('grant_permissions', [])) & set(attrs.get('revoke_permissions', [])):
+            raise serializers.ValidationError("A permission cannot be both granted and revoked.")
+        if len(attrs) == 1:
+            raise serializers.ValidationError("No changes requested.")
+
+        permission_ids = set()
+        for field in self.PERMISSION_FIELDS:
+            attrs[field] = set(attrs[field]) if field in attrs else None
+            permission_ids |= attrs[field] or set()
+        unknown = permission_ids - permission_catalog().keys()
+        if unknown:
+            raise serializers.ValidationError({'permissions': f"Unknown permissions: {sorted(unknown)}"})
+        return attrs
+
+    def save(self):
+        data = self.validated_data
+        members = OrganizationMember.objects.filter(pk__in=data['members'])
+        changes = {field: data[field] for field in ['status', 'is_admin', 'role'] if field in data}
+        added = removed = revoked = 0
+
+        with transaction.atomic():
+            updated = members.update(**changes) if changes else len(data['members'])
+            if data['permissions'] is not None:
+                added, removed = members.set_permissions(data['permissions'])
+            if data['grant_permissions']:
+                added = members.grant_permissions(data['grant_permissions'])
+            if data['revoke_permissions']:
+                removed, revoked = members.revoke_permissions(data['revoke_permissions'])
+
+        return {
+            'members': updated,
+            'permissions_added': added,
+            'permissions_removed': removed,
+            'permissions_revoked': revoked,
+        }
+
     
 class InvitedOrganizationMemberSerializer(serializers.ModelSerializer):
     invited_by = SimpleUserSerializer(read_only=True)
     class Meta:
         model = OrganizationMemberInvitation
-        fields = ['id', 'email', 'message', 'invited_at', 'status', 'invited_by']
+        fields = ['id', 'email', 'message', 'invited_at', 'expires_at', 'status', 'invited_by']
         
         
     def to_representation(self, instance):
@@ -70,7 +185,7 @@ class InvitedOrganizationMemberSerializer(serializers.ModelSerializer):
         timezone = self.context.get('timezone', pytz.UTC)
         
         # Convert datetime fields
-        datetime_fields = ['invited_at']
+        datetime_fields = ['invited_at', 'expires_at']
         for field in datetime_fields:
             if representation.get(field):
                 # Parse the datetime string
@@ -83,10 +198,76 @@ class InvitedOrganizationMemberSerializer(serializers.ModelSerializer):
         return representation
         
 
+class InvitedOrganizationMemberProjection(ProjectionSerializer):
+    """
+    Read-only projection of InvitedOrganizationMemberSerializer for list pages.
+    """
+    invited_at = LocalDateTime()
+    expires_at = LocalDateTime()
+    invited_by = Nested(SimpleUserSerializer.Meta.fields)
+
+    class Meta:
+        model = OrganizationMemberInvitation
+        fields = InvitedOrganizationMemberSerializer.Meta.fields
+
+
+class MyInvitationSerializer(serializers.ModelSerializer):
+    """
+    A pending invitation, as seen by the invited user: with the token to
+    accept or reject it.
+    """
+    organization = SimpleOrganizationSerializer(read_only=True)
+    invited_by = SimpleUserSerializer(read_only=True)
+    token = serializers.SerializerMethodField()
+
+    class Meta:
+        model = OrganizationMemberInvitation
+        fields = ['id', 'organization', 'message', 'invited_at', 'expires_at', 'invited_by', 'token']
+
+    def get_token(self, obj):
+        return obj.make_token()
+
+
+class InvitationTokenSerializer(serializers.Serializer):
+    token = serializers.CharField()
+
+    def validate_token(self, value):
+        payload = OrganizationMemberInvitation.read_token(value)
+        if payload is None:
+            raise serializers.ValidationError('This invitation link is invalid or has expired.')
+
+        # The token names the invited address: no lookup needed to check it
+        user = self.context['request'].user
+        if (user.email or '').strip().lower() != payload['email']:
+            raise serializers.ValidationError(
+                'You cannot accept an invitation that was sent to a different email address.'
+            )
+        return payload
+
+    def accept(self):
+        payload = self.validated_data['token']
+        member = OrganizationMemberInvitation.objects.accept(
+            payload['invitation'], payload['organization'], self.context['request'].user,
+        )
+        if member is None:
+            raise serializers.ValidationError('This invitation is no longer valid.')
+        return member
+
+    def reject(self):
+        payload = self.validated_data['token']
+        if not OrganizationMemberInvitation.objects.reject(payload['invitation'], payload['organization']):
+            raise serializers.ValidationError('This invitation is no longer valid.')
+
+
 class CreateInviteOrganizationMemberSerializer(serializers.ModelSerializer):
+    token = serializers.SerializerMethodField()
+
     class Meta:
         model = OrganizationMemberInvitation
-        fields = ['email', 'message']
+        fields = ['email', 'message', 'token']
+
+    def get_token(self, obj):
+        return obj.make_token()
     
     def validate_email(self, value):
         organization_id = self.context['organization_id']
@@ -99,6 +280,93 @@ class CreateInviteOrganizationMemberSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
     
 
+class BulkInviteOrganizationMemberSerializer(serializers.Serializer):
+    """
+    Invite many addresses at once. Deliverability is checked concurrently,
+    existing invitations and members are found with one query each and the
+    invitations are inserted with one bulk_create(). Every address gets a
+    result: `invited`, with the invitation id and token, or why it was skipped.
+    """
+    MAX_EMAILS = 200
+
+    INVITED = 'invited'
+    INVALID = 'invalid'
+    DUPLICATE = 'duplicate'
+    ALREADY_INVITED = 'already_invited'
+    ALREADY_MEMBER = 'already_member'
+    OVER_LIMIT = 'over_limit'
+
+    emails = serializers.ListField(
+        child=serializers.CharField(max_length=254), allow_empty=False, max_length=MAX_EMAILS
+    )
+    message = serializers.CharField(required=False, allow_blank=True, allow_null=True)
+
+    def save(self):
+        organization = self.context['organization']
+        organization_id = organization.pk
+        emails = [email.strip() for email in self.validated_data['emails']]
+
+        results = []
+        candidates = {}
+        for email, (normalized, error) in zip(emails, async_to_sync(anormalize_emails)(emails)):
+            result = {'email': email}
+            results.append(result)
+            if error:
+                result.update(status=self.INVALID, detail=error)
+            elif normalized.lower() in candidates:
+                result['status'] = self.DUPLICATE
+            else:
+                result['email'] = normalized
+                candidates[normalized.lower()] = result
+        if not candidates:
+            return results
+
+        members = OrganizationMember.objects.filter(organization_id=organization_id).annotate(
+            email_lower=Lower('user__email')
+        ).filter(email_lower__in=candidates).values_list('email_lower', flat=True).distinct()
+        for email in members:
+            result = candidates.pop(email, None)
+            if result is not None:
+                result['status'] = self.ALREADY_MEMBER
+
+        invited = OrganizationMemberInvitation.objects.filter(
+            organization_id=organization_id,
+            status__in=[OrganizationMemberInvitation.PENDING, OrganizationMemberInvitation.ACCEPTED],
+        ).annotate(email_lower=Lower('email')).filter(email_lower__in=candidates).values_list(
+            'email_lower', flat=True
+        ).distinct()
+        for email in invited:
+            result = candidates.pop(email, None)
+            if result is not None:
+                result['status'] = self.ALREADY_INVITED
+
+        to_invite = list(candidates.values())
+        available = max(organization.get_available_members(), 0)
+        for result in to_invite[available:]:
+            result['status'] = self.OVER_LIMIT
+        to_invite = to_invite[:available]
+
+        try:
+            with transaction.atomic():
+                invitations = OrganizationMemberInvitation.objects.bulk_create([
+                    OrganizationMemberInvitation(
+                        organization=organization,
+                        email=result['email'],
+                        message=self.validated_data.get('message'),
+                        invited_by=self.context['request'].user,
+                    )
+                    for result in to_invite
+                ])
+        except IntegrityError:
+            raise serializers.ValidationError(
+                'Some of these addresses were invited at the same time by another request. Please try again.'
+            )
+
+        for result, invitation in zip(to_invite, invitations):
+            result.update(status=self.INVITED, id=invitation.pk, token=invitation.make_token())
+        return results
+
+
 class UpdateInviteOrganizationMemberSerializer(serializers.ModelSerializer):
     class Meta:
         model = OrganizationMemberInvitation
@@ -109,6 +377,8 @@ class UpdateInviteOrganizationMemberSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('Invalid invitation.')
             
         # Existing validation checks
+        if self.instance.is_expired:
+            raise serializers.ValidationError('This invitation has expired.')
         if self.instance.status != OrganizationMemberInvitation.PENDING:
             raise serializers.ValidationError(
                 f'This invitation is no longer valid. Current status: {self.instance.get_status_display()}'
@@ -169,6 +439,10 @@ class UpdateInviteOrganizationMemberSerializer(serializers.ModelSerializer):
                 
                 return instance
                 
+            except UsageLimitExceeded:
+                raise serializers.ValidationError(
+                    'The organization has reached its member limit.'
+                )
             except Exception as e:
                 raise serializers.ValidationError(
                     f'Error processing invitation: {str(e)}'
@@ -5,7 +5,6 @@ from api.utils import (
 )
 from phonenumber_field.modelfields import PhoneNumberField
 from django.db import transaction
-from core.models import Permission
 import pytz
 from django.utils import timezone as tz
 from api.utils.tz import convert_datetime_to_timezone
@@ -48,7 +47,7 @@ class OrganizationSerializer(serializers.ModelSerializer):
         return obj.get_available_members()
     
     def get_member_count(self, obj):
-        return obj.members.count()
+        return obj.get_member_count()
     
     def get_can_add_member(self, obj):
         return obj.can_add_member()
@@ -94,17 +93,20 @@ class OrganizationSerializer(serializers.ModelSerializer):
         if not user:
             return None
             
-        try:
-            member = OrganizationMember.objects.select_related('organization', 'user').get(organization=obj, user=user)
-
-            if member.is_owner:
-                return "Owner"
-            elif member.is_admin:
-                return "Admin"
-            else:
-                return "Member"
-        except OrganizationMember.DoesNotExist:
+        # Reuse the prefetched members (OrganizationViewSet.retrieve) instead of a query per organization
+        if 'members' in getattr(obj, '_prefetched_objects_cache', {}):
+            member = next((member for member in obj.members.all() if member.user_id == user.pk), None)
+        else:
+            member = OrganizationMember.objects.filter(organization=obj, user=user).only('is_owner', 'is_admin').first()
+
+        if member is None:
             return None
+        if member.is_owner:
+            return "Owner"
+        elif member.is_admin:
+            return "Admin"
+        else:
+            return "Member"
 
 
 
@@ -153,18 +155,15 @@ class CreateOrganizationSerializer(serializers.ModelSerializer):
         
         with transaction.atomic():
             organization = Organization.objects.create(**validated_data)
-            permissions = Permission.objects.filter(
-                name__in=[choice[0] for choice in Permission.PERMISSION_CHOICES]
-            ).all()
             
-            member = OrganizationMember.objects.create(
+            # The owner holds every permission through is_owner, no permission rows needed
+            OrganizationMember.objects.create(
                 organization=organization,
                 user_id=user_id,
                 status=OrganizationMember.ACTIVE,
                 is_owner=True,
                 is_admin=True,
             )
-            member.permissions.add(*permissions)
             return organization
 
 
@@ -238,38 +237,20 @@ class TransferOwnershipSerializer(serializers.Serializer):
         new_owner = User.objects.get(email=user_email)
         
         with transaction.atomic():
-            # Get all available permissions
-            all_permissions = Permission.objects.filter(
-                name__in=[choice[0] for choice in Permission.PERMISSION_CHOICES]
-            ).all()
-
             # Remove ownership and permissions from current owner
-            current_owner = OrganizationMember.objects.get(organization=organization, is_owner=True)
-            current_owner.is_owner = False
-            current_owner.is_admin = False
-            current_owner.permissions.clear()
-            current_owner.save()
-
-            # Check if new owner is already a member
-            try:
-                new_owner_member = OrganizationMember.objects.get(organization=organization, user=new_owner)
-                # Update existing member to owner
-                new_owner_member.is_owner = True
-                new_owner_member.is_admin = True
-                # Clear existing permissions to avoid duplicates
-                new_owner_member.permissions.clear()
-                new_owner_member.permissions.add(*all_permissions)
-                new_owner_member.save()
-            except OrganizationMember.DoesNotExist:
-                # Create new member as owner
-                new_owner_member = OrganizationMember.objects.create(
-                    organization=organization,
-                    user=new_owner,
-                    status=OrganizationMember.ACTIVE,
-                    is_owner=True,
-                    is_admin=True
-                )
-                new_owner_member.permissions.add(*all_permissions)
+            current_owner = OrganizationMember.objects.filter(organization=organization, is_owner=True)
+            current_owner.set_permissions([])
+            current_owner.update(is_owner=False, is_admin=False)
+
+            # Promote the new owner, adding them as a member if they are not one yet
+            new_owner_member, created = OrganizationMember.objects.get_or_create(
+                organization=organization,
+                user=new_owner,
+                defaults={'status': OrganizationMember.ACTIVE, 'is_owner': True, 'is_admin': True},
+            )
+            if not created:
+                # Every permission comes with is_owner
+                OrganizationMember.objects.filter(pk=new_owner_member.pk).update(is_owner=True, is_admin=True)
 
             return organization
 
@@ -287,6 +268,8 @@ class RestoreOrganizationSerializer(serializers.ModelSerializer):
             organization = Organization.all_objects.get(email=value, is_active=False)
         except Organization.DoesNotExist:
             raise serializers.ValidationError(_('No inactive organization found with this email.'))
+        if Organization.all_objects.due_for_purge().filter(pk=organization.pk).exists():
+            raise serializers.ValidationError(_('This organization was deleted too long ago to be restored.'))
         
         # Check if the current user is the owner of the organization
         user = self.context.get('request').user
@@ -317,7 +300,7 @@ class RestoreOrganizationSerializer(serializers.ModelSerializer):
             })
         
         # Validate member limits
-        current_member_count = organization.members.count()
+        current_member_count = organization.get_member_count()
         member_limit = organization.get_member_limit()
         
         if current_member_count > member_limit:
@@ -335,6 +318,7 @@ class RestoreOrganizationSerializer(serializers.ModelSerializer):
         with transaction.atomic():
             # Restore the organization
             organization.is_active = True
+            organization.deactivated_at = None
             organization.save()
             
             # You might want to reactivate members or perform other related actions
@@ -0,0 +1,54 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+from core.models import Permission
+from core.serializers import SimplePermissionSerializer
+from org.models import OrganizationRole
+from api.projection import ProjectionSerializer, Many
+
+
+class SimpleOrganizationRoleSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = OrganizationRole
+        fields = ['id', 'name']
+
+
+class OrganizationRoleSerializer(serializers.ModelSerializer):
+    permissions = SimplePermissionSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = OrganizationRole
+        fields = ['id', 'name', 'description', 'permissions', 'created_at', 'updated_at']
+
+
+class OrganizationRoleProjection(ProjectionSerializer):
+    """
+    Read-only projection of OrganizationRoleSerializer for list pages.
+    """
+    permissions = Many(SimplePermissionSerializer.Meta.fields)
+
+    class Meta:
+        model = OrganizationRole
+        fields = OrganizationRoleSerializer.Meta.fields
+
+
+class CreateOrganizationRoleSerializer(serializers.ModelSerializer):
+    permissions = serializers.PrimaryKeyRelatedField(queryset=Permission.objects.all(), many=True, required=False)
+
+    class Meta:
+        model = OrganizationRole
+        fields = ['name', 'description', 'permissions']
+
+    def validate_name(self, value):
+        roles = OrganizationRole.objects.filter(organization_id=self.context['organization_id'], name__iexact=value)
+        if self.instance is not None:
+            roles = roles.exclude(pk=self.instance.pk)
+        if roles.exists():
+            raise serializers.ValidationError(_('A role with this name already exists in the organization.'))
+        return value
+
+    def create(self, validated_data):
+        validated_data['organization_id'] = self.context['organization_id']
+        return super().create(validated_data)
+
+    def to_representation(self, instance):
+        return OrganizationRoleSerializer(instance, context=self.context).data
@@ -0,0 +1,111 @@
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+from api.cache import bump_data_version, bump_organization_version, organization_scope, user_scope
+from org.models import (
+    Organization, OrganizationMember, OrganizationMemberInvitation, OrganizationRole, OrganizationUsage, Address, InvoiceConfig,
+    NotificationPreference, NotificationAlert, OrganizationPreferences, SubscriptionPlan,
+    Payment, PaymentMethod,
+)
+
+
+# Models whose rows belong to a single organization through `organization_id`
+ORGANIZATION_DATA_MODELS = (
+    OrganizationMember,
+    OrganizationMemberInvitation,
+    OrganizationRole,
+    Address,
+    InvoiceConfig,
+    NotificationPreference,
+    NotificationAlert,
+    OrganizationPreferences,
+    SubscriptionPlan,
+    Payment,
+    PaymentMethod,
+)
+
+
+@receiver([post_save, post_delete], sender=Organization)
+def organization_changed(sender, instance, **kwargs):
+    bump_data_version(organization_scope(instance.pk), user_scope(instance.user_id))
+
+
+@receiver(post_save, sender=Organization, dispatch_uid='org_usage_create')
+def create_usage(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        OrganizationUsage.objects.get_or_create(organization_id=instance.pk)
+
+
+# <========== Usage counters ==========> #
+#
+# Counted in the transaction of the insert / delete. Members are reserved
+# before the insert, against the plan limit, so a full organization never
+# gets the row (OrganizationMember.save() makes the reservation and the
+# insert atomic); the other counters have no limit and follow the write.
+
+@receiver(pre_save, sender=OrganizationMember, dispatch_uid='org_usage_reserve_member')
+def reserve_member(sender, instance, raw=False, **kwargs):
+    if instance._state.adding and not raw:
+        OrganizationUsage.objects.reserve(
+            instance.organization_id, 'members', limit=Organization.member_limit_expression(),
+        )
+
+
+@receiver(post_delete, sender=OrganizationMember, dispatch_uid='org_usage_release_member')
+def release_member(sender, instance, **kwargs):
+    OrganizationUsage.objects.release(instance.organization_id, 'members')
+
+
+def track_usage(model, counter, get_organization_id):
+    """
+    Keep the `counter` usage of an organization in step with the rows of
+    `model`; `get_organization_id(instance, origin)` maps a row, and the
+    origin of its deletion (None on save), to its organization.
+    """
+    def created(sender, instance, created, raw=False, **kwargs):
+        if created and not raw:
+            OrganizationUsage.objects.reserve(get_organization_id(instance, None), counter)
+
+    def deleted(sender, instance, origin=None, **kwargs):
+        OrganizationUsage.objects.release(get_organization_id(instance, origin), counter)
+
+    post_save.connect(created, sender=model, weak=False, dispatch_uid=f'org_usage_save_{model.__name__}')
+    post_delete.connect(deleted, sender=model, weak=False, dispatch_uid=f'org_usage_delete_{model.__name__}')
+
+
+def organization_data_changed(sender, instance, **kwargs):
+    bump_organization_version(instance.organization_id)
+
+
+for model in ORGANIZATION_DATA_MODELS:
+    post_save.connect(organization_data_changed, sender=model, dispatch_uid=f'org_version_save_{model.__name__}')
+    post_delete.connect(organization_data_changed, sender=model, dispatch_uid=f'org_version_delete_{model.__name__}')
+
+
+# Permission links of members (grants and revocations) and roles
+PERMISSION_LINK_MODELS = (
+    OrganizationMember.permissions.through,
+    OrganizationMember.revoked_permissions.through,
+    OrganizationRole.permissions.through,
+)
+
+
+def permissions_changed(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if not reverse:
+        # A member's or a role's permissions changed
+        if action.startswith('post_'):
+            bump_organization_version(instance.organization_id)
+        return
+
+    # Reverse side: a permission was added to / removed from members or roles
+    if action == 'pre_clear':
+        linked = model.objects.filter(pk__in=sender.objects.filter(permission=instance).values(model._meta.model_name))
+    elif action in ('post_add', 'post_remove'):
+        linked = model.objects.filter(pk__in=pk_set)
+    else:
+        return
+    for organization_id in linked.values_list('organization_id', flat=True).distinct():
+        bump_organization_version(organization_id)
+
+
+for through in PERMISSION_LINK_MODELS:
+    m2m_changed.connect(permissions_changed, sender=through, dispatch_uid=f'org_version_permissions_{through.__name__}')
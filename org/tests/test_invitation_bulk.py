@@ -0,0 +1,125 @@
+import pytest
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.cache import is_active_organization, is_organization_member
+from org.models import Organization, OrganizationMember, OrganizationMemberInvitation
+
+
+async def accepts_email(domain, timeout=15):
+    return domain != 'nowhere.example.com'
+
+
+@pytest.fixture(autouse=True)
+def offline_dns():
+    with mock.patch('api.aio.accepts_email', accepts_email):
+        yield
+
+
+def create_organization(organization_type=Organization.TEAM):
+    owner = get_user_model().objects.create_user(username='owner', email='owner@test.com', password='testpass')
+    organization = Organization.objects.create(
+        user=owner, name='Invite Org', name_space='invite-org', email='org@test.com',
+        phone='+12025550123', organization_type=organization_type,
+    )
+    OrganizationMember.objects.create(
+        organization=organization, user=owner, status=OrganizationMember.ACTIVE, is_owner=True, is_admin=True,
+    )
+    return organization
+
+
+def bulk(organization, emails, user=None):
+    client = APIClient()
+    client.force_authenticate(user=user or organization.user)
+    return client.post(f'/api/organizations/{organization.pk}/invitations/bulk/', {'emails': emails}, format='json')
+
+
+def statuses(response):
+    return {result['email']: result['status'] for result in response.data['results']}
+
+
+@pytest.mark.django_db
+class TestBulkInvitations:
+    def test_reports_a_result_per_address(self):
+        organization = create_organization()
+        member = get_user_model().objects.create_user(username='member', email='member@test.com')
+        OrganizationMember.objects.create(organization=organization, user=member)
+        OrganizationMemberInvitation.objects.create(organization=organization, email='pending@test.com')
+
+        response = bulk(organization, [
+            'new@test.com', 'NEW@test.com', 'Member@Test.com', 'pending@test.com', 'not-an-email', 'x@nowhere.example.com',
+        ])
+
+        assert response.status_code == status.HTTP_200_OK, response.data
+        assert response.data['invited'] == 1
+        results = response.data['results']
+        assert [result['status'] for result in results] == [
+            'invited', 'duplicate', 'already_member', 'already_invited', 'invalid', 'invalid',
+        ]
+        assert OrganizationMemberInvitation.read_token(results[0]['token'])['invitation'] == results[0]['id']
+        assert OrganizationMemberInvitation.objects.get(pk=results[0]['id']).invited_by_id == str(organization.user_id)
+
+    def test_addresses_matching_several_rows_are_reported_once(self):
+        organization = create_organization()
+        OrganizationMemberInvitation.objects.create(organization=organization, email='twice@test.com')
+        OrganizationMemberInvitation.objects.create(
+            organization=organization, email='Twice@test.com', status=OrganizationMemberInvitation.ACCEPTED,
+        )
+
+        response = bulk(organization, ['twice@test.com'])
+
+        assert response.status_code == status.HTTP_200_OK, response.data
+        assert statuses(response) == {'twice@test.com': 'already_invited'}
+
+    def test_queries_do_not_grow_with_the_number_of_addresses(self):
+        organization = create_organization(Organization.ENTERPRISE)
+        # Cached until the organization (or its memberships) change
+        is_active_organization(organization.pk)
+        is_organization_member(organization.pk, organization.user_id)
+
+        def run(count, start):
+            emails = [f'invitee{number}@test.com' for number in range(start, start + count)]
+            with CaptureQueriesContext(connection) as queries:
+                response = bulk(organization, emails)
+            assert response.data['invited'] == count
+            return len(queries)
+
+        assert run(2, 0) == run(30, 2)
+        assert OrganizationMemberInvitation.objects.filter(organization=organization).count() == 32
+
+    def test_invites_only_up_to_the_member_limit(self):
+        organization = create_organization()
+        available = organization.get_available_members()
+
+        response = bulk(organization, [f'invitee{number}@test.com' for number in range(available + 2)])
+
+        assert response.data['invited'] == available
+        assert list(statuses(response).values())[available:] == ['over_limit', 'over_limit']
+
+    def test_requires_the_invitation_permission(self):
+        organization = create_organization()
+        user = get_user_model().objects.create_user(username='member', email='member@test.com')
+        OrganizationMember.objects.create(organization=organization, user=user, status=OrganizationMember.ACTIVE)
+
+        response = bulk(organization, ['new@test.com'], user=user)
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert not OrganizationMemberInvitation.objects.exists()
+
+    def test_single_invitation_checks_deliverability_over_async_dns(self):
+        from email_validator import validate_email as email_validator
+        from rest_framework.exceptions import ValidationError
+        from api.utils.validate_invitation_email import validate_email_invitation
+        organization = create_organization()
+
+        def syntax_only(email, check_deliverability=True, **kwargs):
+            assert not check_deliverability, 'blocking DNS lookup'
+            return email_validator(email, check_deliverability=False, **kwargs)
+
+        with mock.patch('email_validator.validate_email', syntax_only):
+            assert validate_email_invitation('new@Test.com', organization.pk) == 'new@test.com'
+            with pytest.raises(ValidationError):
+                validate_email_invitation('x@nowhere.example.com', organization.pk)
@@ -0,0 +1,102 @@
+import datetime
+import pytest
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.cache import get_data_version, organization_scope
+from org.models import OrganizationMember, OrganizationMemberInvitation
+
+
+def invite(organization, email, status=OrganizationMemberInvitation.PENDING, expires_in=datetime.timedelta(days=1)):
+    return OrganizationMemberInvitation.objects.create(
+        organization=organization, email=email, status=status, expires_at=timezone.now() + expires_in,
+    )
+
+
+def statuses(organization):
+    return dict(OrganizationMemberInvitation.objects.filter(organization=organization).values_list('email', 'status'))
+
+
+@pytest.mark.django_db
+class TestInvitationExpiry:
+    def test_new_invitations_expire_with_their_token(self, organization, settings):
+        invitation = OrganizationMemberInvitation.objects.create(organization=organization, email='new@test.com')
+
+        lifetime = invitation.expires_at - invitation.invited_at
+        assert abs(lifetime.total_seconds() - settings.INVITATION_TOKEN_MAX_AGE) < 5
+        assert not invitation.is_expired
+
+    def test_expire_marks_only_stale_pending_invitations(self, organization, django_capture_on_commit_callbacks):
+        invite(organization, 'stale@test.com', expires_in=-datetime.timedelta(minutes=1))
+        invite(organization, 'fresh@test.com')
+        invite(organization, 'accepted@test.com', OrganizationMemberInvitation.ACCEPTED, -datetime.timedelta(days=1))
+        version = get_data_version(organization_scope(organization.pk))
+
+        with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=True):
+            assert OrganizationMemberInvitation.objects.expire() == 1
+        sweeps = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+        assert len(sweeps) == 1 and 'LIMIT 1000' in sweeps[0]
+
+        assert statuses(organization) == {
+            'stale@test.com': OrganizationMemberInvitation.EXPIRED,
+            'fresh@test.com': OrganizationMemberInvitation.PENDING,
+            'accepted@test.com': OrganizationMemberInvitation.ACCEPTED,
+        }
+        assert get_data_version(organization_scope(organization.pk)) != version
+
+    def test_sweep_command_warns_when_its_metrics_are_not_exported(self, monkeypatch):
+        monkeypatch.delenv('PROMETHEUS_MULTIPROC_DIR', raising=False)
+        err = StringIO()
+
+        call_command('sweep_invitations', stdout=StringIO(), stderr=err)
+
+        assert 'PROMETHEUS_MULTIPROC_DIR is not set' in err.getvalue()
+
+    def test_sweep_command_works_in_bounded_batches(self, organization):
+        for number in range(5):
+            invite(organization, f'stale{number}@test.com', expires_in=-datetime.timedelta(minutes=1))
+        invite(organization, 'old@test.com', OrganizationMemberInvitation.REJECTED, -datetime.timedelta(days=60))
+        invite(organization, 'recent@test.com', OrganizationMemberInvitation.REJECTED, -datetime.timedelta(days=1))
+
+        out = StringIO()
+        call_command('sweep_invitations', '--batch-size', '2', '--max-batches', '2', stdout=out, stderr=StringIO())
+
+        # Two batches of two: one stale invitation is left for the next run
+        assert list(statuses(organization).values()).count(OrganizationMemberInvitation.PENDING) == 1
+        assert 'old@test.com' not in statuses(organization)
+        assert 'recent@test.com' in statuses(organization)
+        assert '4 invitations expired, 1 deleted.' in out.getvalue()
+
+        call_command('sweep_invitations', stdout=StringIO(), stderr=StringIO())
+        assert OrganizationMemberInvitation.PENDING not in statuses(organization).values()
+
+    def test_expired_invitation_can_be_neither_accepted_nor_listed(self, organization):
+        invitee = get_user_model().objects.create_user(username='invitee', email='invitee@test.com')
+        invitation = invite(organization, invitee.email, expires_in=-datetime.timedelta(minutes=1))
+        client = APIClient()
+        client.force_authenticate(user=invitee)
+
+        assert client.get('/api/my-invitations/').data['results'] == []
+        response = client.post('/api/my-invitations/accept/', {'token': invitation.make_token()}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not OrganizationMember.objects.filter(user=invitee).exists()
+
+        response = client.patch(
+            f'/api/organizations/{organization.pk}/invitations/{invitation.pk}/',
+            {'status': OrganizationMemberInvitation.ACCEPTED}, format='json',
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'expired' in response.data['error']
+
+    def test_expired_address_can_be_invited_again(self, organization):
+        invite(organization, 'again@test.com', expires_in=-datetime.timedelta(minutes=1))
+        OrganizationMemberInvitation.objects.expire()
+
+        invite(organization, 'again@test.com')
+
+        assert OrganizationMemberInvitation.objects.filter(email='again@test.com').count() == 2
@@ -0,0 +1,125 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from org.models import OrganizationMember, OrganizationMemberInvitation
+
+
+@pytest.fixture
+def invitee():
+    return get_user_model().objects.create_user(username='invitee', email='Invitee@Test.com')
+
+
+@pytest.fixture
+def invitation(organization, invitee):
+    return OrganizationMemberInvitation.objects.create(
+        organization=organization, email='invitee@test.com', invited_by=organization.user,
+    )
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def statements(queries):
+    return [
+        query['sql'] for query in queries.captured_queries
+        if not query['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT', 'BEGIN', 'COMMIT'))
+    ]
+
+
+@pytest.mark.django_db
+class TestInvitationTokens:
+    def test_token_round_trip(self, invitation):
+        payload = OrganizationMemberInvitation.read_token(invitation.make_token())
+        assert payload == {
+            'organization': str(invitation.organization_id), 'invitation': invitation.pk, 'email': 'invitee@test.com',
+        }
+        assert OrganizationMemberInvitation.read_token(invitation.make_token() + 'x') is None
+
+    def test_expired_token_is_rejected(self, invitation, invitee, settings):
+        token = invitation.make_token()
+        settings.INVITATION_TOKEN_MAX_AGE = -1
+
+        response = client_for(invitee).post('/api/my-invitations/accept/', {'token': token}, format='json')
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'expired' in response.data['error']
+
+    def test_accept_creates_the_membership_in_three_statements(self, invitation, invitee):
+        client = client_for(invitee)
+        token = invitation.make_token()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post('/api/my-invitations/accept/', {'token': token}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK, response.data
+        # Claim the invitation, reserve a member slot, insert the member
+        assert len(statements(queries)) == 3
+        member = OrganizationMember.objects.get(user=invitee)
+        assert response.data == {
+            'organization': str(invitation.organization_id), 'member': member.pk, 'status': OrganizationMemberInvitation.ACCEPTED,
+        }
+        assert member.status == OrganizationMember.ACTIVE and member.joined_at is not None
+        invitation.refresh_from_db()
+        assert invitation.status == OrganizationMemberInvitation.ACCEPTED
+
+        # The token is single use
+        response = client.post('/api/my-invitations/accept/', {'token': token}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert OrganizationMember.objects.filter(user=invitee).count() == 1
+
+    def test_token_of_another_address_is_refused(self, invitation, organization):
+        other = get_user_model().objects.create_user(username='other', email='other@test.com')
+
+        response = client_for(other).post(
+            '/api/my-invitations/accept/', {'token': invitation.make_token()}, format='json',
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert not OrganizationMember.objects.filter(user=other).exists()
+
+    def test_existing_member_keeps_the_invitation_pending(self, invitation, invitee, organization):
+        OrganizationMember.objects.create(organization=organization, user=invitee)
+
+        response = client_for(invitee).post(
+            '/api/my-invitations/accept/', {'token': invitation.make_token()}, format='json',
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'already a member' in response.data['error']
+        invitation.refresh_from_db()
+        assert invitation.status == OrganizationMemberInvitation.PENDING
+
+    def test_reject(self, invitation, invitee):
+        response = client_for(invitee).post(
+            '/api/my-invitations/reject/', {'token': invitation.make_token()}, format='json',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        invitation.refresh_from_db()
+        assert invitation.status == OrganizationMemberInvitation.REJECTED
+        assert not OrganizationMember.objects.filter(user=invitee).exists()
+
+    def test_my_pending_invitations(self, invitation, invitee, organization):
+        OrganizationMemberInvitation.objects.create(
+            organization=organization, email='someone-else@test.com', invited_by=organization.user,
+        )
+
+        response = client_for(invitee).get('/api/my-invitations/')
+
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data['results']
+        assert [result['id'] for result in results] == [invitation.pk]
+        assert results[0]['organization']['name'] == organization.name
+        assert signing.TimestampSigner(salt=OrganizationMemberInvitation.TOKEN_SALT).unsign_object(results[0]['token'])
+
+    def test_lookup_uses_the_lower_email_expression(self):
+        sql = str(OrganizationMemberInvitation.objects.for_email(' Invitee@Test.com ').query)
+        assert 'LOWER(' in sql.upper()
+        assert 'invitee@test.com' in sql
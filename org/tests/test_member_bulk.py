@@ -0,0 +1,178 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.cache import get_data_version, is_active_organization, is_organization_member, organization_scope, permission_catalog
+from core.models import Permission
+from org.models import Organization, OrganizationMember, OrganizationRole
+from org.serializers.org import TransferOwnershipSerializer
+
+
+@pytest.fixture
+def organization(organization):
+    # Room for the members the bulk updates create
+    organization.organization_type = Organization.ENTERPRISE
+    organization.save()
+    return organization
+
+
+@pytest.fixture
+def permissions():
+    return [
+        Permission.objects.create(name=Permission.CREATE_MEMBER_INVITATION),
+        Permission.objects.create(name=Permission.DELETE_MEMBER_INVITATION),
+        Permission.objects.create(name=Permission.EDIT_ORGANIZATION_MEMBER),
+    ]
+
+
+def create_members(organization, count, start=0):
+    User = get_user_model()
+    return [
+        OrganizationMember.objects.create(
+            organization=organization,
+            user=User.objects.create_user(username=f'member{number}', email=f'member{number}@test.com'),
+        )
+        for number in range(start, start + count)
+    ]
+
+
+def bulk(organization, data, user=None):
+    client = APIClient()
+    client.force_authenticate(user=user or organization.user)
+    return client.post(f'/api/organizations/{organization.pk}/members/bulk/', data, format='json')
+
+
+def permission_ids(member):
+    return set(member.permissions.values_list('id', flat=True))
+
+
+@pytest.mark.django_db(transaction=True)
+class TestBulkMemberUpdate:
+    def test_updates_fields_and_permissions_in_constant_queries(self, organization, permissions):
+        few = create_members(organization, 2)
+        many = create_members(organization, 20, start=2)
+        ids = [permission.id for permission in permissions]
+        def run(members):
+            # Cached until the organization (or the catalog) change, which
+            # the previous run did
+            is_active_organization(organization.pk)
+            is_organization_member(organization.pk, organization.user_id)
+            permission_catalog()
+            with CaptureQueriesContext(connection) as queries:
+                response = bulk(organization, {
+                    'members': [member.pk for member in members],
+                    'status': OrganizationMember.ACTIVE,
+                    'is_admin': True,
+                    'grant_permissions': ids[:2],
+                })
+            assert response.status_code == status.HTTP_200_OK, response.data
+            return response, len(queries)
+
+        response, few_queries = run(few)
+        assert response.data == {'members': 2, 'permissions_added': 4, 'permissions_removed': 0, 'permissions_revoked': 0}
+        _, many_queries = run(many)
+        assert many_queries == few_queries
+
+        for member in OrganizationMember.objects.filter(pk__in=[member.pk for member in many]):
+            assert member.status == OrganizationMember.ACTIVE and member.is_admin
+            assert permission_ids(member) == set(ids[:2])
+
+    def test_grant_skips_existing_links_and_revoke_removes(self, organization, permissions):
+        members = create_members(organization, 3)
+        members[0].permissions.add(permissions[0])
+
+        response = bulk(organization, {
+            'members': [member.pk for member in members], 'grant_permissions': [permissions[0].id],
+        })
+        assert response.data['permissions_added'] == 2
+
+        response = bulk(organization, {
+            'members': [members[0].pk, members[1].pk], 'revoke_permissions': [permissions[0].id],
+        })
+        assert response.data['permissions_removed'] == 2
+        assert permission_ids(members[2]) == {permissions[0].id}
+
+    def test_revoke_takes_away_role_permissions_until_granted_again(self, organization, permissions):
+        role = OrganizationRole.objects.create(organization=organization, name='Manager')
+        role.permissions.add(permissions[0])
+        members = create_members(organization, 2)
+        OrganizationMember.objects.filter(pk__in=[member.pk for member in members]).update(role=role)
+        member_ids = [member.pk for member in members]
+
+        response = bulk(organization, {'members': member_ids, 'revoke_permissions': [permissions[0].id]})
+        assert response.data['permissions_removed'] == 0
+        assert response.data['permissions_revoked'] == 2
+        for member in OrganizationMember.objects.filter(pk__in=member_ids):
+            assert permissions[0].name not in member.get_permission_names()
+
+        response = bulk(organization, {'members': member_ids[:1], 'grant_permissions': [permissions[0].id]})
+        assert response.data['permissions_added'] == 1
+        assert permissions[0].name in OrganizationMember.objects.get(pk=member_ids[0]).get_permission_names()
+        assert permissions[0].name not in OrganizationMember.objects.get(pk=member_ids[1]).get_permission_names()
+
+    def test_set_permissions_replaces_the_set(self, organization, permissions):
+        members = create_members(organization, 2)
+        members[0].permissions.add(permissions[0], permissions[1])
+
+        response = bulk(organization, {
+            'members': [member.pk for member in members], 'permissions': [permissions[1].id, permissions[2].id],
+        })
+        assert response.data == {'members': 2, 'permissions_added': 3, 'permissions_removed': 1, 'permissions_revoked': 0}
+        for member in members:
+            assert permission_ids(member) == {permissions[1].id, permissions[2].id}
+
+    def test_bumps_the_organization_version(self, organization, permissions):
+        members = create_members(organization, 2)
+        version = get_data_version(organization_scope(organization.pk))
+
+        bulk(organization, {'members': [member.pk for member in members], 'is_admin': True})
+
+        assert get_data_version(organization_scope(organization.pk)) != version
+
+    def test_rejects_owner_and_foreign_members(self, organization, permissions):
+        owner = OrganizationMember.objects.get(organization=organization, is_owner=True)
+        response = bulk(organization, {'members': [owner.pk], 'is_admin': False})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = bulk(organization, {'members': [owner.pk + 1000], 'is_admin': True})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_rejects_unknown_permissions_and_empty_changes(self, organization, permissions):
+        members = create_members(organization, 1)
+        response = bulk(organization, {'members': [members[0].pk], 'grant_permissions': [999999]})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        response = bulk(organization, {'members': [members[0].pk]})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_requires_edit_member_permission(self, organization, permissions):
+        members = create_members(organization, 2)
+        members[0].status = OrganizationMember.ACTIVE
+        members[0].save()
+
+        response = bulk(organization, {'members': [members[1].pk], 'is_admin': True}, user=members[0].user)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        members[0].permissions.add(permissions[2])
+        response = bulk(organization, {'members': [members[1].pk], 'is_admin': True}, user=members[0].user)
+        assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_transfer_ownership_moves_ownership(organization, permissions):
+    new_owner = create_members(organization, 1)[0]
+    current_owner = OrganizationMember.objects.get(organization=organization, is_owner=True)
+    current_owner.permissions.set(permissions)
+
+    serializer = TransferOwnershipSerializer(data={'email': new_owner.user.email})
+    assert serializer.is_valid(), serializer.errors
+    serializer.transfer_ownership(organization)
+
+    current_owner.refresh_from_db()
+    new_owner.refresh_from_db()
+    assert not current_owner.is_owner and not current_owner.is_admin
+    assert permission_ids(current_owner) == set()
+    assert new_owner.is_owner and new_owner.is_admin
+    assert new_owner.get_permission_names() == {name for name, _ in Permission.PERMISSION_CHOICES}
@@ -0,0 +1,51 @@
+import pytest
+import pytz
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from core.models import Permission
+from org.models import OrganizationMember, OrganizationMemberInvitation
+from org.serializers.member import (
+    InvitedOrganizationMemberProjection, InvitedOrganizationMemberSerializer,
+    OrganizationMemberProjection, OrganizationMemberSerializer,
+)
+
+
+def project(projection_class, queryset, context):
+    projection = projection_class(context=context)
+    return projection.to_representation(projection.project(queryset))
+
+
+@pytest.mark.django_db
+class TestMemberProjections:
+    def test_member_projection_matches_serializer(self, organization):
+        User = get_user_model()
+        member_user = User.objects.create_user(username='member', email='member@test.com', password='testpass')
+        owner = OrganizationMember.objects.get(organization=organization, user=organization.user)
+        owner.joined_at = timezone.now()
+        owner.save()
+        OrganizationMember.objects.create(organization=organization, user=member_user)
+        owner.permissions.set([
+            Permission.objects.create(name=Permission.CREATE_MEMBER_INVITATION),
+            Permission.objects.create(name=Permission.DELETE_MEMBER_INVITATION),
+        ])
+        queryset = OrganizationMember.objects.filter(organization=organization).order_by('id')
+
+        expected = OrganizationMemberSerializer(queryset.prefetch_related('permissions'), many=True).data
+        data = project(OrganizationMemberProjection, queryset, {})
+
+        # Permission order is not defined by either query
+        for item in expected + data:
+            item['permissions'] = sorted(item['permissions'], key=lambda permission: permission['id'])
+        assert data == expected
+
+    def test_invitation_projection_matches_serializer(self, organization):
+        OrganizationMemberInvitation.objects.create(
+            organization=organization, email='first@test.com', invited_by=organization.user,
+        )
+        OrganizationMemberInvitation.objects.create(organization=organization, email='second@test.com')
+        queryset = OrganizationMemberInvitation.objects.filter(organization=organization).order_by('id')
+        context = {'timezone': pytz.timezone('Asia/Tokyo')}
+
+        expected = InvitedOrganizationMemberSerializer(queryset, many=True, context=context).data
+
+        assert project(InvitedOrganizationMemberProjection, queryset, context) == expected
@@ -0,0 +1,142 @@
+import datetime
+import pytest
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from core.models import Permission
+from hr.models import Attendance, Department, Employee, EmploymentDetails, Position
+from org.models import Organization, OrganizationMember, OrganizationMemberInvitation, OrganizationRole, OrganizationUsage
+from org.purge import purge_organization
+from org.serializers.org import RestoreOrganizationSerializer
+
+
+def create_organization(name, number):
+    User = get_user_model()
+    owner = User.objects.create_user(username=f'{name}-owner', email=f'owner@{name}.com')
+    organization = Organization.objects.create(
+        user=owner, name=name, name_space=name, email=f'org@{name}.com',
+        phone=f'+1202555{number:04d}', organization_type=Organization.ENTERPRISE,
+    )
+    OrganizationMember.objects.create(
+        organization=organization, user=owner, status=OrganizationMember.ACTIVE, is_owner=True, is_admin=True,
+    )
+    member = OrganizationMember.objects.create(
+        organization=organization, user=User.objects.create_user(username=f'{name}-member', email=f'member@{name}.com'),
+    )
+    role = OrganizationRole.objects.create(organization=organization, name='Manager')
+    permission, _ = Permission.objects.get_or_create(name=Permission.EDIT_ORGANIZATION_MEMBER)
+    role.permissions.add(permission)
+    member.permissions.add(permission)
+    OrganizationMemberInvitation.objects.create(organization=organization, email=f'invitee@{name}.com')
+
+    department = Department.objects.create(organization=organization, name=f'Sales {name}')
+    position = Position.objects.create(department=department, title=f'Seller {name}')
+    employee = Employee.objects.create(
+        organization=organization, first_name='Ada', last_name='Walker', date_of_birth=datetime.date(1990, 5, 17),
+        gender='F', phone_number=f'+1202556{number:04d}', address='1 Main St',
+    )
+    EmploymentDetails.objects.create(employee=employee, position=position, hire_date=datetime.date(2024, 1, 1))
+    department.manager = employee
+    department.save()
+    for day in range(5):
+        Attendance.objects.create(
+            organization=organization, employee=employee, date=datetime.date(2024, 1, 1 + day),
+            time_in=datetime.time(9), status='present',
+        )
+    return organization
+
+
+def deactivate(organization, days_ago):
+    organization.soft_delete()
+    Organization.all_objects.filter(pk=organization.pk).update(
+        deactivated_at=timezone.now() - datetime.timedelta(days=days_ago),
+    )
+
+
+@pytest.mark.django_db
+class TestOrganizationPurge:
+    def test_purges_table_by_table_in_batches(self):
+        doomed = create_organization('doomed', 1)
+        kept = create_organization('kept', 2)
+        deactivate(doomed, days_ago=60)
+
+        out = StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('purge_organizations', '--batch-size', '2', '--pause', '0', stdout=out, stderr=StringIO())
+
+        assert not Organization.all_objects.filter(pk=doomed.pk).exists()
+        assert not Attendance.objects.filter(organization_id=doomed.pk).exists()
+        assert not Employee.objects.filter(organization_id=doomed.pk).exists()
+        assert not OrganizationMember.objects.filter(organization_id=doomed.pk).exists()
+        assert not OrganizationUsage.objects.filter(organization_id=doomed.pk).exists()
+        assert 'hr_attendance 5' in out.getvalue()
+
+        # Five attendance rows, two per statement
+        deletes = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('DELETE FROM "hr_attendance"')]
+        assert len(deletes) == 3
+
+        assert Attendance.objects.filter(organization=kept).count() == 5
+        assert OrganizationMember.objects.filter(organization=kept).count() == 2
+        assert OrganizationRole.objects.get(organization=kept).permissions.count() == 1
+
+    def test_recent_and_active_organizations_are_kept(self):
+        recent = create_organization('recent', 3)
+        deactivate(recent, days_ago=1)
+        active = create_organization('active', 4)
+
+        call_command('purge_organizations', stdout=StringIO(), stderr=StringIO())
+
+        assert Organization.all_objects.filter(pk__in=[recent.pk, active.pk]).count() == 2
+        with pytest.raises(CommandError):
+            call_command('purge_organizations', '--organization', str(recent.pk), stdout=StringIO(), stderr=StringIO())
+
+    def test_interrupted_purge_resumes(self):
+        organization = create_organization('resumed', 5)
+        deactivate(organization, days_ago=60)
+
+        def interrupt(model, rows, duration):
+            raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            purge_organization(organization.pk, batch_size=2, on_batch=interrupt)
+        assert Attendance.objects.filter(organization=organization).count() == 3
+
+        deleted = purge_organization(organization.pk, batch_size=2)
+
+        assert deleted['hr_attendance'] == 3
+        assert not Organization.all_objects.filter(pk=organization.pk).exists()
+
+    def test_restore_during_the_purge_stops_it(self):
+        organization = create_organization('reactivated', 7)
+        deactivate(organization, days_ago=60)
+
+        def restore(model, rows, duration):
+            Organization.all_objects.filter(pk=organization.pk).update(is_active=True, deactivated_at=None)
+
+        with pytest.raises(ValueError):
+            purge_organization(organization.pk, batch_size=2, on_batch=restore)
+
+        assert Attendance.objects.filter(organization=organization).count() == 0
+        assert Department.objects.filter(organization=organization).exists()
+        assert Organization.objects.filter(pk=organization.pk).exists()
+
+    def test_destroy_records_when_and_restore_stops_at_retention(self):
+        organization = create_organization('restored', 6)
+        client = APIClient()
+        client.force_authenticate(user=organization.user)
+
+        response = client.delete(f'/api/organizations/{organization.pk}/')
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert Organization.all_objects.get(pk=organization.pk).deactivated_at is not None
+
+        deactivate(organization, days_ago=60)
+        serializer = RestoreOrganizationSerializer(context={'request': response.wsgi_request})
+        with pytest.raises(ValidationError, match='too long ago'):
+            serializer.validate_email(organization.email)
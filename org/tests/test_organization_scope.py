@@ -0,0 +1,71 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from api.cache import is_active_organization
+from org.models import Organization
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOrganizationScope:
+    def test_active_check_is_cached_per_organization(self, organization):
+        assert is_active_organization(organization.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            assert is_active_organization(str(organization.pk).upper())
+        assert len(queries) == 0
+        assert not is_active_organization('not-a-uuid')
+
+    def test_other_organizations_writes_keep_the_flag_cached(self, organization):
+        assert is_active_organization(organization.pk)
+        other_owner = get_user_model().objects.create_user(username='other', email='other@test.com')
+        other = Organization.objects.create(
+            user=other_owner, name='Other Org', name_space='other-org', email='other-org@test.com',
+            phone='+12025550124', organization_type=Organization.TEAM,
+        )
+        other.soft_delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            assert is_active_organization(organization.pk)
+            assert not is_active_organization(other.pk)
+        # Only the deactivated organization is read again
+        assert len(queries) == 1
+
+    def test_nested_routes_of_a_deactivated_organization_are_not_found(self, organization):
+        client = client_for(organization.user)
+        url = f'/api/organizations/{organization.pk}/departments/'
+        assert client.get(url).status_code == status.HTTP_200_OK
+
+        organization.soft_delete()
+
+        for path in ('departments', 'employees', 'members', 'invitations', 'roles'):
+            response = client.get(f'/api/organizations/{organization.pk}/{path}/')
+            assert response.status_code == status.HTTP_404_NOT_FOUND, path
+        response = client.post(url, {'name': 'Sales'}, format='json')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+        organization.is_active = True
+        organization.save()
+        assert client.get(url).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_case_insensitive_lookups_use_the_lower_indexes(organization):
+    organization.tax_id = 'AB-123'
+    organization.save()
+    queryset = Organization.objects.iexact('tax_id', 'ab-123')
+
+    sql = str(queryset.query).upper()
+    assert 'LOWER(' in sql and 'UPPER(' not in sql
+    assert list(queryset) == [organization]
+
+    organization.soft_delete()
+    assert not Organization.objects.iexact('name', 'TEST ORG').exists()
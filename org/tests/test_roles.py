@@ -0,0 +1,130 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from core.models import Permission
+from org.models import Organization, OrganizationMember, OrganizationRole
+from org.serializers.org import CreateOrganizationSerializer
+
+
+@pytest.fixture
+def permissions():
+    return {
+        name: Permission.objects.create(name=name)
+        for name in (
+            Permission.CREATE_MEMBER_INVITATION,
+            Permission.DELETE_MEMBER_INVITATION,
+            Permission.EDIT_ORGANIZATION_MEMBER,
+        )
+    }
+
+
+@pytest.fixture
+def member(organization):
+    user = get_user_model().objects.create_user(username='member', email='member@test.com')
+    return OrganizationMember.objects.create(organization=organization, user=user, status=OrganizationMember.ACTIVE)
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRoles:
+    def test_effective_permissions_apply_role_grants_and_revocations(self, organization, permissions, member):
+        role = OrganizationRole.objects.create(organization=organization, name='Manager')
+        role.permissions.add(permissions[Permission.CREATE_MEMBER_INVITATION], permissions[Permission.DELETE_MEMBER_INVITATION])
+        member.role = role
+        member.save()
+        member.permissions.add(permissions[Permission.EDIT_ORGANIZATION_MEMBER])
+        member.revoked_permissions.add(permissions[Permission.DELETE_MEMBER_INVITATION])
+
+        response = client_for(organization.user).get(
+            f'/api/organizations/{organization.pk}/members/{member.pk}/effective-permissions/'
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['permissions'] == sorted([
+            Permission.CREATE_MEMBER_INVITATION, Permission.EDIT_ORGANIZATION_MEMBER,
+        ])
+
+    def test_editing_a_role_changes_its_members_in_one_write(self, organization, permissions, member):
+        role = OrganizationRole.objects.create(organization=organization, name='Manager')
+        member.role = role
+        member.save()
+        assert Permission.EDIT_ORGANIZATION_MEMBER not in member.get_permission_names()
+
+        with CaptureQueriesContext(connection) as queries:
+            role.permissions.add(permissions[Permission.EDIT_ORGANIZATION_MEMBER])
+        assert not any('Org_Member_permissions' in query['sql'] for query in queries.captured_queries)
+
+        assert Permission.EDIT_ORGANIZATION_MEMBER in OrganizationMember.objects.get(pk=member.pk).get_permission_names()
+
+    def test_role_grants_endpoint_access(self, organization, permissions, member):
+        other = OrganizationMember.objects.create(
+            organization=organization,
+            user=get_user_model().objects.create_user(username='other', email='other@test.com'),
+        )
+        url = f'/api/organizations/{organization.pk}/members/{other.pk}/'
+        response = client_for(member.user).patch(url, {'is_admin': True}, format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        role = OrganizationRole.objects.create(organization=organization, name='Manager')
+        role.permissions.add(permissions[Permission.EDIT_ORGANIZATION_MEMBER])
+        OrganizationMember.objects.filter(pk=member.pk).update(role=role)
+
+        response = client_for(member.user).patch(url, {'is_admin': True}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_create_and_assign_role(self, organization, permissions, member):
+        client = client_for(organization.user)
+        response = client.post(f'/api/organizations/{organization.pk}/roles/', {
+            'name': 'Recruiter', 'permissions': [permissions[Permission.CREATE_MEMBER_INVITATION].id],
+        }, format='json')
+        assert response.status_code == status.HTTP_201_CREATED
+        assert [permission['name'] for permission in response.data['permissions']] == [Permission.CREATE_MEMBER_INVITATION]
+
+        response = client.post(f'/api/organizations/{organization.pk}/roles/', {'name': 'recruiter'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+        role_id = OrganizationRole.objects.get(organization=organization).pk
+        response = client.post(f'/api/organizations/{organization.pk}/members/bulk/', {
+            'members': [member.pk], 'role': role_id,
+        }, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert OrganizationMember.objects.get(pk=member.pk).role_id == role_id
+
+    def test_role_of_another_organization_is_rejected(self, organization, member):
+        owner = get_user_model().objects.create_user(username='elsewhere', email='elsewhere@test.com')
+        elsewhere = Organization.objects.create(
+            user=owner, name='Other Org', name_space='other-org', email='other@test.com', phone='+12025550124',
+        )
+        role = OrganizationRole.objects.create(organization=elsewhere, name='Manager')
+
+        response = client_for(organization.user).patch(
+            f'/api/organizations/{organization.pk}/members/{member.pk}/', {'role': role.pk}, format='json',
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_members_cannot_create_roles_without_permission(self, organization, member):
+        response = client_for(member.user).post(
+            f'/api/organizations/{organization.pk}/roles/', {'name': 'Sneaky'}, format='json',
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert not OrganizationRole.objects.exists()
+
+
+@pytest.mark.django_db
+def test_new_organization_owner_gets_no_permission_rows():
+    user = get_user_model().objects.create_user(username='founder', email='founder@test.com')
+    serializer = CreateOrganizationSerializer(context={'user_id': user.pk})
+    serializer.create({'name': 'Founded', 'name_space': 'founded', 'phone': '+12025550125', 'email': 'founded@test.com'})
+
+    owner = OrganizationMember.objects.get(user=user)
+    assert owner.is_owner
+    assert not owner.permissions.exists()
+    assert owner.get_permission_names() == {name for name, _ in Permission.PERMISSION_CHOICES}
@@ -0,0 +1,104 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from api.tenant import TenantContext
+from hr.models import Department
+from hr.views import DepartmentModelViewset
+from org.models import OrganizationMember, OrganizationMemberInvitation, OrganizationRole
+
+
+@pytest.fixture
+def organization(organization):
+    Department.objects.create(organization=organization, name='Sales')
+    return organization
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db
+class TestTenantContext:
+    def test_other_organizations_are_not_found(self, organization):
+        outsider = get_user_model().objects.create_user(username='outsider', email='outsider@test.com')
+        client = client_for(outsider)
+
+        for path in ('departments', 'positions', 'employees', 'attendances', 'members', 'invitations', 'roles'):
+            response = client.get(f'/api/organizations/{organization.pk}/{path}/')
+            assert response.status_code == status.HTTP_404_NOT_FOUND, path
+
+        department = Department.objects.get(organization=organization)
+        response = client.get(f'/api/organizations/{organization.pk}/departments/{department.pk}/')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_members_read_their_organization(self, organization):
+        member = get_user_model().objects.create_user(username='member', email='member@test.com')
+        OrganizationMember.objects.create(organization=organization, user=member, status=OrganizationMember.ACTIVE)
+
+        response = client_for(member).get(f'/api/organizations/{organization.pk}/departments/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [department['name'] for department in response.data] == ['Sales']
+
+    def test_inactive_members_are_not_found(self, organization):
+        member = get_user_model().objects.create_user(username='member', email='member@test.com')
+        OrganizationMember.objects.create(organization=organization, user=member, status=OrganizationMember.INACTIVE)
+
+        response = client_for(member).get(f'/api/organizations/{organization.pk}/departments/')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        tenant = TenantContext(organization.pk)
+        assert tenant.get_member(member) is not None
+        assert not tenant.is_member(member)
+
+    def test_invitees_answer_their_invitation(self, organization):
+        invitee = get_user_model().objects.create_user(username='invitee', email='invitee@test.com')
+        invitation = OrganizationMemberInvitation.objects.create(organization=organization, email=invitee.email)
+
+        response = client_for(invitee).patch(
+            f'/api/organizations/{organization.pk}/invitations/{invitation.pk}/',
+            {'status': OrganizationMemberInvitation.ACCEPTED}, format='json',
+        )
+
+        assert response.status_code == status.HTTP_200_OK
+        assert OrganizationMember.objects.filter(organization=organization, user=invitee).exists()
+
+    def test_organization_and_membership_are_read_once(self, organization):
+        tenant = TenantContext(str(organization.pk).upper())
+        assert tenant.is_for(organization.pk)
+        assert tenant.organization == organization
+        assert tenant.get_member(organization.user).is_owner
+
+        with CaptureQueriesContext(connection) as queries:
+            assert tenant.organization == organization
+            assert tenant.get_member(organization.user).is_owner
+            assert tenant.is_member(organization.user)
+        assert len(queries) == 0
+
+    def test_writes_reuse_the_tenant_organization(self, organization):
+        client = client_for(organization.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(f'/api/organizations/{organization.pk}/roles/', {'name': 'Manager'}, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert OrganizationRole.objects.filter(organization=organization, name='Manager').exists()
+        organization_reads = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "org_organization"' in query['sql']
+        ]
+        assert len(organization_reads) <= 1
+
+    def test_views_called_without_the_middleware_build_their_tenant(self, organization):
+        request = APIRequestFactory().get(f'/api/organizations/{organization.pk}/departments/')
+        force_authenticate(request, user=organization.user)
+
+        response = DepartmentModelViewset.as_view({'get': 'list'})(request, organization_pk=str(organization.pk))
+
+        assert response.status_code == status.HTTP_200_OK
+        assert [department['name'] for department in response.data] == ['Sales']
@@ -0,0 +1,147 @@
+import datetime
+import pytest
+from io import StringIO
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from hr.models import Department, Employee, Position
+from org.models import (
+    Organization, OrganizationMember, OrganizationMemberInvitation, OrganizationUsage, UsageLimitExceeded,
+)
+
+
+def create_organization(organization_type=Organization.TEAM):
+    owner = get_user_model().objects.create_user(username='owner', email='owner@test.com', password='testpass')
+    organization = Organization.objects.create(
+        user=owner, name='Usage Org', name_space='usage-org', email='org@test.com',
+        phone='+12025550123', organization_type=organization_type,
+    )
+    OrganizationMember.objects.create(
+        organization=organization, user=owner, status=OrganizationMember.ACTIVE, is_owner=True, is_admin=True,
+    )
+    return organization
+
+
+def create_member(organization, username):
+    user = get_user_model().objects.create_user(username=username, email=f'{username}@test.com')
+    return OrganizationMember.objects.create(organization=organization, user=user)
+
+
+def usage(organization):
+    return OrganizationUsage.objects.get(organization=organization)
+
+
+@pytest.mark.django_db
+class TestUsageCounters:
+    def test_counters_follow_inserts_and_deletes(self):
+        organization = create_organization()
+        member = create_member(organization, 'member')
+        department = Department.objects.create(organization=organization, name='Sales')
+        Position.objects.create(department=department, title='Seller')
+        Employee.objects.create(
+            organization=organization, first_name='Ada', last_name='Walker', date_of_birth=datetime.date(1990, 5, 17),
+            gender='F', phone_number='+12025550199', address='1 Main St',
+        )
+        counts = usage(organization)
+        assert (counts.members, counts.departments, counts.positions, counts.employees) == (2, 1, 1, 1)
+
+        member.delete()
+        department.delete()
+        counts = usage(organization)
+        assert (counts.members, counts.departments, counts.positions) == (1, 0, 0)
+
+    def test_member_limit_is_enforced_before_the_insert(self):
+        organization = create_organization(Organization.SOLO)
+
+        with pytest.raises(UsageLimitExceeded):
+            create_member(organization, 'extra')
+
+        assert OrganizationMember.objects.filter(organization=organization).count() == 1
+        assert usage(organization).members == 1
+        assert not organization.can_add_member()
+        assert organization.get_available_members() == 0
+
+    def test_member_reservation_checks_the_counter_on_its_own_row(self):
+        organization = create_organization(Organization.TEAM)
+
+        with CaptureQueriesContext(connection) as queries:
+            create_member(organization, 'member')
+
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "Org_Usage"')]
+        # A concurrent reservation's committed count is only re-checked on
+        # the updated row itself, not through an `id IN (SELECT ...)`
+        assert len(updates) == 1
+        assert 'IN (SELECT' not in updates[0].upper()
+        assert '"Org_Usage"."members" <=' in updates[0]
+        assert usage(organization).members == 2
+
+    def test_failed_member_insert_releases_its_reservation(self):
+        organization = create_organization(Organization.TEAM)
+
+        with pytest.raises(IntegrityError):
+            OrganizationMember.objects.create(organization=organization, user=organization.user)
+
+        assert usage(organization).members == 1
+
+    def test_cascades_read_the_organization_once(self):
+        organization = create_organization()
+        departments = [Department.objects.create(organization=organization, name=f'Sales {n}') for n in range(2)]
+        for department in departments:
+            for n in range(3):
+                Position.objects.create(department=department, title=f'Seller {department.pk}-{n}')
+        department_reads = lambda queries: [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'FROM "hr_department"' in query['sql']
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            Department.objects.get(pk=departments[0].pk).delete()
+        assert department_reads(queries) == [queries.captured_queries[0]]
+
+        with CaptureQueriesContext(connection) as queries:
+            Department.objects.filter(organization=organization).delete()
+        # The deleted departments, then their organizations
+        assert len(department_reads(queries)) == 2
+        assert usage(organization).positions == 0
+
+    def test_accepting_an_invitation_over_the_limit_is_rejected(self):
+        organization = create_organization(Organization.SOLO)
+        invitee = get_user_model().objects.create_user(username='invitee', email='invitee@test.com')
+        invitation = OrganizationMemberInvitation.objects.create(organization=organization, email=invitee.email)
+
+        client = APIClient()
+        client.force_authenticate(user=invitee)
+        response = client.patch(
+            f'/api/organizations/{organization.pk}/invitations/{invitation.pk}/',
+            {'status': OrganizationMemberInvitation.ACCEPTED}, format='json',
+        )
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'member limit' in response.data['error']
+        assert not OrganizationMember.objects.filter(user=invitee).exists()
+        invitation.refresh_from_db()
+        assert invitation.status == OrganizationMemberInvitation.PENDING
+
+    def test_missing_counters_are_recounted_on_first_use(self):
+        organization = create_organization()
+        OrganizationUsage.objects.filter(organization=organization).delete()
+
+        create_member(organization, 'member')
+
+        assert usage(organization).members == 2
+
+    def test_reconcile_command_repairs_drift(self):
+        organization = create_organization()
+        create_member(organization, 'member')
+        OrganizationUsage.objects.filter(organization=organization).update(members=9, departments=4)
+
+        out = StringIO()
+        call_command('reconcile_usage', stdout=out)
+
+        counts = usage(organization)
+        assert (counts.members, counts.departments) == (2, 0)
+        assert 'members 9 -> 2' in out.getvalue()
+        assert '1 repaired' in out.getvalue()
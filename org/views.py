@@ -1,8 +1,10 @@
 from django.db import transaction
+from django.db.models import Count, Q
 from django.utils.translation import gettext_lazy as _
 from rest_framework import mixins
 
-from api.mixins import TimezoneMixin
+from api.mixins import AsyncViewMixin, OrganizationScopeMixin, TimezoneMixin, ConditionalGetMixin, CachedResponseMixin, ProjectionMixin, ReplicaReadMixin
+from api.cache import user_scope
 from org.serializers.org import (
     OrganizationSerializer, UpdateOrganizationSerializer,
     TransferOwnershipSerializer, Organization, SimpleOrganizationSerializer,
@@ -10,15 +12,27 @@ from org.serializers.org import (
 )
 
 from org.serializers.member import (
+    BulkInviteOrganizationMemberSerializer,
+    BulkUpdateOrganizationMemberSerializer,
+    InvitationTokenSerializer,
+    MyInvitationSerializer,
     UpdateInviteOrganizationMemberSerializer,
     CreateInviteOrganizationMemberSerializer,
     InvitedOrganizationMemberSerializer,
+    InvitedOrganizationMemberProjection,
     OrganizationMember,
     OrganizationMemberInvitation,
     OrganizationMemberSerializer,
+    OrganizationMemberProjection,
     UpdateOrganizationMemberSerializer,
     
 )
+from org.serializers.role import (
+    CreateOrganizationRoleSerializer,
+    OrganizationRole,
+    OrganizationRoleProjection,
+    OrganizationRoleSerializer,
+)
 from rest_framework import viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.permissions import IsAuthenticated
@@ -32,11 +46,17 @@ from org.filters import OrganizationFilter
 from api.permission import OrganizationPermission
 
 
-class MyOrganizationViewSet(viewsets.GenericViewSet, mixins.RetrieveModelMixin, mixins.ListModelMixin):
+class MyOrganizationViewSet(AsyncViewMixin, ReplicaReadMixin, ConditionalGetMixin, CachedResponseMixin, viewsets.GenericViewSet, mixins.RetrieveModelMixin, mixins.ListModelMixin):
     permission_classes = [IsAuthenticated]
     
     pagination_class = CustomPagination
 
+    def get_cache_scope(self):
+        return user_scope(self.request.user.id)
+    
+    def get_cache_fingerprint(self, version):
+        # The scope is already the caller
+        return ''
     
     def get_queryset(self):
         user_id = self.request.user.id
@@ -47,10 +67,13 @@ class MyOrganizationViewSet(viewsets.GenericViewSet, mixins.RetrieveModelMixin,
     
 
 
-class OrganizationViewSet(TimezoneMixin, viewsets.ModelViewSet):
+class OrganizationViewSet(AsyncViewMixin, ReplicaReadMixin, ConditionalGetMixin, CachedResponseMixin, TimezoneMixin, viewsets.ModelViewSet):
     """
     API endpoint for companies with optimized queries.
     """
+    # The list depends on every organization the caller belongs to
+    cache_actions = ('retrieve',)
+    cache_scope_kwarg = 'pk'
     pagination_class = CustomPagination
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     search_fields = ['name', 'email', 'tax_id']
@@ -68,12 +91,11 @@ class OrganizationViewSet(TimezoneMixin, viewsets.ModelViewSet):
             ).distinct()
         else:
             # Optimize with select_related and prefetch_related to avoid N+1 queries
+            # role is computed from the prefetched members, member_count read from usage
             return Organization.objects.prefetch_related(
                 'members',
-                'members__user',
-                'members__permissions'
             ).select_related(
-                # Add any direct foreign key relationships here if needed
+                'usage',
             ).filter(
                 id=self.kwargs.get('pk'),
                 members__user=user,
@@ -82,6 +104,20 @@ class OrganizationViewSet(TimezoneMixin, viewsets.ModelViewSet):
 
 
     
+    def get_validator_state(self):
+        state = super().get_validator_state()
+        if self.action == 'retrieve':
+            # member_count and role are part of the detail payload
+            user = self.request.user
+            state.update(OrganizationMember.objects.filter(
+                organization_id=self.kwargs.get('pk')
+            ).aggregate(
+                member_count=Count('pk'),
+                is_owner=Count('pk', filter=Q(user=user, is_owner=True)),
+                is_admin=Count('pk', filter=Q(user=user, is_admin=True)),
+            ))
+        return state
+
     def get_permissions(self):
         if self.action in ['update', 'partial_update']:
             return [IsAuthenticated(), OrganizationPermission(Permission.EDIT_ORGANIZATION)]
@@ -156,8 +192,7 @@ class OrganizationViewSet(TimezoneMixin, viewsets.ModelViewSet):
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance.is_active = False
-        instance.save()
+        instance.soft_delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
     
     @action(detail=False, methods=['post'], url_path='restore', permission_classes=[IsAuthenticated])
@@ -195,6 +230,10 @@ class OrganizationViewSet(TimezoneMixin, viewsets.ModelViewSet):
 
 
 class OrganizationMemberViewSet(
+    AsyncViewMixin,
+    OrganizationScopeMixin,
+    ReplicaReadMixin,
+    ProjectionMixin,
     viewsets.GenericViewSet,
     mixins.ListModelMixin,
     mixins.DestroyModelMixin,
@@ -207,9 +246,11 @@ class OrganizationMemberViewSet(
     pagination_class = CustomPagination
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     search_fields = ['user__email', 'user__first_name', 'user__last_name']
+    projection_classes = {'list': OrganizationMemberProjection}
+    query_budget = {'list': 6, 'retrieve': 6}
     
     def get_permissions(self):
-        if self.action in ['update', 'partial_update']:
+        if self.action in ['update', 'partial_update', 'bulk']:
             return [IsAuthenticated(), OrganizationPermission(Permission.EDIT_ORGANIZATION_MEMBER)]
         elif self.action == 'destroy':
             return [IsAuthenticated(), OrganizationPermission(Permission.DELETE_ORGANIZATION_MEMBER)]
@@ -217,6 +258,8 @@ class OrganizationMemberViewSet(
     
     
     def get_serializer_class(self):
+        if self.action == 'bulk':
+            return BulkUpdateOrganizationMemberSerializer
         if self.request.method in ['PATCH', 'PUT']:
             return UpdateOrganizationMemberSerializer
         return OrganizationMemberSerializer
@@ -224,16 +267,13 @@ class OrganizationMemberViewSet(
     def get_queryset(self):
         # Optimize query with select_related and prefetch_related
         return OrganizationMember.objects.filter(
-            organization_id=self.kwargs['organization_pk']
+            organization_id=self.tenant.organization_id
         ).select_related(
-            'user', 'organization'
+            'user', 'organization', 'role'
         ).prefetch_related(
-            'permissions'
+            'permissions', 'revoked_permissions'
         )
     
-    def get_serializer_context(self):
-        return {'organization_id': self.kwargs['organization_pk']}
-    
     def get_filterset_kwargs(self):
         kwargs = super().get_filterset_kwargs()
         kwargs['request'] = self.request
@@ -257,19 +297,43 @@ class OrganizationMemberViewSet(
             
         with transaction.atomic():
             # Delete associated invitation if it exists
-            OrganizationMemberInvitation.objects.filter(
+            OrganizationMemberInvitation.objects.for_email(instance.user.email).filter(
                 organization=instance.organization,
-                email__iexact=instance.user.email
             ).delete()
             
             # Delete the member
             return super().perform_destroy(instance)
 
+    @action(detail=True, methods=['get'], url_path='effective-permissions')
+    def effective_permissions(self, request, organization_pk=None, pk=None):
+        """
+        The permissions the member ends up with: role, grants and revocations applied.
+        """
+        member = self.get_object()
+        return Response({'permissions': sorted(member.get_permission_names())})
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, organization_pk=None):
+        """
+        Update the status, admin flag and permissions of many members at once.
+        """
+        organization = self.tenant.organization
+        # Not a detail route: DRF does not run the object check by itself
+        self.check_object_permissions(request, organization)
 
-class OrganizationMemberInvitationViewSet(TimezoneMixin,viewsets.ModelViewSet):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response(serializer.save(), status=status.HTTP_200_OK)
+
+
+class OrganizationMemberInvitationViewSet(AsyncViewMixin, OrganizationScopeMixin, ReplicaReadMixin, TimezoneMixin, ProjectionMixin, viewsets.ModelViewSet):
     pagination_class = CustomPagination
     filter_backends = [filters.SearchFilter, DjangoFilterBackend]
     search_fields = ['email']
+    projection_classes = {'list': InvitedOrganizationMemberProjection}
+    query_budget = {'list': 6, 'retrieve': 6}
+    # Invitees are not members yet: they answer their invitation with a PATCH
+    non_member_actions = ('update', 'partial_update')
     
     def get_permissions(self):
         if self.request.method in ['POST']:
@@ -283,10 +347,12 @@ class OrganizationMemberInvitationViewSet(TimezoneMixin,viewsets.ModelViewSet):
     def get_queryset(self):
         # Optimize query with select_related
         return OrganizationMemberInvitation.objects.filter(
-            organization_id=self.kwargs['organization_pk']
+            organization_id=self.tenant.organization_id
         ).select_related('organization', 'invited_by')
     
     def get_serializer_class(self):
+        if self.action == 'bulk':
+            return BulkInviteOrganizationMemberSerializer
         if self.request.method == 'POST':
             return  CreateInviteOrganizationMemberSerializer
         elif self.request.method in ['PATCH', 'PUT']:
@@ -310,13 +376,92 @@ class OrganizationMemberInvitationViewSet(TimezoneMixin,viewsets.ModelViewSet):
         serializer.save()
     
 
-    def get_serializer_context(self):
-        # Get the context from the parent class (including timezone)
-        context = super().get_serializer_context()
-        # Add your custom context
-        context['organization_id'] = self.kwargs['organization_pk']
-        return context
-    
-    
-    
-    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, organization_pk=None):
+        """
+        Invite many email addresses at once, with a result per address.
+        """
+        organization = self.tenant.organization
+        self.check_object_permissions(request, organization)
+
+        serializer = self.get_serializer(data=request.data, context={
+            **self.get_serializer_context(), 'organization': organization,
+        })
+        serializer.is_valid(raise_exception=True)
+        results = serializer.save()
+        invited = sum(result['status'] == BulkInviteOrganizationMemberSerializer.INVITED for result in results)
+        return Response({'invited': invited, 'results': results}, status=status.HTTP_200_OK)
+
+
+
+class MyInvitationViewSet(AsyncViewMixin, ReplicaReadMixin, viewsets.GenericViewSet, mixins.ListModelMixin):
+    """
+    Pending invitations sent to the current user's email, and accepting or
+    rejecting one with its signed token.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = CustomPagination
+    query_budget = {'list': 6}
+
+    def get_queryset(self):
+        return OrganizationMemberInvitation.objects.for_email(
+            self.request.user.email or ''
+        ).pending().select_related('organization', 'invited_by').order_by('-invited_at')
+
+    def get_serializer_class(self):
+        if self.action in ['accept', 'reject']:
+            return InvitationTokenSerializer
+        return MyInvitationSerializer
+
+    @action(detail=False, methods=['post'])
+    def accept(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        member = serializer.accept()
+        return Response(
+            {'organization': str(member.organization_id), 'member': member.pk, 'status': OrganizationMemberInvitation.ACCEPTED},
+            status=status.HTTP_200_OK,
+        )
+
+    @action(detail=False, methods=['post'])
+    def reject(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.reject()
+        return Response({'status': OrganizationMemberInvitation.REJECTED}, status=status.HTTP_200_OK)
+
+
+class OrganizationRoleViewSet(AsyncViewMixin, OrganizationScopeMixin, ReplicaReadMixin, ProjectionMixin, viewsets.ModelViewSet):
+    """
+    Role templates of an organization: named permission sets assigned to members.
+    """
+    pagination_class = CustomPagination
+    filter_backends = [filters.SearchFilter]
+    search_fields = ['name']
+    projection_classes = {'list': OrganizationRoleProjection}
+    query_budget = {'list': 6, 'retrieve': 6}
+
+    def get_permissions(self):
+        if self.action == 'create':
+            return [IsAuthenticated(), OrganizationPermission(Permission.CREATE_ORGANIZATION_ROLE)]
+        elif self.action in ['update', 'partial_update']:
+            return [IsAuthenticated(), OrganizationPermission(Permission.EDIT_ORGANIZATION_ROLE)]
+        elif self.action == 'destroy':
+            return [IsAuthenticated(), OrganizationPermission(Permission.DELETE_ORGANIZATION_ROLE)]
+        return [IsAuthenticated()]
+
+    def get_queryset(self):
+        return OrganizationRole.objects.filter(
+            organization_id=self.tenant.organization_id
+        ).prefetch_related('permissions').order_by('name')
+
+    def get_serializer_class(self):
+        if self.action in ['create', 'update', 'partial_update']:
+            return CreateOrganizationRoleSerializer
+        return OrganizationRoleSerializer
+
+    def perform_create(self, serializer):
+        organization = self.tenant.organization
+        # There is no object yet: check the permission against the organization
+        self.check_object_permissions(self.request, organization)
+        serializer.save()
@@ -15,3 +15,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'svcs.settings.prod')
 
 application = get_asgi_application()
 
+from api.warmup import warm_up  # noqa: E402 (needs the app registry loaded above)
+
+warm_up()
+
@@ -0,0 +1,10 @@
+# gunicorn -c svcs/gunicorn.conf.py svcs.wsgi
+#
+# With PROMETHEUS_MULTIPROC_DIR set, workers share their metrics through
+# files in that directory (see api/metrics.py). The directory must be
+# emptied before gunicorn starts, and a dead worker's live gauges removed.
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,6 +1,6 @@
 from pathlib import Path
 import os
-from decouple import config
+from decouple import Csv, config
 from urllib.parse import urlparse
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -15,7 +15,6 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
-    'debug_toolbar',
     'phonenumber_field',
     'django_filters',
     'api',
@@ -25,16 +24,21 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestIdMiddleware',
+    'api.middleware.MetricsMiddleware',
+    'api.middleware.ServerTimingMiddleware',
+    'api.middleware.QueryBudgetMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'api.middleware.StaticFilesMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.TenantContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'api.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'svcs.urls'
@@ -112,17 +116,88 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "core.authentication.ClerkAuthentication",
     ),
-    # 'DEFAULT_RENDERER_CLASSES': [
-    #     'api.renderers.TimezoneAwareJSONRenderer',
-    #     'rest_framework.renderers.BrowsableAPIRenderer',
-    # ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.TimezoneAwareJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
 
 
-INTERNAL_IPS = [
-    "127.0.0.1",
-]
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Data versions and cached responses must be shared between workers,
+# use Redis whenever it is available.
+REDIS_URL = config('REDIS_URL', default=None)
+if REDIS_URL:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+
+# Response, query and authorization caching, and replica reads (whose
+# read-your-writes pin is kept in the cache) need a cache every worker
+# shares: they are off unless this is set, which it is with Redis.
+# `manage.py check --deploy` fails when it is set on a per-process cache.
+SHARED_CACHE = config('SHARED_CACHE', default=bool(REDIS_URL), cast=bool)
+
+DATABASE_ROUTERS = ['api.db.routers.ReplicaRouter']
+DATABASE_REPLICA_PIN_SECONDS = config('DATABASE_REPLICA_PIN_SECONDS', default=10, cast=int)
+
+# Requests running more queries than their view's `query_budget` (or this
+# default), or the same query shape QUERY_REPEAT_THRESHOLD times, are logged.
+QUERY_BUDGET_DEFAULT = config('QUERY_BUDGET_DEFAULT', default=30, cast=int)
+QUERY_REPEAT_THRESHOLD = config('QUERY_REPEAT_THRESHOLD', default=5, cast=int)
+QUERY_COUNT_HEADERS = config('QUERY_COUNT_HEADERS', default=False, cast=bool)
+
+# Per-phase Server-Timing header on every response
+SERVER_TIMING = config('SERVER_TIMING', default=False, cast=bool)
+
+# Prometheus metrics, scraped from /api/metrics/ with
+# "Authorization: Bearer <METRICS_TOKEN>" (the endpoint is off without a token)
+METRICS_ENABLED = config('METRICS_ENABLED', default=True, cast=bool)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Request profiling: signed X-Profile header or a sampled share of traffic,
+# results kept in the cache for PROFILING_RETENTION seconds.
+PROFILING_ENABLED = config('PROFILING_ENABLED', default=False, cast=bool)
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+PROFILING_TRACEMALLOC = config('PROFILING_TRACEMALLOC', default=False, cast=bool)
+PROFILING_INTERVAL = config('PROFILING_INTERVAL', default=0.005, cast=float)
+PROFILING_RETENTION = config('PROFILING_RETENTION', default=86400, cast=int)
+PROFILING_TOKEN_MAX_AGE = config('PROFILING_TOKEN_MAX_AGE', default=3600, cast=int)
+
+# Lifetime of the signed tokens members accept invitations with
+INVITATION_TOKEN_MAX_AGE = config('INVITATION_TOKEN_MAX_AGE', default=7 * 24 * 3600, cast=int)
+# How long rejected and expired invitations are kept before sweep_invitations deletes them
+INVITATION_RETENTION = config('INVITATION_RETENTION', default=30 * 24 * 3600, cast=int)
+# How long deleted organizations can be restored before purge_organizations deletes their data
+ORGANIZATION_RETENTION = config('ORGANIZATION_RETENTION', default=30 * 24 * 3600, cast=int)
+
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+QUERY_CACHE_TIMEOUT = config('QUERY_CACHE_TIMEOUT', default=600, cast=int)
+
+
+
+# Serve the org and HR viewsets as async views (see AsyncViewMixin); only
+# worth it when running under an ASGI server (svcs/asgi.py)
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
+# Work done by svcs/wsgi.py and svcs/asgi.py at startup instead of on the first request
+# (see api/warmup.py)
+WARMUP_STEPS = config('WARMUP_STEPS', default='urls,drf,permissions,jwks', cast=Csv())
+# The jwks step runs while the application module is imported: one attempt,
+# bounded by this many seconds, then the first request fetches it instead
+WARMUP_JWKS_TIMEOUT = config('WARMUP_JWKS_TIMEOUT', default=1.0, cast=float)
 
 
 
@@ -165,37 +240,51 @@ RESEND_API_KEY = config('RESEND_API_KEY')
 
 
 
+# Records are queued and written by a background thread (api/logs.py), as
+# JSON lines unless LOG_JSON is off. Serverless deployments (VERCEL is set
+# there) have a read-only filesystem and only log to stderr.
+LOG_LEVEL = config('LOG_LEVEL', default='INFO')
+LOG_JSON = config('LOG_JSON', default=True, cast=bool)
+LOG_INFO_SAMPLE_RATE = config('LOG_INFO_SAMPLE_RATE', default=1.0, cast=float)
+LOG_FILE = config('LOG_FILE', default='' if config('VERCEL', default='') else 'debug.log')
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
-    'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
-            'level': 'INFO',   
-            'formatter': 'verbose'
+    'filters': {
+        'request_context': {
+            '()': 'api.logs.RequestContextFilter',
         },
-        'file': {
-            'class': 'logging.FileHandler',
-            'level': 'INFO',   
-            'formatter': 'verbose',
-            'filename': 'debug.log'
+        'sampling': {
+            '()': 'api.logs.SamplingFilter',
+            'rate': LOG_INFO_SAMPLE_RATE,
+        },
+    },
+    'handlers': {
+        'queue': {
+            'class': 'api.logs.QueuedHandler',
+            'level': LOG_LEVEL,
+            'filters': ['sampling', 'request_context'],
+            'formatter': 'json' if LOG_JSON else 'verbose',
+            'filename': LOG_FILE or None,
         },
     },
     'loggers': {
         'django': {
-            'handlers': ['console', 'file'],
-            'level': 'INFO',   
-            'propagate': True,
+            'level': LOG_LEVEL,
         },
     },
     'root': {
-        'handlers': ['console', 'file'],
-        'level': 'INFO',   
-    },     
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
+    },
     'formatters': {
         'verbose': {
             'format': '{asctime}( {levelname}) - {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'api.logs.JSONFormatter',
+        },
     },
-}
\ No newline at end of file
+}
@@ -0,0 +1,77 @@
+from urllib.parse import parse_qsl, urlparse
+from decouple import Csv, config
+
+
+# <========== Database connections ==========> #
+#
+# DB_CONNECTION_MODE selects how workers hold their connections:
+#
+#   persistent  Keep one connection per worker thread for DB_CONN_MAX_AGE
+#               seconds, checked before reuse (default).
+#   pool        Per-worker psycopg pool (requires psycopg 3 with the `pool`
+#               extra), sized with DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE.
+#   pooler      Connecting through a transaction-level pooler (PgBouncer,
+#               Neon's -pooler endpoint): connections are kept like
+#               `persistent`, but nothing may outlive a transaction, so
+#               server-side cursors and prepared statements are disabled.
+
+PERSISTENT = 'persistent'
+POOL = 'pool'
+POOLER = 'pooler'
+CONNECTION_MODES = (PERSISTENT, POOL, POOLER)
+
+
+def database_from_url(url, test_name=None, mirror=None):
+    """
+    Build a DATABASES entry from a postgres:// URL and the connection mode
+    settings.
+    """
+    mode = config('DB_CONNECTION_MODE', default=PERSISTENT)
+    if mode not in CONNECTION_MODES:
+        raise ValueError(f"DB_CONNECTION_MODE must be one of {', '.join(CONNECTION_MODES)}, got {mode!r}")
+
+    parsed = urlparse(url)
+    database = {
+        'ENGINE': 'api.db.backends.postgresql',
+        'NAME': parsed.path.replace('/', ''),
+        'USER': parsed.username,
+        'PASSWORD': parsed.password,
+        'HOST': parsed.hostname,
+        'PORT': parsed.port or 5432,
+        'OPTIONS': dict(parse_qsl(parsed.query)),
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=600, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+    }
+    if test_name:
+        database['TEST'] = {'NAME': test_name}
+    if mirror:
+        # Tests read the replica through the primary's test database
+        database['TEST'] = {'MIRROR': mirror}
+
+    if mode == POOL:
+        # Django returns connections to the pool at the end of each request
+        database['CONN_MAX_AGE'] = 0
+        database['CONN_HEALTH_CHECKS'] = False
+        database['OPTIONS']['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=1, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=4, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        }
+    elif mode == POOLER:
+        database['DISABLE_SERVER_SIDE_CURSORS'] = True
+        from django.db.backends.postgresql.psycopg_any import is_psycopg3
+        if is_psycopg3:
+            database['OPTIONS']['prepare_threshold'] = None
+
+    return database
+
+
+def replica_databases():
+    """
+    Return the DATABASES entries of the read replicas listed in
+    DATABASE_REPLICA_URLS (comma separated), keyed by alias.
+    """
+    return {
+        f'replica_{index}': database_from_url(url, mirror='default')
+        for index, url in enumerate(config('DATABASE_REPLICA_URLS', default='', cast=Csv()))
+    }
@@ -1,23 +1,14 @@
 from .common import *
 
 
-tmpPostgres = urlparse(os.getenv("DATABASE_URL"))
+from .database import database_from_url, replica_databases
 
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': tmpPostgres.path.replace('/', ''),
-        'USER': tmpPostgres.username,
-        'PASSWORD': tmpPostgres.password,
-        'HOST': tmpPostgres.hostname,
-        'PORT': 5432,
-        'TEST': {
-            'NAME': 'test_neondb_unique'
-        }
-    },
-
+    'default': database_from_url(os.getenv("DATABASE_URL"), test_name='test_neondb_unique'),
+    **replica_databases(),
 }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
 
 
 CORS_ALLOWED_ORIGINS = [
@@ -28,4 +19,19 @@ SECRET_KEY = 'django-insecure-s%toq7wi0frjk-p3@k=)#4@7^h$di&o%77n5ya^)h9hbkb8*_5
 
 DEBUG = True
 
+# runserver is a single process: its LocMemCache is shared by every request
+SHARED_CACHE = True
+
+QUERY_COUNT_HEADERS = True
+SERVER_TIMING = True
+
+# Development only tooling, kept out of the production import graph
+INSTALLED_APPS = [*INSTALLED_APPS, 'debug_toolbar']
+MIDDLEWARE = [*MIDDLEWARE]
+MIDDLEWARE.insert(MIDDLEWARE.index('api.middleware.ProfilingMiddleware'), 'debug_toolbar.middleware.DebugToolbarMiddleware')
+
+INTERNAL_IPS = [
+    "127.0.0.1",
+]
+
 ALLOWED_HOSTS = ['*']
\ No newline at end of file
@@ -2,24 +2,21 @@ from .common import *
 
 DEBUG = False
 
+# JSON only: the browsable API (and its template stack) is a development aid
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ['api.renderers.TimezoneAwareJSONRenderer'],
+}
 
-tmpPostgres = urlparse(os.getenv("DATABASE_URL"))
 
+from .database import database_from_url, replica_databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': tmpPostgres.path.replace('/', ''),
-        'USER': tmpPostgres.username,
-        'PASSWORD': tmpPostgres.password,
-        'HOST': tmpPostgres.hostname,
-        'PORT': 5432,
-        'TEST': {
-            'NAME': 'test_neondb_unique'
-        }
-    },
 
+DATABASES = {
+    'default': database_from_url(os.getenv("DATABASE_URL"), test_name='test_neondb_unique'),
+    **replica_databases(),
 }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
 
 
 
@@ -8,4 +8,8 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'svcs.settings.prod')
 
 application = get_wsgi_application()
 
+from api.warmup import warm_up  # noqa: E402 (needs the app registry loaded above)
+
+warm_up()
+
 app = application